@@ -20,8 +20,11 @@ import OpenRTM__POA,OpenRTM
 import RTC
 import time
 import sys
+import paho.mqtt.client as mqtt
 from OpenRTM_aist_paho_mqtt_module.paho_client.PahoSubSecure import PahoSubSecure
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoCompressor import PahoCompressor
 from OpenRTM_aist_paho_mqtt_module.reserializer.DataTypeFormat import DataTypeFormat
+from OpenRTM_aist_paho_mqtt_module.reserializer.DataTypeFormatPool import DataTypeFormatPool
 
 ##
 # @class InPortPahoSubJsonSecure
@@ -44,6 +47,8 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     self._buffer = None
     self._profile = None
     self._listeners = None
+    self._bufferReadListener = None
+    self.__decoder = None
 
     callback = self.on_message
     PahoSubSecure.set_on_message(self, callback)
@@ -64,6 +69,9 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
   # @brief Exit
   #
   def exit(self):
+    if self._bufferReadListener is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_READ].removeListener(self._bufferReadListener)
+      self._bufferReadListener = None
     oid = OpenRTM_aist.Manager.instance().getPOA().servant_to_id(self)
     OpenRTM_aist.Manager.instance().getPOA().deactivate_object(oid)
 
@@ -86,6 +94,10 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
   def setListener(self, info, listeners):
     self._profile = info
     self._listeners = listeners
+    # Wake up the writes waiting with flow control when the buffer is read
+    if listeners is not None and PahoSubSecure.paho_flow_control_enabled(self) and self._bufferReadListener is None:
+      self._bufferReadListener = BufferReadListener(self)
+      listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_READ].addListener(self._bufferReadListener, True)
     return
 
   ##
@@ -94,16 +106,42 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
   def on_message(self, mqttc, obj, msg):
     try:
       self._rtcout.RTC_PARANOID("InPortPahoSubJsonSecure.on_message()")
-      data = msg.payload
+      data = PahoSubSecure.paho_reassemble(self, msg)
+      if data is None:
+        return OpenRTM.PORT_OK
+      data = PahoCompressor.decompress(data)
+      if data is None:
+        self._rtcout.RTC_WARN("Broken compressed message was dropped.")
+        return OpenRTM.PORT_ERROR
+
+      if self.__decoder:
+        self.__decoder.submit(data)
+        return OpenRTM.PORT_OK
 
       cdrmsg = self.__formatter.reserializeFromJsonToCdr(data)
 
+      return self.put(cdrmsg)
+
+    except:
+      self._rtcout.RTC_TRACE(OpenRTM_aist.Logger.print_exception())
+      return OpenRTM.UNKNOWN_ERROR
+
+  ##
+  # @brief Write reserialized data to the buffer
+  #
+  def put(self, cdrmsg):
+    try:
+      self._rtcout.RTC_PARANOID("InPortPahoSubJsonSecure.put()")
+
+      if cdrmsg is None:
+        return OpenRTM.UNKNOWN_ERROR
+
       if not self._buffer:
         #self.onReceiverError(data)
         self.onReceiverError(cdrmsg)
         return OpenRTM.PORT_ERROR
 
-      self._rtcout.RTC_PARANOID("received data size: %d", len(data))
+      self._rtcout.RTC_PARANOID("received data size: %d", len(cdrmsg))
 
       #self.onReceived(data)
       self.onReceived(cdrmsg)
@@ -112,7 +150,11 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
         return OpenRTM.PORT_ERROR
 
       #ret = self._connector.write(data)
+      # With flow control, wait for a read of the buffer instead of dropping the data
+      flow = PahoSubSecure.paho_flow_begin(self)
       ret = self._connector.write(cdrmsg)
+      while (ret == OpenRTM_aist.BufferStatus.BUFFER_FULL or ret == OpenRTM_aist.BufferStatus.TIMEOUT) and PahoSubSecure.paho_flow_wait(self, flow):
+        ret = self._connector.write(cdrmsg)
 
       #return self.convertReturn(ret, data)
       return self.convertReturn(ret, cdrmsg)
@@ -196,6 +238,22 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     PN_CACERT = "cacert"
     PN_CLTCERT = "cltcert"
     PN_CLTKEY = "cltkey"
+    PN_LOOP = "loop"
+    PN_ASYNC = "async"
+    PN_WORKERS = "workers"
+    PN_RINGSZ = "ring_size"
+    PN_DECPROCS = "decode_procs"
+    PN_DECWIN = "decode_window"
+    PN_JSONBE = "json_backend"
+    PN_FRAGTO = "frag_timeout"
+    PN_FRAGMEM = "frag_mem"
+    PN_PROTOCOL = "protocol"
+    PN_SHARE = "share_group"
+    PN_FLOW = "flow_control"
+    PN_BUFLEN = "buffer.length"
+    PN_POOL = "pool"
+    PN_DEDUP = "dedup"
+    PN_DEDUPWIN = "dedup_window"
 
     index0 = self.findProp(properties, PN_HOST)
     index1 = self.findProp(properties, PN_PORT)
@@ -207,6 +265,22 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     index7 = self.findProp(properties, PN_CACERT)
     index8 = self.findProp(properties, PN_CLTCERT)
     index9 = self.findProp(properties, PN_CLTKEY)
+    indexA = self.findProp(properties, PN_LOOP)
+    indexB = self.findProp(properties, PN_ASYNC)
+    indexC = self.findProp(properties, PN_WORKERS)
+    indexD = self.findProp(properties, PN_RINGSZ)
+    indexE = self.findProp(properties, PN_DECPROCS)
+    indexF = self.findProp(properties, PN_DECWIN)
+    indexG = self.findProp(properties, PN_JSONBE)
+    indexH = self.findProp(properties, PN_FRAGTO)
+    indexI = self.findProp(properties, PN_FRAGMEM)
+    indexJ = self.findProp(properties, PN_PROTOCOL)
+    indexK = self.findProp(properties, PN_SHARE)
+    indexL = self.findProp(properties, PN_FLOW)
+    indexM = self.findProp(properties, PN_BUFLEN)
+    indexN = self.findProp(properties, PN_POOL)
+    indexO = self.findProp(properties, PN_DEDUP)
+    indexP = self.findProp(properties, PN_DEDUPWIN)
 
     tmp_host = "localhost"
     tmp_port = 8883
@@ -218,6 +292,22 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     tmp_cacert = "./ca.crt"
     tmp_cltcert = "./client.crt"
     tmp_cltkey = "./client.key"
+    tmp_loop = "thread"
+    tmp_async = False
+    tmp_workers = 0
+    tmp_ringsz = 1000
+    tmp_decprocs = 0
+    tmp_decwin = 64
+    tmp_jsonbe = "auto"
+    tmp_fragto = 10.0
+    tmp_fragmem = 67108864
+    tmp_protocol = "311"
+    tmp_share = ""
+    tmp_flow = False
+    tmp_buflen = 8
+    tmp_pool = False
+    tmp_dedup = False
+    tmp_dedupwin = 1024
 
     if index0 < 0:
       print("Server address not found. Default server address '" + tmp_host + "' is used.")
@@ -351,22 +441,271 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
       except:
         self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
 
+    if indexA < 0:
+      print("NetworkLoop not found. Default network_loop '" + tmp_loop + "' is used.")
+    else:
+      try:
+        tmp_loop = any.from_any(properties[indexA].value, keep_structs=True)
+        if not tmp_loop:
+          self._rtcout.RTC_ERROR("NetworkLoop has no string.")
+          return False
+        if not tmp_loop in ("thread", "shared"):
+          tmp_loop = "thread"
+        print("network_loop: " + tmp_loop)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexB < 0:
+      print("AsyncConnect not found. Default async_connect '" + str(tmp_async) + "' is used.")
+    else:
+      try:
+        str_async = any.from_any(properties[indexB].value, keep_structs=True)
+        if not str_async:
+          self._rtcout.RTC_ERROR("AsyncConnect has no string.")
+          return False
+        if str_async == "True" or str_async == "true" or str_async == "TRUE" or str_async == "t" or str_async == "T" or str_async == "1":
+          tmp_async = True
+        print("async_connect: " + str(tmp_async))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexC < 0:
+      print("Workers not found. Default workers '" + str(tmp_workers) + "' is used.")
+    else:
+      try:
+        str_workers = any.from_any(properties[indexC].value, keep_structs=True)
+        if not str_workers:
+          self._rtcout.RTC_ERROR("Workers has no string.")
+          return False
+        tmp_workers = int(str_workers)
+        if tmp_workers < 0 or tmp_workers > 64:
+          tmp_workers = 0
+        print("workers: " + str(tmp_workers))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexD < 0:
+      print("RingSize not found. Default ring_size '" + str(tmp_ringsz) + "' is used.")
+    else:
+      try:
+        str_ringsz = any.from_any(properties[indexD].value, keep_structs=True)
+        if not str_ringsz:
+          self._rtcout.RTC_ERROR("RingSize has no string.")
+          return False
+        tmp_ringsz = int(str_ringsz)
+        if tmp_ringsz < 1 or tmp_ringsz > 1000000:
+          tmp_ringsz = 1000
+        print("ring_size: " + str(tmp_ringsz))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexE < 0:
+      print("DecodeProcesses not found. Default decode_procs '" + str(tmp_decprocs) + "' is used.")
+    else:
+      try:
+        str_decprocs = any.from_any(properties[indexE].value, keep_structs=True)
+        if not str_decprocs:
+          self._rtcout.RTC_ERROR("DecodeProcesses has no string.")
+          return False
+        tmp_decprocs = int(str_decprocs)
+        if tmp_decprocs < 0 or tmp_decprocs > 64:
+          tmp_decprocs = 0
+        print("decode_procs: " + str(tmp_decprocs))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexF < 0:
+      print("DecodeWindow not found. Default decode_window '" + str(tmp_decwin) + "' is used.")
+    else:
+      try:
+        str_decwin = any.from_any(properties[indexF].value, keep_structs=True)
+        if not str_decwin:
+          self._rtcout.RTC_ERROR("DecodeWindow has no string.")
+          return False
+        tmp_decwin = int(str_decwin)
+        if tmp_decwin < 1 or tmp_decwin > 100000:
+          tmp_decwin = 64
+        print("decode_window: " + str(tmp_decwin))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexG < 0:
+      print("JsonBackend not found. Default json_backend '" + tmp_jsonbe + "' is used.")
+    else:
+      try:
+        tmp_jsonbe = any.from_any(properties[indexG].value, keep_structs=True)
+        if not tmp_jsonbe:
+          self._rtcout.RTC_ERROR("JsonBackend has no string.")
+          return False
+        if not tmp_jsonbe in ("auto", "orjson", "ujson", "rapidjson", "json"):
+          tmp_jsonbe = "auto"
+        print("json_backend: " + tmp_jsonbe)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexH < 0:
+      print("FragmentTimeout not found. Default frag_timeout '" + str(tmp_fragto) + "' is used.")
+    else:
+      try:
+        str_fragto = any.from_any(properties[indexH].value, keep_structs=True)
+        if not str_fragto:
+          self._rtcout.RTC_ERROR("FragmentTimeout has no string.")
+          return False
+        tmp_fragto = float(str_fragto)
+        if tmp_fragto < 0.0 or tmp_fragto > 3600.0:
+          tmp_fragto = 10.0
+        print("frag_timeout: " + str(tmp_fragto))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexI < 0:
+      print("FragmentMemory not found. Default frag_mem '" + str(tmp_fragmem) + "' is used.")
+    else:
+      try:
+        str_fragmem = any.from_any(properties[indexI].value, keep_structs=True)
+        if not str_fragmem:
+          self._rtcout.RTC_ERROR("FragmentMemory has no string.")
+          return False
+        tmp_fragmem = int(str_fragmem)
+        if tmp_fragmem < 0 or tmp_fragmem > 4294967295:
+          tmp_fragmem = 67108864
+        print("frag_mem: " + str(tmp_fragmem))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexJ < 0:
+      print("Protocol not found. Default protocol '" + tmp_protocol + "' is used.")
+    else:
+      try:
+        tmp_protocol = any.from_any(properties[indexJ].value, keep_structs=True)
+        if not tmp_protocol:
+          self._rtcout.RTC_ERROR("Protocol has no string.")
+          return False
+        if not tmp_protocol in ("311", "5"):
+          tmp_protocol = "311"
+        print("protocol: " + tmp_protocol)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexK < 0:
+      print("ShareGroup not found. Shared subscription is not used.")
+    else:
+      try:
+        tmp_share = any.from_any(properties[indexK].value, keep_structs=True)
+        if not tmp_share:
+          tmp_share = ""
+          print("ShareGroup has no string. Shared subscription is not used.")
+        else:
+          print("share_group: " + tmp_share)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexL < 0:
+      print("FlowControl not found. Default flow_control '" + str(tmp_flow) + "' is used.")
+    else:
+      try:
+        str_flow = any.from_any(properties[indexL].value, keep_structs=True)
+        if not str_flow:
+          self._rtcout.RTC_ERROR("FlowControl has no string.")
+          return False
+        if str_flow == "True" or str_flow == "true" or str_flow == "TRUE" or str_flow == "t" or str_flow == "T" or str_flow == "1":
+          tmp_flow = True
+        print("flow_control: " + str(tmp_flow))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexM >= 0:
+      try:
+        str_buflen = any.from_any(properties[indexM].value, keep_structs=True)
+        if not str_buflen:
+          self._rtcout.RTC_ERROR("BufferLength has no string.")
+          return False
+        tmp_buflen = int(str_buflen)
+        if tmp_buflen < 1:
+          tmp_buflen = 8
+        print("buffer_length: " + str(tmp_buflen))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexN < 0:
+      print("ClientPool not found. Default client_pool '" + str(tmp_pool) + "' is used.")
+    else:
+      try:
+        str_pool = any.from_any(properties[indexN].value, keep_structs=True)
+        if not str_pool:
+          self._rtcout.RTC_ERROR("ClientPool has no string.")
+          return False
+        if str_pool == "True" or str_pool == "true" or str_pool == "TRUE" or str_pool == "t" or str_pool == "T" or str_pool == "1":
+          tmp_pool = True
+        print("client_pool: " + str(tmp_pool))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexO < 0:
+      print("Deduplication not found. Default dedup '" + str(tmp_dedup) + "' is used.")
+    else:
+      try:
+        str_dedup = any.from_any(properties[indexO].value, keep_structs=True)
+        if not str_dedup:
+          self._rtcout.RTC_ERROR("Deduplication has no string.")
+          return False
+        if str_dedup == "True" or str_dedup == "true" or str_dedup == "TRUE" or str_dedup == "t" or str_dedup == "T" or str_dedup == "1":
+          tmp_dedup = True
+        print("dedup: " + str(tmp_dedup))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexP < 0:
+      print("DedupWindow not found. Default dedup_window '" + str(tmp_dedupwin) + "' is used.")
+    else:
+      try:
+        str_dedupwin = any.from_any(properties[indexP].value, keep_structs=True)
+        if not str_dedupwin:
+          self._rtcout.RTC_ERROR("DedupWindow has no string.")
+          return False
+        tmp_dedupwin = int(str_dedupwin)
+        if tmp_dedupwin < 1 or tmp_dedupwin > 65536:
+          tmp_dedupwin = 1024
+        print("dedup_window: " + str(tmp_dedupwin))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
     self.generateDataTypeInfo(properties)
 
     if self.__datatype and self.__endian:
-      self.__formatter = DataTypeFormat(self.__datatype, self.__endian)
+      self.__formatter = DataTypeFormat(self.__datatype, self.__endian, tmp_jsonbe)
+      if tmp_decprocs > 0:
+        self.__decoder = DataTypeFormatPool(self.__datatype, self.__endian, tmp_decprocs, tmp_decwin, self.put, tmp_jsonbe)
     else:
       self._rtcout.RTC_ERROR("DataType or Endian is unknown.")
       return False
 
     print("[connecting to MQTT broker start]")
+    PahoSubSecure.paho_protocol_set(self, mqtt.MQTTv5 if tmp_protocol == "5" else mqtt.MQTTv311)
     PahoSubSecure.paho_initialize(self, tmp_id, tmp_cs, tmp_topic, tmp_qos)
+    PahoSubSecure.paho_share_set(self, tmp_share)
     PahoSubSecure.paho_secure_set(self, tmp_cacert, tmp_cltcert, tmp_cltkey)
+    PahoSubSecure.paho_shared_loop_set(self, tmp_loop == "shared")
+    PahoSubSecure.paho_async_set(self, tmp_async)
+    PahoSubSecure.paho_dispatch_set(self, tmp_workers, tmp_ringsz)
+    PahoSubSecure.paho_reassembly_set(self, tmp_fragto, tmp_fragmem)
+    PahoSubSecure.paho_flow_control_set(self, tmp_buflen if tmp_flow else 0)
+    PahoSubSecure.paho_pool_set(self, tmp_pool)
+    PahoSubSecure.paho_dedup_set(self, tmp_dedup, tmp_dedupwin)
     PahoSubSecure.paho_connect(self, tmp_host, tmp_port, tmp_kpalv)
     print("[connecting to MQTT broker end]")
 
     return True
 
+  ##
+  # @brief Disconnect from MQTT broker and stop the decoding processes
+  #
+  def paho_disconnect(self):
+    PahoSubSecure.paho_disconnect(self)
+    if self.__decoder:
+      self.__decoder.stop()
+      self.__decoder = None
+
   ##
   # @brief Connector data listener functions
   #
@@ -470,6 +809,22 @@ class InPortPahoSubJsonSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     tmp_datatype = PREFIX + tmp_datatype
     self.__datatype = OpenRTM_aist.instantiateDataType(eval(tmp_datatype))
 
+##
+# @class BufferReadListener
+# @brief Wake up the writes waiting for the full buffer with flow control
+#
+class BufferReadListener(OpenRTM_aist.ConnectorDataListener):
+  def __init__(self, InPortPahoSubJsonSecure):
+    self._InPortPahoSubJsonSecure = InPortPahoSubJsonSecure
+
+  ##
+  # @brief Notify a read of the buffer, ignoring the buffers of the other connectors of the port
+  #
+  def __call__(self, info, cdrdata):
+    if info.id == self._InPortPahoSubJsonSecure._profile.id:
+      PahoSubSecure.paho_flow_notify(self._InPortPahoSubJsonSecure)
+    return OpenRTM_aist.ConnectorListenerStatus.NO_CHANGE, cdrdata
+
 ##
 # @class ManagerActionListener
 # @brief ManagerActionListener class
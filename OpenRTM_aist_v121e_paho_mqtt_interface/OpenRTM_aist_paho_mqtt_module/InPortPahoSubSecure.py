@@ -19,7 +19,10 @@ import OpenRTM_aist
 import OpenRTM__POA,OpenRTM
 import time
 import sys
+import paho.mqtt.client as mqtt
 from OpenRTM_aist_paho_mqtt_module.paho_client.PahoSubSecure import PahoSubSecure
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoBatcher import PahoBatcher
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoCompressor import PahoCompressor
 
 ##
 # @class InPortPahoSubSecure
@@ -42,6 +45,7 @@ class InPortPahoSubSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     self._buffer = None
     self._profile = None
     self._listeners = None
+    self._bufferReadListener = None
 
     callback = self.on_message
     PahoSubSecure.set_on_message(self, callback)
@@ -62,6 +66,9 @@ class InPortPahoSubSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
   # @brief Exit
   #
   def exit(self):
+    if self._bufferReadListener is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_READ].removeListener(self._bufferReadListener)
+      self._bufferReadListener = None
     oid = OpenRTM_aist.Manager.instance().getPOA().servant_to_id(self)
     OpenRTM_aist.Manager.instance().getPOA().deactivate_object(oid)
 
@@ -84,16 +91,44 @@ class InPortPahoSubSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
   def setListener(self, info, listeners):
     self._profile = info
     self._listeners = listeners
+    # Wake up the writes waiting with flow control when the buffer is read
+    if listeners is not None and PahoSubSecure.paho_flow_control_enabled(self) and self._bufferReadListener is None:
+      self._bufferReadListener = BufferReadListener(self)
+      listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_READ].addListener(self._bufferReadListener, True)
     return
 
   ##
   # @brief Call back function when received MQTT message
   #
+  # Fragments are held until the message is complete. A compressed message
+  # is decompressed, and a batched message is unpacked and its samples are
+  # written in order.
+  #
   def on_message(self, mqttc, obj, msg):
+    self._rtcout.RTC_PARANOID("InPortPahoSubSecure.on_message()")
+    payload = PahoSubSecure.paho_reassemble(self, msg)
+    if payload is None:
+      return OpenRTM.PORT_OK
+    payload = PahoCompressor.decompress(payload)
+    if payload is None:
+      self._rtcout.RTC_WARN("Broken compressed message was dropped.")
+      return OpenRTM.PORT_ERROR
+    samples = PahoBatcher.unpack(payload)
+    if samples is None:
+      return self.put(payload)
+
+    ret = OpenRTM.PORT_OK
+    for data in samples:
+      ret = self.put(data)
+    return ret
+
+  ##
+  # @brief Write received data to the buffer
+  #
+  def put(self, data):
     try:
-      self._rtcout.RTC_PARANOID("InPortPahoSubSecure.on_message()")
-      data = msg.payload
-            
+      self._rtcout.RTC_PARANOID("InPortPahoSubSecure.put()")
+
       if not self._buffer:
         self.onReceiverError(data)
         return OpenRTM.PORT_ERROR
@@ -105,7 +140,11 @@ class InPortPahoSubSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
       if not self._connector:
         return OpenRTM.PORT_ERROR
 
+      # With flow control, wait for a read of the buffer instead of dropping the data
+      flow = PahoSubSecure.paho_flow_begin(self)
       ret = self._connector.write(data)
+      while (ret == OpenRTM_aist.BufferStatus.BUFFER_FULL or ret == OpenRTM_aist.BufferStatus.TIMEOUT) and PahoSubSecure.paho_flow_wait(self, flow):
+        ret = self._connector.write(data)
 
       return self.convertReturn(ret, data)
 
@@ -188,6 +227,19 @@ class InPortPahoSubSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     PN_CACERT = "cacert"
     PN_CLTCERT = "cltcert"
     PN_CLTKEY = "cltkey"
+    PN_LOOP = "loop"
+    PN_ASYNC = "async"
+    PN_WORKERS = "workers"
+    PN_RINGSZ = "ring_size"
+    PN_FRAGTO = "frag_timeout"
+    PN_FRAGMEM = "frag_mem"
+    PN_PROTOCOL = "protocol"
+    PN_SHARE = "share_group"
+    PN_FLOW = "flow_control"
+    PN_BUFLEN = "buffer.length"
+    PN_POOL = "pool"
+    PN_DEDUP = "dedup"
+    PN_DEDUPWIN = "dedup_window"
 
     index0 = self.findProp(properties, PN_HOST)
     index1 = self.findProp(properties, PN_PORT)
@@ -199,6 +251,19 @@ class InPortPahoSubSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     index7 = self.findProp(properties, PN_CACERT)
     index8 = self.findProp(properties, PN_CLTCERT)
     index9 = self.findProp(properties, PN_CLTKEY)
+    indexA = self.findProp(properties, PN_LOOP)
+    indexB = self.findProp(properties, PN_ASYNC)
+    indexC = self.findProp(properties, PN_WORKERS)
+    indexD = self.findProp(properties, PN_RINGSZ)
+    indexE = self.findProp(properties, PN_FRAGTO)
+    indexF = self.findProp(properties, PN_FRAGMEM)
+    indexG = self.findProp(properties, PN_PROTOCOL)
+    indexH = self.findProp(properties, PN_SHARE)
+    indexI = self.findProp(properties, PN_FLOW)
+    indexJ = self.findProp(properties, PN_BUFLEN)
+    indexK = self.findProp(properties, PN_POOL)
+    indexL = self.findProp(properties, PN_DEDUP)
+    indexM = self.findProp(properties, PN_DEDUPWIN)
 
     tmp_host = "localhost"
     tmp_port = 8883
@@ -210,6 +275,19 @@ class InPortPahoSubSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     tmp_cacert = "./ca.crt"
     tmp_cltcert = "./client.crt"
     tmp_cltkey = "./client.key"
+    tmp_loop = "thread"
+    tmp_async = False
+    tmp_workers = 0
+    tmp_ringsz = 1000
+    tmp_fragto = 10.0
+    tmp_fragmem = 67108864
+    tmp_protocol = "311"
+    tmp_share = ""
+    tmp_flow = False
+    tmp_buflen = 8
+    tmp_pool = False
+    tmp_dedup = False
+    tmp_dedupwin = 1024
 
     if index0 < 0:
       print("Server address not found. Default server address '" + tmp_host + "' is used.")
@@ -343,9 +421,203 @@ class InPortPahoSubSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
       except:
         self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
 
+    if indexA < 0:
+      print("NetworkLoop not found. Default network_loop '" + tmp_loop + "' is used.")
+    else:
+      try:
+        tmp_loop = any.from_any(properties[indexA].value, keep_structs=True)
+        if not tmp_loop:
+          self._rtcout.RTC_ERROR("NetworkLoop has no string.")
+          return False
+        if not tmp_loop in ("thread", "shared"):
+          tmp_loop = "thread"
+        print("network_loop: " + tmp_loop)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexB < 0:
+      print("AsyncConnect not found. Default async_connect '" + str(tmp_async) + "' is used.")
+    else:
+      try:
+        str_async = any.from_any(properties[indexB].value, keep_structs=True)
+        if not str_async:
+          self._rtcout.RTC_ERROR("AsyncConnect has no string.")
+          return False
+        if str_async == "True" or str_async == "true" or str_async == "TRUE" or str_async == "t" or str_async == "T" or str_async == "1":
+          tmp_async = True
+        print("async_connect: " + str(tmp_async))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexC < 0:
+      print("Workers not found. Default workers '" + str(tmp_workers) + "' is used.")
+    else:
+      try:
+        str_workers = any.from_any(properties[indexC].value, keep_structs=True)
+        if not str_workers:
+          self._rtcout.RTC_ERROR("Workers has no string.")
+          return False
+        tmp_workers = int(str_workers)
+        if tmp_workers < 0 or tmp_workers > 64:
+          tmp_workers = 0
+        print("workers: " + str(tmp_workers))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexD < 0:
+      print("RingSize not found. Default ring_size '" + str(tmp_ringsz) + "' is used.")
+    else:
+      try:
+        str_ringsz = any.from_any(properties[indexD].value, keep_structs=True)
+        if not str_ringsz:
+          self._rtcout.RTC_ERROR("RingSize has no string.")
+          return False
+        tmp_ringsz = int(str_ringsz)
+        if tmp_ringsz < 1 or tmp_ringsz > 1000000:
+          tmp_ringsz = 1000
+        print("ring_size: " + str(tmp_ringsz))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexE < 0:
+      print("FragmentTimeout not found. Default frag_timeout '" + str(tmp_fragto) + "' is used.")
+    else:
+      try:
+        str_fragto = any.from_any(properties[indexE].value, keep_structs=True)
+        if not str_fragto:
+          self._rtcout.RTC_ERROR("FragmentTimeout has no string.")
+          return False
+        tmp_fragto = float(str_fragto)
+        if tmp_fragto < 0.0 or tmp_fragto > 3600.0:
+          tmp_fragto = 10.0
+        print("frag_timeout: " + str(tmp_fragto))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexF < 0:
+      print("FragmentMemory not found. Default frag_mem '" + str(tmp_fragmem) + "' is used.")
+    else:
+      try:
+        str_fragmem = any.from_any(properties[indexF].value, keep_structs=True)
+        if not str_fragmem:
+          self._rtcout.RTC_ERROR("FragmentMemory has no string.")
+          return False
+        tmp_fragmem = int(str_fragmem)
+        if tmp_fragmem < 0 or tmp_fragmem > 4294967295:
+          tmp_fragmem = 67108864
+        print("frag_mem: " + str(tmp_fragmem))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexG < 0:
+      print("Protocol not found. Default protocol '" + tmp_protocol + "' is used.")
+    else:
+      try:
+        tmp_protocol = any.from_any(properties[indexG].value, keep_structs=True)
+        if not tmp_protocol:
+          self._rtcout.RTC_ERROR("Protocol has no string.")
+          return False
+        if not tmp_protocol in ("311", "5"):
+          tmp_protocol = "311"
+        print("protocol: " + tmp_protocol)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexH < 0:
+      print("ShareGroup not found. Shared subscription is not used.")
+    else:
+      try:
+        tmp_share = any.from_any(properties[indexH].value, keep_structs=True)
+        if not tmp_share:
+          tmp_share = ""
+          print("ShareGroup has no string. Shared subscription is not used.")
+        else:
+          print("share_group: " + tmp_share)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexI < 0:
+      print("FlowControl not found. Default flow_control '" + str(tmp_flow) + "' is used.")
+    else:
+      try:
+        str_flow = any.from_any(properties[indexI].value, keep_structs=True)
+        if not str_flow:
+          self._rtcout.RTC_ERROR("FlowControl has no string.")
+          return False
+        if str_flow == "True" or str_flow == "true" or str_flow == "TRUE" or str_flow == "t" or str_flow == "T" or str_flow == "1":
+          tmp_flow = True
+        print("flow_control: " + str(tmp_flow))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexJ >= 0:
+      try:
+        str_buflen = any.from_any(properties[indexJ].value, keep_structs=True)
+        if not str_buflen:
+          self._rtcout.RTC_ERROR("BufferLength has no string.")
+          return False
+        tmp_buflen = int(str_buflen)
+        if tmp_buflen < 1:
+          tmp_buflen = 8
+        print("buffer_length: " + str(tmp_buflen))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexK < 0:
+      print("ClientPool not found. Default client_pool '" + str(tmp_pool) + "' is used.")
+    else:
+      try:
+        str_pool = any.from_any(properties[indexK].value, keep_structs=True)
+        if not str_pool:
+          self._rtcout.RTC_ERROR("ClientPool has no string.")
+          return False
+        if str_pool == "True" or str_pool == "true" or str_pool == "TRUE" or str_pool == "t" or str_pool == "T" or str_pool == "1":
+          tmp_pool = True
+        print("client_pool: " + str(tmp_pool))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexL < 0:
+      print("Deduplication not found. Default dedup '" + str(tmp_dedup) + "' is used.")
+    else:
+      try:
+        str_dedup = any.from_any(properties[indexL].value, keep_structs=True)
+        if not str_dedup:
+          self._rtcout.RTC_ERROR("Deduplication has no string.")
+          return False
+        if str_dedup == "True" or str_dedup == "true" or str_dedup == "TRUE" or str_dedup == "t" or str_dedup == "T" or str_dedup == "1":
+          tmp_dedup = True
+        print("dedup: " + str(tmp_dedup))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexM < 0:
+      print("DedupWindow not found. Default dedup_window '" + str(tmp_dedupwin) + "' is used.")
+    else:
+      try:
+        str_dedupwin = any.from_any(properties[indexM].value, keep_structs=True)
+        if not str_dedupwin:
+          self._rtcout.RTC_ERROR("DedupWindow has no string.")
+          return False
+        tmp_dedupwin = int(str_dedupwin)
+        if tmp_dedupwin < 1 or tmp_dedupwin > 65536:
+          tmp_dedupwin = 1024
+        print("dedup_window: " + str(tmp_dedupwin))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
     print("[connecting to MQTT broker start]")
+    PahoSubSecure.paho_protocol_set(self, mqtt.MQTTv5 if tmp_protocol == "5" else mqtt.MQTTv311)
     PahoSubSecure.paho_initialize(self, tmp_id, tmp_cs, tmp_topic, tmp_qos)
+    PahoSubSecure.paho_share_set(self, tmp_share)
     PahoSubSecure.paho_secure_set(self, tmp_cacert, tmp_cltcert, tmp_cltkey)
+    PahoSubSecure.paho_shared_loop_set(self, tmp_loop == "shared")
+    PahoSubSecure.paho_async_set(self, tmp_async)
+    PahoSubSecure.paho_dispatch_set(self, tmp_workers, tmp_ringsz)
+    PahoSubSecure.paho_reassembly_set(self, tmp_fragto, tmp_fragmem)
+    PahoSubSecure.paho_flow_control_set(self, tmp_buflen if tmp_flow else 0)
+    PahoSubSecure.paho_pool_set(self, tmp_pool)
+    PahoSubSecure.paho_dedup_set(self, tmp_dedup, tmp_dedupwin)
     PahoSubSecure.paho_connect(self, tmp_host, tmp_port, tmp_kpalv)
     print("[connecting to MQTT broker end]")
 
@@ -396,6 +668,22 @@ class InPortPahoSubSecure(OpenRTM_aist.InPortProvider, PahoSubSecure):
     return
 
 
+##
+# @class BufferReadListener
+# @brief Wake up the writes waiting for the full buffer with flow control
+#
+class BufferReadListener(OpenRTM_aist.ConnectorDataListener):
+  def __init__(self, InPortPahoSubSecure):
+    self._InPortPahoSubSecure = InPortPahoSubSecure
+
+  ##
+  # @brief Notify a read of the buffer, ignoring the buffers of the other connectors of the port
+  #
+  def __call__(self, info, cdrdata):
+    if info.id == self._InPortPahoSubSecure._profile.id:
+      PahoSubSecure.paho_flow_notify(self._InPortPahoSubSecure)
+    return OpenRTM_aist.ConnectorListenerStatus.NO_CHANGE, cdrdata
+
 ##
 # @class ManagerActionListener
 # @brief ManagerActionListener class
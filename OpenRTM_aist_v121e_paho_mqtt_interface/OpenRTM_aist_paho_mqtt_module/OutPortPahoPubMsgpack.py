@@ -0,0 +1,780 @@
+#!/usr/bin/env python
+# -*- coding: euc-jp -*-
+
+##
+# @file  OutPortPahoPubMsgpack.py
+# @brief OutPortPahoPubMsgpack class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+# Based on OutPortPahoPubJson.py, Copyright (C) 2020
+#     Daishi Yoshino
+#     Revitalization Center
+#     University of Aizu, Japan
+# Originally under LGPL in OpenRTM-aist, http://www.openrtm.org/
+#
+
+from omniORB import *
+import OpenRTM_aist
+import OpenRTM
+import RTC
+import time
+import sys
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+import paho.mqtt.client as mqtt
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoPublisher import PahoPublisher
+from OpenRTM_aist_paho_mqtt_module.reserializer.DataTypeFormat import DataTypeFormat
+
+##
+# @class OutPortPahoPubMsgpack
+# @brief OutPortPahoPubMsgpack class
+#
+class OutPortPahoPubMsgpack(OpenRTM_aist.InPortConsumer, PahoPublisher):
+  """
+  """
+
+  ##
+  # @brief Constructor
+  #
+  def __init__(self):
+    PahoPublisher.__init__(self)
+    self._rtcout = OpenRTM_aist.Manager.instance().getLogbuf("OutPortPahoPubMsgpack")
+    self._properties = None
+
+    self._mgr = OpenRTM_aist.Manager.instance()
+    self._mgr.addManagerActionListener(ManagerActionListener(self))
+
+    return
+
+  ##
+  # @brief Destructor
+  #
+  def __del__(self, CorbaConsumer=PahoPublisher):
+    self._rtcout.RTC_PARANOID("~OutPortPahoPubMsgpack()")
+    PahoPublisher.__del__(self)
+    return
+
+  ##
+  # @brief Initializing configuration
+  #
+  def init(self, prop):
+    self._rtcout.RTC_TRACE("init()")
+    self._properties = prop
+    return
+
+  ##
+  # @brief Send data to the destination port
+  #
+  def put(self, data):
+    self._rtcout.RTC_PARANOID("put()")
+
+    try:
+      msgpackmsg = self.__formatter.reserializeFromCdrToMsgpack(data)
+      #PahoPublisher.paho_pub(self, data)
+      ret = PahoPublisher.paho_pub(self, msgpackmsg)
+      return self.convertPahoReturnCode(ret)
+    except:
+      self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+      return self.CONNECTION_LOST
+
+  ##
+  # @brief Publish InterfaceProfile information
+  #
+  def publishInterfaceProfile(self, properties):
+    return
+
+  ##
+  # @brief Subscribe to the data sending notification
+  #
+  def subscribeInterface(self, properties):
+    self._rtcout.RTC_TRACE("subscribeInterface()")
+
+    if self.subscribePahoPubMsgpack(properties):
+      return True
+    
+    return False
+    
+  ##
+  # @brief Unsubscribe the data send notification
+  #
+  def unsubscribeInterface(self, properties):
+    self._rtcout.RTC_TRACE("unsubscribeInterface()")
+    
+    return
+
+  ##
+  # @brief Find index of the properties
+  #
+  # acceptable properties:
+  #     {<key>, dataport.<key>, dataport.outport.<key>}
+  #
+  def findProp(self, properties, key):
+    index = OpenRTM_aist.NVUtil.find_index(properties, key)
+    if index >= 0: return index
+    index = OpenRTM_aist.NVUtil.find_index(properties, 'dataport.' + key)
+    if index >= 0: return index
+    index = OpenRTM_aist.NVUtil.find_index(properties, 'dataport.outport.' + key)
+    if index >= 0: return index
+    return -1
+
+  ##
+  # @brief Set properties relating to Paho Client
+  #
+  def subscribePahoPubMsgpack(self, properties):
+    self._rtcout.RTC_TRACE("subscribePahoPubMsgpack()")
+    
+    PN_HOST = "host"
+    PN_PORT = "msport"
+    PN_KPALV = "kpalv"
+    PN_TOPIC = "topic"
+    PN_QOS = "qos"
+    PN_ID = "id"
+    PN_CS = "cs"
+    PN_MAXIF = "maxif"
+    PN_RETAIN = "retain"
+    PN_WILL = "will"
+    PN_CLRRM = "clrrm"
+    PN_POOL = "pool"
+    PN_LOOP = "loop"
+    PN_ASYNC = "async"
+    PN_OFFLINE = "offline"
+    PN_CONFLATE = "conflate"
+    PN_MAXQ = "maxq"
+    PN_QSIZE = "queue_size"
+    PN_QPOLICY = "queue_policy"
+    PN_QTIMEOUT = "queue_timeout"
+    PN_COMPRESS = "compress"
+    PN_CMPLEVEL = "compress_level"
+    PN_CMPMIN = "compress_min"
+    PN_MAXCHUNK = "max_chunk"
+    PN_PROTOCOL = "protocol"
+    PN_EXPIRY = "expiry"
+    PN_SEQUENCE = "sequence"
+
+    index0 = self.findProp(properties, PN_HOST)
+    index1 = self.findProp(properties, PN_PORT)
+    index2 = self.findProp(properties, PN_KPALV)
+    index3 = self.findProp(properties, PN_TOPIC)
+    index4 = self.findProp(properties, PN_QOS)
+    index5 = self.findProp(properties, PN_ID)
+    index6 = self.findProp(properties, PN_CS)
+    index7 = self.findProp(properties, PN_MAXIF)
+    index8 = self.findProp(properties, PN_RETAIN)
+    index9 = self.findProp(properties, PN_WILL)
+    indexA = self.findProp(properties, PN_CLRRM)
+    indexB = self.findProp(properties, PN_POOL)
+    indexC = self.findProp(properties, PN_LOOP)
+    indexD = self.findProp(properties, PN_ASYNC)
+    indexE = self.findProp(properties, PN_OFFLINE)
+    indexF = self.findProp(properties, PN_CONFLATE)
+    indexG = self.findProp(properties, PN_MAXQ)
+    indexH = self.findProp(properties, PN_QSIZE)
+    indexI = self.findProp(properties, PN_QPOLICY)
+    indexJ = self.findProp(properties, PN_QTIMEOUT)
+    indexK = self.findProp(properties, PN_COMPRESS)
+    indexL = self.findProp(properties, PN_CMPLEVEL)
+    indexM = self.findProp(properties, PN_CMPMIN)
+    indexN = self.findProp(properties, PN_MAXCHUNK)
+    indexO = self.findProp(properties, PN_PROTOCOL)
+    indexP = self.findProp(properties, PN_EXPIRY)
+    indexQ = self.findProp(properties, PN_SEQUENCE)
+
+    tmp_host = "localhost"
+    tmp_port = 1883
+    tmp_kpalv = 60
+    tmp_topic = "test"
+    tmp_qos = 0
+    tmp_id = ""
+    tmp_cs = True
+    tmp_maxif = 20
+    tmp_retain = False
+    tmp_will = False
+    tmp_willmsg = None
+    clear_retained_msg = False
+    tmp_pool = False
+    tmp_loop = "thread"
+    tmp_async = False
+    tmp_offline = "queue"
+    tmp_conflate = False
+    tmp_maxq = 0
+    tmp_qsize = 0
+    tmp_qpolicy = "drop_oldest"
+    tmp_qtimeout = 1.0
+    tmp_compress = "none"
+    tmp_cmplevel = -1
+    tmp_cmpmin = 1024
+    tmp_maxchunk = 0
+    tmp_protocol = "311"
+    tmp_expiry = 0
+    tmp_sequence = False
+
+    if index0 < 0:
+      print("Server address not found. Default server address '" + tmp_host + "' is used.")
+    else:
+      try:
+        tmp_host = any.from_any(properties[index0].value, keep_structs=True)
+        if not tmp_host:
+          self._rtcout.RTC_ERROR("Server address has no string.")
+          return False
+        print("Server address: " + tmp_host)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index1 < 0:
+      print("Port number not found. Default port '" + str(tmp_port) + "' is used.")
+    else:
+      try:
+        str_port = any.from_any(properties[index1].value, keep_structs=True)
+        if not str_port:
+          self._rtcout.RTC_ERROR("Port number has no string.")
+          return False
+        tmp_port = int(str_port)
+        if tmp_port < 0 or tmp_port > 65535:
+          tmp_port = 1883
+        print("Port: " + str(tmp_port))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index2 < 0:
+      print("Keepalive not found. Default keepalve '" + str(tmp_kpalv) + "' is used.")
+    else:
+      try:
+        str_kpalv = any.from_any(properties[index2].value, keep_structs=True)
+        if not str_kpalv:
+          self._rtcout.RTC_ERROR("Keepalive has no string.")
+          return False
+        tmp_kpalv = int(str_kpalv)
+        if tmp_kpalv < 0 or tmp_kpalv > 86400:
+          tmp_kpalv = 60
+        print("keepalive: " + str(tmp_kpalv))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index3 < 0:
+      print("Topic not found. Default Topic '" + tmp_topic + "' is used.")
+    else:
+      try:
+        tmp_topic = any.from_any(properties[index3].value, keep_structs=True)
+        if not tmp_topic:
+          self._rtcout.RTC_ERROR("Topic has no string.")
+          return False
+        print("Topic: " + tmp_topic)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index4 < 0:
+      print("QoS not found. Default QoS '" + str(tmp_qos) + "' is used.")
+    else:
+      try:
+        str_qos = any.from_any(properties[index4].value, keep_structs=True)
+        if not str_qos:
+          self._rtcout.RTC_ERROR("QoS has no string.")
+          return False
+        tmp_qos = int(str_qos)
+        if tmp_qos < 0 or tmp_qos > 2:
+          tmp_qos = 0
+        print("QoS: " + str(tmp_qos))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index5 < 0:
+      print("Client ID not found. Random number ID is used.")
+    else:
+      try:
+        tmp_id = any.from_any(properties[index5].value, keep_structs=True)
+        if not tmp_id:
+          tmp_id = ""
+          print("Client ID has no string. Random number ID is used.")
+        else:
+          print("Client ID: " + tmp_id)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index6 < 0:
+      print("CleanSession not found. Default clean_session '" + str(tmp_cs) + "' is used.")
+    else:
+      try:
+        str_cs = any.from_any(properties[index6].value, keep_structs=True)
+        if not str_cs:
+          self._rtcout.RTC_ERROR("Clean session has no string.")
+          return False
+        if str_cs == "False" or str_cs == "false" or str_cs == "FALSE" or str_cs == "f" or str_cs == "F" or str_cs == "0":
+          tmp_cs = False
+        print("Clean session: " + str(tmp_cs))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index7 < 0:
+      print("MaxInflight not found. Default max_inflight '" + str(tmp_maxif) + "' is used.")
+    else:
+      try:
+        str_maxif = any.from_any(properties[index7].value, keep_structs=True)
+        if not str_maxif:
+          self._rtcout.RTC_ERROR("MaxInflight has no string.")
+          return False
+        tmp_maxif = int(str_maxif)
+        if tmp_maxif < 0 or tmp_maxif > 65535:
+          tmp_maxif = 20
+        print("max_inflight: " + str(tmp_maxif))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index8 < 0:
+      print("Retained not found. Default retained '" + str(tmp_retain) + "' is used.")
+    else:
+      try:
+        str_retain = any.from_any(properties[index8].value, keep_structs=True)
+        if not str_retain:
+          self._rtcout.RTC_ERROR("Retained has no string.")
+          return False
+        if str_retain == "True" or str_retain == "true" or str_retain == "TRUE" or str_retain == "t" or str_retain == "T" or str_retain == "1":
+          tmp_retain = True
+        print("Retained: " + str(tmp_retain))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index9 < 0:
+      print("Last will not found. Default last will '" + str(tmp_will) + "' is used.")
+    else:
+      try:
+        str_will = any.from_any(properties[index9].value, keep_structs=True)
+        if not str_will:
+          self._rtcout.RTC_ERROR("Last will has no string.")
+          return False
+        if str_will == "True" or str_will == "true" or str_will == "TRUE" or str_will == "t" or str_will == "T" or str_will == "1":
+          tmp_will = True
+        print("Last will: " + str(tmp_will))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexA >= 0:
+      try:
+        str_clrrm = any.from_any(properties[indexA].value, keep_structs=True)
+        if not str_clrrm:
+          self._rtcout.RTC_ERROR("Clear_retained_message has no string.")
+          return False
+        if str_clrrm == "True" or str_clrrm == "true" or str_clrrm == "TRUE" or str_clrrm == "t" or str_clrrm == "T" or str_clrrm == "1":
+          clear_retained_msg = True
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexB < 0:
+      print("ClientPool not found. Default client_pool '" + str(tmp_pool) + "' is used.")
+    else:
+      try:
+        str_pool = any.from_any(properties[indexB].value, keep_structs=True)
+        if not str_pool:
+          self._rtcout.RTC_ERROR("ClientPool has no string.")
+          return False
+        if str_pool == "True" or str_pool == "true" or str_pool == "TRUE" or str_pool == "t" or str_pool == "T" or str_pool == "1":
+          tmp_pool = True
+        print("client_pool: " + str(tmp_pool))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexC < 0:
+      print("NetworkLoop not found. Default network_loop '" + tmp_loop + "' is used.")
+    else:
+      try:
+        tmp_loop = any.from_any(properties[indexC].value, keep_structs=True)
+        if not tmp_loop:
+          self._rtcout.RTC_ERROR("NetworkLoop has no string.")
+          return False
+        if not tmp_loop in ("thread", "shared"):
+          tmp_loop = "thread"
+        print("network_loop: " + tmp_loop)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexD < 0:
+      print("AsyncConnect not found. Default async_connect '" + str(tmp_async) + "' is used.")
+    else:
+      try:
+        str_async = any.from_any(properties[indexD].value, keep_structs=True)
+        if not str_async:
+          self._rtcout.RTC_ERROR("AsyncConnect has no string.")
+          return False
+        if str_async == "True" or str_async == "true" or str_async == "TRUE" or str_async == "t" or str_async == "T" or str_async == "1":
+          tmp_async = True
+        print("async_connect: " + str(tmp_async))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexE < 0:
+      print("OfflinePolicy not found. Default offline_policy '" + tmp_offline + "' is used.")
+    else:
+      try:
+        tmp_offline = any.from_any(properties[indexE].value, keep_structs=True)
+        if not tmp_offline:
+          self._rtcout.RTC_ERROR("OfflinePolicy has no string.")
+          return False
+        if not tmp_offline in ("queue", "reject"):
+          tmp_offline = "queue"
+        print("offline_policy: " + tmp_offline)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexF < 0:
+      print("Conflate not found. Default conflate '" + str(tmp_conflate) + "' is used.")
+    else:
+      try:
+        str_conflate = any.from_any(properties[indexF].value, keep_structs=True)
+        if not str_conflate:
+          self._rtcout.RTC_ERROR("Conflate has no string.")
+          return False
+        if str_conflate == "True" or str_conflate == "true" or str_conflate == "TRUE" or str_conflate == "t" or str_conflate == "T" or str_conflate == "1":
+          tmp_conflate = True
+        print("conflate: " + str(tmp_conflate))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexG < 0:
+      print("MaxQueued not found. Default max_queued '" + str(tmp_maxq) + "' is used.")
+    else:
+      try:
+        str_maxq = any.from_any(properties[indexG].value, keep_structs=True)
+        if not str_maxq:
+          self._rtcout.RTC_ERROR("MaxQueued has no string.")
+          return False
+        tmp_maxq = int(str_maxq)
+        if tmp_maxq < 0 or tmp_maxq > 65535:
+          tmp_maxq = 0
+        print("max_queued: " + str(tmp_maxq))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexH < 0:
+      print("QueueSize not found. Default queue_size '" + str(tmp_qsize) + "' is used.")
+    else:
+      try:
+        str_qsize = any.from_any(properties[indexH].value, keep_structs=True)
+        if not str_qsize:
+          self._rtcout.RTC_ERROR("QueueSize has no string.")
+          return False
+        tmp_qsize = int(str_qsize)
+        if tmp_qsize < 0 or tmp_qsize > 1000000:
+          tmp_qsize = 0
+        print("queue_size: " + str(tmp_qsize))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexI < 0:
+      print("QueuePolicy not found. Default queue_policy '" + tmp_qpolicy + "' is used.")
+    else:
+      try:
+        tmp_qpolicy = any.from_any(properties[indexI].value, keep_structs=True)
+        if not tmp_qpolicy:
+          self._rtcout.RTC_ERROR("QueuePolicy has no string.")
+          return False
+        if not tmp_qpolicy in ("drop_oldest", "drop_newest", "block"):
+          tmp_qpolicy = "drop_oldest"
+        print("queue_policy: " + tmp_qpolicy)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexJ < 0:
+      print("QueueTimeout not found. Default queue_timeout '" + str(tmp_qtimeout) + "' is used.")
+    else:
+      try:
+        str_qtimeout = any.from_any(properties[indexJ].value, keep_structs=True)
+        if not str_qtimeout:
+          self._rtcout.RTC_ERROR("QueueTimeout has no string.")
+          return False
+        tmp_qtimeout = float(str_qtimeout)
+        if tmp_qtimeout < 0 or tmp_qtimeout > 3600:
+          tmp_qtimeout = 1.0
+        print("queue_timeout: " + str(tmp_qtimeout))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if msgpack is None:
+      self._rtcout.RTC_ERROR("msgpack is not installed.")
+      return False
+
+    if indexK < 0:
+      print("Compress not found. Default compress '" + tmp_compress + "' is used.")
+    else:
+      try:
+        tmp_compress = any.from_any(properties[indexK].value, keep_structs=True)
+        if not tmp_compress:
+          self._rtcout.RTC_ERROR("Compress has no string.")
+          return False
+        if not tmp_compress in ("none", "zlib", "lzma"):
+          tmp_compress = "none"
+        print("compress: " + tmp_compress)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexL < 0:
+      print("CompressLevel not found. Default compress_level '" + str(tmp_cmplevel) + "' is used.")
+    else:
+      try:
+        str_cmplevel = any.from_any(properties[indexL].value, keep_structs=True)
+        if not str_cmplevel:
+          self._rtcout.RTC_ERROR("CompressLevel has no string.")
+          return False
+        tmp_cmplevel = int(str_cmplevel)
+        if tmp_cmplevel < -1 or tmp_cmplevel > 9:
+          tmp_cmplevel = -1
+        print("compress_level: " + str(tmp_cmplevel))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexM < 0:
+      print("CompressMin not found. Default compress_min '" + str(tmp_cmpmin) + "' is used.")
+    else:
+      try:
+        str_cmpmin = any.from_any(properties[indexM].value, keep_structs=True)
+        if not str_cmpmin:
+          self._rtcout.RTC_ERROR("CompressMin has no string.")
+          return False
+        tmp_cmpmin = int(str_cmpmin)
+        if tmp_cmpmin < 0 or tmp_cmpmin > 268435455:
+          tmp_cmpmin = 1024
+        print("compress_min: " + str(tmp_cmpmin))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexN < 0:
+      print("MaxChunk not found. Default max_chunk '" + str(tmp_maxchunk) + "' is used.")
+    else:
+      try:
+        str_maxchunk = any.from_any(properties[indexN].value, keep_structs=True)
+        if not str_maxchunk:
+          self._rtcout.RTC_ERROR("MaxChunk has no string.")
+          return False
+        tmp_maxchunk = int(str_maxchunk)
+        if tmp_maxchunk < 0 or tmp_maxchunk > 268435455:
+          tmp_maxchunk = 0
+        print("max_chunk: " + str(tmp_maxchunk))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexO < 0:
+      print("Protocol not found. Default protocol '" + tmp_protocol + "' is used.")
+    else:
+      try:
+        tmp_protocol = any.from_any(properties[indexO].value, keep_structs=True)
+        if not tmp_protocol:
+          self._rtcout.RTC_ERROR("Protocol has no string.")
+          return False
+        if not tmp_protocol in ("311", "5"):
+          tmp_protocol = "311"
+        print("protocol: " + tmp_protocol)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexP < 0:
+      print("MessageExpiry not found. Default expiry '" + str(tmp_expiry) + "' is used.")
+    else:
+      try:
+        str_expiry = any.from_any(properties[indexP].value, keep_structs=True)
+        if not str_expiry:
+          self._rtcout.RTC_ERROR("MessageExpiry has no string.")
+          return False
+        tmp_expiry = int(str_expiry)
+        if tmp_expiry < 0 or tmp_expiry > 4294967295:
+          tmp_expiry = 0
+        print("expiry: " + str(tmp_expiry))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexQ < 0:
+      print("Sequence not found. Default sequence '" + str(tmp_sequence) + "' is used.")
+    else:
+      try:
+        str_sequence = any.from_any(properties[indexQ].value, keep_structs=True)
+        if not str_sequence:
+          self._rtcout.RTC_ERROR("Sequence has no string.")
+          return False
+        if str_sequence == "True" or str_sequence == "true" or str_sequence == "TRUE" or str_sequence == "t" or str_sequence == "T" or str_sequence == "1":
+          tmp_sequence = True
+        print("sequence: " + str(tmp_sequence))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    self.generateDataTypeInfo(properties)
+
+    if self.__datatype and self.__endian:
+      self.__formatter = DataTypeFormat(self.__datatype, self.__endian)
+    else:
+      self._rtcout.RTC_ERROR("DataType or Endian is unknown.")
+      return False
+      
+    if tmp_will == True:
+      if self.__datatype and self.__endian:
+        cdrdata = cdrMarshal(any.to_any(self.__datatype).typecode(), self.__datatype, self.__endian)
+        tmp_willmsg = self.__formatter.reserializeFromCdrToMsgpack(cdrdata)
+      else:
+        tmp_willmsg = None
+        print("DataType or Endian is unknown, therefore 'Will' function does not work.")
+
+    print("[connecting to MQTT broker start]")
+    PahoPublisher.paho_protocol_set(self, mqtt.MQTTv5 if tmp_protocol == "5" else mqtt.MQTTv311)
+    PahoPublisher.paho_initialize(self, tmp_id, tmp_cs, tmp_maxif, tmp_topic, tmp_qos, tmp_retain, tmp_willmsg)
+    PahoPublisher.paho_pool_set(self, tmp_pool)
+    PahoPublisher.paho_shared_loop_set(self, tmp_loop == "shared")
+    PahoPublisher.paho_async_set(self, tmp_async, tmp_offline)
+    PahoPublisher.paho_conflate_set(self, tmp_conflate)
+    PahoPublisher.paho_max_queued_set(self, tmp_maxq)
+    PahoPublisher.paho_queue_set(self, tmp_qsize, tmp_qpolicy, tmp_qtimeout)
+    PahoPublisher.paho_compress_set(self, tmp_compress, tmp_cmplevel, tmp_cmpmin)
+    PahoPublisher.paho_fragment_set(self, tmp_maxchunk)
+    PahoPublisher.paho_expiry_set(self, tmp_expiry)
+    PahoPublisher.paho_sequence_set(self, tmp_sequence)
+    PahoPublisher.paho_connect(self, tmp_host, tmp_port, tmp_kpalv)
+    print("[connecting to MQTT broker end]")
+
+    if clear_retained_msg == True:
+      PahoPublisher.paho_pub_nullmsg(self)
+      print("* Cleared retained message from MQTT broker.")
+
+    return True
+
+  ##
+  # @brief Return codes conversion
+  #
+  def convertReturnCode(self, ret):
+    if ret == OpenRTM.PORT_OK:
+      return self.PORT_OK
+
+    elif ret == OpenRTM.PORT_ERROR:
+      return self.PORT_ERROR
+
+    elif ret == OpenRTM.BUFFER_FULL:
+      return self.SEND_FULL
+
+    elif ret == OpenRTM.BUFFER_TIMEOUT:
+      return self.SEND_TIMEOUT
+
+    elif ret == OpenRTM.UNKNOWN_ERROR:
+      return self.UNKNOWN_ERROR
+
+    else:
+      return self.UNKNOWN_ERROR
+
+  ##
+  # @brief Convert the result of publishing to ReturnCode
+  # @param ret Return code of paho
+  #
+  def convertPahoReturnCode(self, ret):
+    if ret == mqtt.MQTT_ERR_SUCCESS:
+      return self.PORT_OK
+
+    elif ret == mqtt.MQTT_ERR_QUEUE_SIZE:
+      return self.convertReturnCode(OpenRTM.BUFFER_FULL)
+
+    elif ret == PahoPublisher.ERR_TIMEOUT:
+      return self.convertReturnCode(OpenRTM.BUFFER_TIMEOUT)
+
+    elif ret == mqtt.MQTT_ERR_NO_CONN or ret == mqtt.MQTT_ERR_CONN_LOST:
+      return self.CONNECTION_LOST
+
+    else:
+      return self.convertReturnCode(OpenRTM.PORT_ERROR)
+
+  ##
+  # @brief Generate information about datatype and endian
+  #
+  def generateDataTypeInfo(self, properties):
+    PN_DATA_TYPE = "dataport.data_type"
+    PN_ENDIAN = "dataport.serializer.cdr.endian"
+
+    DELIMITER1 = "RTC/"
+    DELIMITER2 = ":"
+    PREFIX = "RTC."
+
+    tmp_datatype = None
+    tmp_endian = None
+
+    indexDT = OpenRTM_aist.NVUtil.find_index(properties, PN_DATA_TYPE)
+    if indexDT < 0:
+      print("  Can not find DataType.")
+      self._rtcout.RTC_ERROR("DataType is not set.")
+      return False
+    else:
+      try:
+        tmp_datatype = any.from_any(properties[indexDT].value, keep_structs=True)
+        if not tmp_datatype:
+          self._rtcout.RTC_ERROR("DataType has no string.")
+          return False
+        print("  DataType: " + tmp_datatype)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    indexED = OpenRTM_aist.NVUtil.find_index(properties, PN_ENDIAN)
+    if indexED < 0:
+      print("  Can not find Endian.")
+      self._rtcout.RTC_ERROR("Endian is not set.")
+      return False
+    else:
+      try:
+        tmp_endian = any.from_any(properties[indexED].value, keep_structs=True)
+        if not tmp_endian:
+          self._rtcout.RTC_ERROR("Endian has no string.")
+          return False
+        #print("  Endian: " + tmp_endian)
+        tmp_endian = OpenRTM_aist.split(tmp_endian, ",")
+        tmp_endian = OpenRTM_aist.normalize(tmp_endian)
+        print("  Normalized endian: " + tmp_endian)
+        if tmp_endian == "little":
+          self.__endian = True
+        elif tmp_endian == "big":
+          self.__endian = False
+        else:
+          self.__endian = None
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    check1 = tmp_datatype.find(DELIMITER1)
+    check2 = tmp_datatype.rfind(DELIMITER2)
+    if check1 >= 0 and check2 >= 0:
+      tmp_datatype = tmp_datatype[check1+len(DELIMITER1):check2]
+    tmp_datatype = PREFIX + tmp_datatype
+    self.__datatype = OpenRTM_aist.instantiateDataType(eval(tmp_datatype))
+
+##
+# @class ManagerActionListener
+# @brief ManagerActionListener class
+#
+class ManagerActionListener:
+  def __init__(self, OutPortPahoPubMsgpack):
+    self._OutPortPahoPubMsgpack = OutPortPahoPubMsgpack
+
+  def preShutdown(self):
+    pass
+
+  ##
+  # @brief Clean up mqtt communication module instance when RTC exit
+  #
+  def postShutdown(self):
+    print("[disconnecting from MQTT broker start]")
+    self._OutPortPahoPubMsgpack.paho_disconnect()
+    print("[disconnecting from MQTT broker end]")
+
+  def preReinit(self):
+    pass
+
+  def postReinit(self):
+    pass
+
+##
+# @brief Initialize OutPortPahoPubMsgpack module
+#
+def OutPortPahoPubMsgpackInit(self):
+  factory = OpenRTM_aist.InPortConsumerFactory.instance()
+  factory.addFactory("mqtt_msgpack",
+                     OutPortPahoPubMsgpack,
+                     OpenRTM_aist.Delete)
+##
+# @brief Register OutPortPahoPubMsgpack module
+#
+def registerModule():
+  print("[Paho Publisher initialization start]")
+  OutPortPahoPubMsgpackInit()
+  print("[Paho Publisher initialization end]")
@@ -20,6 +20,7 @@ import OpenRTM
 import RTC
 import time
 import sys
+import paho.mqtt.client as mqtt
 from OpenRTM_aist_paho_mqtt_module.paho_client.PahoPubSecure import PahoPubSecure
 
 ##
@@ -66,8 +67,8 @@ class OutPortPahoPubSecure(OpenRTM_aist.InPortConsumer, PahoPubSecure):
     self._rtcout.RTC_PARANOID("put()")
 
     try:
-      PahoPubSecure.paho_pub(self, data)
-      return self.PORT_OK
+      ret = PahoPubSecure.paho_pub(self, data)
+      return self.convertPahoReturnCode(ret)
     except:
       self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
       return self.CONNECTION_LOST
@@ -132,6 +133,23 @@ class OutPortPahoPubSecure(OpenRTM_aist.InPortConsumer, PahoPubSecure):
     PN_RETAIN = "retain"
     PN_WILL = "will"
     PN_CLRRM = "clrrm"
+    PN_POOL = "pool"
+    PN_LOOP = "loop"
+    PN_ASYNC = "async"
+    PN_OFFLINE = "offline"
+    PN_BATCHSZ = "batch_size"
+    PN_BATCHMS = "batch_ms"
+    PN_MAXQ = "maxq"
+    PN_QSIZE = "queue_size"
+    PN_QPOLICY = "queue_policy"
+    PN_QTIMEOUT = "queue_timeout"
+    PN_COMPRESS = "compress"
+    PN_CMPLEVEL = "compress_level"
+    PN_CMPMIN = "compress_min"
+    PN_MAXCHUNK = "max_chunk"
+    PN_PROTOCOL = "protocol"
+    PN_EXPIRY = "expiry"
+    PN_SEQUENCE = "sequence"
 
     index0 = self.findProp(properties, PN_HOST)
     index1 = self.findProp(properties, PN_PORT)
@@ -147,6 +165,23 @@ class OutPortPahoPubSecure(OpenRTM_aist.InPortConsumer, PahoPubSecure):
     indexB = self.findProp(properties, PN_RETAIN)
     indexC = self.findProp(properties, PN_WILL)
     indexD = self.findProp(properties, PN_CLRRM)
+    indexE = self.findProp(properties, PN_POOL)
+    indexF = self.findProp(properties, PN_LOOP)
+    indexG = self.findProp(properties, PN_ASYNC)
+    indexH = self.findProp(properties, PN_OFFLINE)
+    indexI = self.findProp(properties, PN_BATCHSZ)
+    indexJ = self.findProp(properties, PN_BATCHMS)
+    indexK = self.findProp(properties, PN_MAXQ)
+    indexL = self.findProp(properties, PN_QSIZE)
+    indexM = self.findProp(properties, PN_QPOLICY)
+    indexN = self.findProp(properties, PN_QTIMEOUT)
+    indexO = self.findProp(properties, PN_COMPRESS)
+    indexP = self.findProp(properties, PN_CMPLEVEL)
+    indexQ = self.findProp(properties, PN_CMPMIN)
+    indexR = self.findProp(properties, PN_MAXCHUNK)
+    indexS = self.findProp(properties, PN_PROTOCOL)
+    indexT = self.findProp(properties, PN_EXPIRY)
+    indexU = self.findProp(properties, PN_SEQUENCE)
 
     tmp_host = "localhost"
     tmp_port = 8883
@@ -163,6 +198,23 @@ class OutPortPahoPubSecure(OpenRTM_aist.InPortConsumer, PahoPubSecure):
     tmp_will = False
     tmp_willmsg = None
     clear_retained_msg = False
+    tmp_pool = False
+    tmp_loop = "thread"
+    tmp_async = False
+    tmp_offline = "queue"
+    tmp_batchsz = 1
+    tmp_batchms = 10
+    tmp_maxq = 0
+    tmp_qsize = 0
+    tmp_qpolicy = "drop_oldest"
+    tmp_qtimeout = 1.0
+    tmp_compress = "none"
+    tmp_cmplevel = -1
+    tmp_cmpmin = 1024
+    tmp_maxchunk = 0
+    tmp_protocol = "311"
+    tmp_expiry = 0
+    tmp_sequence = False
 
     if index0 < 0:
       print("Server address not found. Default server address '" + tmp_host + "' is used.")
@@ -350,6 +402,253 @@ class OutPortPahoPubSecure(OpenRTM_aist.InPortConsumer, PahoPubSecure):
       except:
         self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
 
+    if indexE < 0:
+      print("ClientPool not found. Default client_pool '" + str(tmp_pool) + "' is used.")
+    else:
+      try:
+        str_pool = any.from_any(properties[indexE].value, keep_structs=True)
+        if not str_pool:
+          self._rtcout.RTC_ERROR("ClientPool has no string.")
+          return False
+        if str_pool == "True" or str_pool == "true" or str_pool == "TRUE" or str_pool == "t" or str_pool == "T" or str_pool == "1":
+          tmp_pool = True
+        print("client_pool: " + str(tmp_pool))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexF < 0:
+      print("NetworkLoop not found. Default network_loop '" + tmp_loop + "' is used.")
+    else:
+      try:
+        tmp_loop = any.from_any(properties[indexF].value, keep_structs=True)
+        if not tmp_loop:
+          self._rtcout.RTC_ERROR("NetworkLoop has no string.")
+          return False
+        if not tmp_loop in ("thread", "shared"):
+          tmp_loop = "thread"
+        print("network_loop: " + tmp_loop)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexG < 0:
+      print("AsyncConnect not found. Default async_connect '" + str(tmp_async) + "' is used.")
+    else:
+      try:
+        str_async = any.from_any(properties[indexG].value, keep_structs=True)
+        if not str_async:
+          self._rtcout.RTC_ERROR("AsyncConnect has no string.")
+          return False
+        if str_async == "True" or str_async == "true" or str_async == "TRUE" or str_async == "t" or str_async == "T" or str_async == "1":
+          tmp_async = True
+        print("async_connect: " + str(tmp_async))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexH < 0:
+      print("OfflinePolicy not found. Default offline_policy '" + tmp_offline + "' is used.")
+    else:
+      try:
+        tmp_offline = any.from_any(properties[indexH].value, keep_structs=True)
+        if not tmp_offline:
+          self._rtcout.RTC_ERROR("OfflinePolicy has no string.")
+          return False
+        if not tmp_offline in ("queue", "reject"):
+          tmp_offline = "queue"
+        print("offline_policy: " + tmp_offline)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexI < 0:
+      print("BatchSize not found. Default batch_size '" + str(tmp_batchsz) + "' is used.")
+    else:
+      try:
+        str_batchsz = any.from_any(properties[indexI].value, keep_structs=True)
+        if not str_batchsz:
+          self._rtcout.RTC_ERROR("BatchSize has no string.")
+          return False
+        tmp_batchsz = int(str_batchsz)
+        if tmp_batchsz < 1 or tmp_batchsz > 65535:
+          tmp_batchsz = 1
+        print("batch_size: " + str(tmp_batchsz))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexJ < 0:
+      print("BatchTime not found. Default batch_ms '" + str(tmp_batchms) + "' is used.")
+    else:
+      try:
+        str_batchms = any.from_any(properties[indexJ].value, keep_structs=True)
+        if not str_batchms:
+          self._rtcout.RTC_ERROR("BatchTime has no string.")
+          return False
+        tmp_batchms = int(str_batchms)
+        if tmp_batchms < 0 or tmp_batchms > 60000:
+          tmp_batchms = 10
+        print("batch_ms: " + str(tmp_batchms))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexK < 0:
+      print("MaxQueued not found. Default max_queued '" + str(tmp_maxq) + "' is used.")
+    else:
+      try:
+        str_maxq = any.from_any(properties[indexK].value, keep_structs=True)
+        if not str_maxq:
+          self._rtcout.RTC_ERROR("MaxQueued has no string.")
+          return False
+        tmp_maxq = int(str_maxq)
+        if tmp_maxq < 0 or tmp_maxq > 65535:
+          tmp_maxq = 0
+        print("max_queued: " + str(tmp_maxq))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexL < 0:
+      print("QueueSize not found. Default queue_size '" + str(tmp_qsize) + "' is used.")
+    else:
+      try:
+        str_qsize = any.from_any(properties[indexL].value, keep_structs=True)
+        if not str_qsize:
+          self._rtcout.RTC_ERROR("QueueSize has no string.")
+          return False
+        tmp_qsize = int(str_qsize)
+        if tmp_qsize < 0 or tmp_qsize > 1000000:
+          tmp_qsize = 0
+        print("queue_size: " + str(tmp_qsize))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexM < 0:
+      print("QueuePolicy not found. Default queue_policy '" + tmp_qpolicy + "' is used.")
+    else:
+      try:
+        tmp_qpolicy = any.from_any(properties[indexM].value, keep_structs=True)
+        if not tmp_qpolicy:
+          self._rtcout.RTC_ERROR("QueuePolicy has no string.")
+          return False
+        if not tmp_qpolicy in ("drop_oldest", "drop_newest", "block"):
+          tmp_qpolicy = "drop_oldest"
+        print("queue_policy: " + tmp_qpolicy)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexN < 0:
+      print("QueueTimeout not found. Default queue_timeout '" + str(tmp_qtimeout) + "' is used.")
+    else:
+      try:
+        str_qtimeout = any.from_any(properties[indexN].value, keep_structs=True)
+        if not str_qtimeout:
+          self._rtcout.RTC_ERROR("QueueTimeout has no string.")
+          return False
+        tmp_qtimeout = float(str_qtimeout)
+        if tmp_qtimeout < 0 or tmp_qtimeout > 3600:
+          tmp_qtimeout = 1.0
+        print("queue_timeout: " + str(tmp_qtimeout))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexO < 0:
+      print("Compress not found. Default compress '" + tmp_compress + "' is used.")
+    else:
+      try:
+        tmp_compress = any.from_any(properties[indexO].value, keep_structs=True)
+        if not tmp_compress:
+          self._rtcout.RTC_ERROR("Compress has no string.")
+          return False
+        if not tmp_compress in ("none", "zlib", "lzma"):
+          tmp_compress = "none"
+        print("compress: " + tmp_compress)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexP < 0:
+      print("CompressLevel not found. Default compress_level '" + str(tmp_cmplevel) + "' is used.")
+    else:
+      try:
+        str_cmplevel = any.from_any(properties[indexP].value, keep_structs=True)
+        if not str_cmplevel:
+          self._rtcout.RTC_ERROR("CompressLevel has no string.")
+          return False
+        tmp_cmplevel = int(str_cmplevel)
+        if tmp_cmplevel < -1 or tmp_cmplevel > 9:
+          tmp_cmplevel = -1
+        print("compress_level: " + str(tmp_cmplevel))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexQ < 0:
+      print("CompressMin not found. Default compress_min '" + str(tmp_cmpmin) + "' is used.")
+    else:
+      try:
+        str_cmpmin = any.from_any(properties[indexQ].value, keep_structs=True)
+        if not str_cmpmin:
+          self._rtcout.RTC_ERROR("CompressMin has no string.")
+          return False
+        tmp_cmpmin = int(str_cmpmin)
+        if tmp_cmpmin < 0 or tmp_cmpmin > 268435455:
+          tmp_cmpmin = 1024
+        print("compress_min: " + str(tmp_cmpmin))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexR < 0:
+      print("MaxChunk not found. Default max_chunk '" + str(tmp_maxchunk) + "' is used.")
+    else:
+      try:
+        str_maxchunk = any.from_any(properties[indexR].value, keep_structs=True)
+        if not str_maxchunk:
+          self._rtcout.RTC_ERROR("MaxChunk has no string.")
+          return False
+        tmp_maxchunk = int(str_maxchunk)
+        if tmp_maxchunk < 0 or tmp_maxchunk > 268435455:
+          tmp_maxchunk = 0
+        print("max_chunk: " + str(tmp_maxchunk))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexS < 0:
+      print("Protocol not found. Default protocol '" + tmp_protocol + "' is used.")
+    else:
+      try:
+        tmp_protocol = any.from_any(properties[indexS].value, keep_structs=True)
+        if not tmp_protocol:
+          self._rtcout.RTC_ERROR("Protocol has no string.")
+          return False
+        if not tmp_protocol in ("311", "5"):
+          tmp_protocol = "311"
+        print("protocol: " + tmp_protocol)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexT < 0:
+      print("MessageExpiry not found. Default expiry '" + str(tmp_expiry) + "' is used.")
+    else:
+      try:
+        str_expiry = any.from_any(properties[indexT].value, keep_structs=True)
+        if not str_expiry:
+          self._rtcout.RTC_ERROR("MessageExpiry has no string.")
+          return False
+        tmp_expiry = int(str_expiry)
+        if tmp_expiry < 0 or tmp_expiry > 4294967295:
+          tmp_expiry = 0
+        print("expiry: " + str(tmp_expiry))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexU < 0:
+      print("Sequence not found. Default sequence '" + str(tmp_sequence) + "' is used.")
+    else:
+      try:
+        str_sequence = any.from_any(properties[indexU].value, keep_structs=True)
+        if not str_sequence:
+          self._rtcout.RTC_ERROR("Sequence has no string.")
+          return False
+        if str_sequence == "True" or str_sequence == "true" or str_sequence == "TRUE" or str_sequence == "t" or str_sequence == "T" or str_sequence == "1":
+          tmp_sequence = True
+        print("sequence: " + str(tmp_sequence))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
     if tmp_will == True:
       self.generateDataTypeInfo(properties)
       if self.__datatype and self.__endian:
@@ -359,8 +658,19 @@ class OutPortPahoPubSecure(OpenRTM_aist.InPortConsumer, PahoPubSecure):
         print("DataType or Endian is unknown, therefore 'Will' function does not work.")
 
     print("[connecting to MQTT broker start]")
+    PahoPubSecure.paho_protocol_set(self, mqtt.MQTTv5 if tmp_protocol == "5" else mqtt.MQTTv311)
     PahoPubSecure.paho_initialize(self, tmp_id, tmp_cs, tmp_maxif, tmp_topic, tmp_qos, tmp_retain, tmp_willmsg)
     PahoPubSecure.paho_secure_set(self, tmp_cacert, tmp_cltcert, tmp_cltkey)
+    PahoPubSecure.paho_pool_set(self, tmp_pool)
+    PahoPubSecure.paho_shared_loop_set(self, tmp_loop == "shared")
+    PahoPubSecure.paho_async_set(self, tmp_async, tmp_offline)
+    PahoPubSecure.paho_batch_set(self, tmp_batchsz, tmp_batchms)
+    PahoPubSecure.paho_max_queued_set(self, tmp_maxq)
+    PahoPubSecure.paho_queue_set(self, tmp_qsize, tmp_qpolicy, tmp_qtimeout)
+    PahoPubSecure.paho_compress_set(self, tmp_compress, tmp_cmplevel, tmp_cmpmin)
+    PahoPubSecure.paho_fragment_set(self, tmp_maxchunk)
+    PahoPubSecure.paho_expiry_set(self, tmp_expiry)
+    PahoPubSecure.paho_sequence_set(self, tmp_sequence)
     PahoPubSecure.paho_connect(self, tmp_host, tmp_port, tmp_kpalv)
     print("[connecting to MQTT broker end]")
 
@@ -392,6 +702,26 @@ class OutPortPahoPubSecure(OpenRTM_aist.InPortConsumer, PahoPubSecure):
     else:
       return self.UNKNOWN_ERROR
 
+  ##
+  # @brief Convert the result of publishing to ReturnCode
+  # @param ret Return code of paho
+  #
+  def convertPahoReturnCode(self, ret):
+    if ret == mqtt.MQTT_ERR_SUCCESS:
+      return self.PORT_OK
+
+    elif ret == mqtt.MQTT_ERR_QUEUE_SIZE:
+      return self.convertReturnCode(OpenRTM.BUFFER_FULL)
+
+    elif ret == PahoPubSecure.ERR_TIMEOUT:
+      return self.convertReturnCode(OpenRTM.BUFFER_TIMEOUT)
+
+    elif ret == mqtt.MQTT_ERR_NO_CONN or ret == mqtt.MQTT_ERR_CONN_LOST:
+      return self.CONNECTION_LOST
+
+    else:
+      return self.convertReturnCode(OpenRTM.PORT_ERROR)
+
   ##
   # @brief Generate information about datatype and endian
   #
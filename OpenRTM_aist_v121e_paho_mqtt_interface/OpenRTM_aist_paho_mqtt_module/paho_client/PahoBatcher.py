@@ -0,0 +1,186 @@
+#!/usr/bin/python
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoBatcher.py
+# @brief  PahoBatcher class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import struct
+import threading
+import time
+
+##
+# @class PahoBatcher
+# @brief Pack several payloads into one length-prefixed MQTT message
+#
+# Frame format (network byte order):
+#   magic 'RTMB' | number of samples (uint32) | { length (uint32) | sample }*
+#
+# A frame is sent when batch_size samples are collected or batch_ms has
+# passed since the first sample of the batch, whichever comes first.
+#
+class PahoBatcher:
+
+  MAGIC = b"RTMB"
+  HEADER = struct.Struct("!4sI")
+  LENGTH = struct.Struct("!I")
+
+  ##
+  # @brief Constructor
+  # @param psize Maximum number of samples in a frame
+  # @param pms Maximum time in milliseconds a sample waits for the frame to be sent
+  # @param pflush Function publishing a frame, which returns the result of publishing
+  #
+  def __init__(self, psize, pms, pflush):
+    self.__size = psize
+    self.__delay = pms / 1000.0
+    self.__flush = pflush
+    self.__samples = []
+    self.__deadline = None
+    self.__running = True
+    self.__cond = threading.Condition()
+    self.__thread = None
+    if self.__delay > 0:
+      self.__thread = threading.Thread(target=self.__run)
+      self.__thread.daemon = True
+      self.__thread.start()
+
+  ##
+  # @brief Add a sample to the current batch
+  # @param pdata Sample payload
+  # @return Result of publishing when the frame is sent, otherwise None
+  #
+  def add(self, pdata):
+    with self.__cond:
+      self.__samples.append(pdata)
+      if len(self.__samples) >= self.__size:
+        return self.__send()
+      if len(self.__samples) == 1 and self.__thread is not None:
+        self.__deadline = time.time() + self.__delay
+        self.__cond.notify()
+      return None
+
+  ##
+  # @brief Send the samples collected so far
+  #
+  def flush(self):
+    with self.__cond:
+      if self.__samples:
+        self.__send()
+
+  ##
+  # @brief Send the remaining samples and stop the timer thread
+  #
+  def stop(self):
+    self.flush()
+    with self.__cond:
+      self.__running = False
+      self.__cond.notify()
+
+  ##
+  # @brief Publish the current batch (called with the lock held to keep frame order)
+  #
+  def __send(self):
+    frame = PahoBatcher.pack(self.__samples)
+    self.__samples = []
+    self.__deadline = None
+    return self.__flush(frame)
+
+  ##
+  # @brief Timer thread sending batches when batch_ms expires
+  #
+  def __run(self):
+    with self.__cond:
+      while self.__running:
+        if self.__deadline is None:
+          self.__cond.wait()
+          continue
+        remain = self.__deadline - time.time()
+        if remain > 0:
+          self.__cond.wait(remain)
+          continue
+        if self.__samples:
+          self.__send()
+        self.__deadline = None
+
+  ##
+  # @brief Pack samples into a frame
+  # @param psamples List of sample payloads
+  # @return Frame
+  #
+  @staticmethod
+  def pack(psamples):
+    parts = [PahoBatcher.HEADER.pack(PahoBatcher.MAGIC, len(psamples))]
+    for sample in psamples:
+      parts.append(PahoBatcher.LENGTH.pack(len(sample)))
+      parts.append(sample)
+    return b"".join(parts)
+
+  ##
+  # @brief Unpack a frame into samples
+  # @param pframe Received payload
+  # @return List of samples, or None if the payload is not a valid frame
+  #
+  @staticmethod
+  def unpack(pframe):
+    size = len(pframe)
+    if size < PahoBatcher.HEADER.size or pframe[:4] != PahoBatcher.MAGIC:
+      return None
+    count = PahoBatcher.HEADER.unpack_from(pframe, 0)[1]
+    offset = PahoBatcher.HEADER.size
+    samples = []
+    view = memoryview(pframe)
+    for i in range(count):
+      if offset + PahoBatcher.LENGTH.size > size:
+        return None
+      length = PahoBatcher.LENGTH.unpack_from(pframe, offset)[0]
+      offset += PahoBatcher.LENGTH.size
+      if offset + length > size:
+        return None
+      samples.append(view[offset:offset+length].tobytes())
+      offset += length
+    if offset != size:
+      return None
+    return samples
+
+if __name__ == '__main__':
+
+    from OpenRTM_aist_paho_mqtt_module.paho_client.PahoPublisher import PahoPublisher
+    from OpenRTM_aist_paho_mqtt_module.paho_client.PahoSubscriber import PahoSubscriber
+
+    # Throughput of 12-byte samples (the size of TimedLong in CDR) through a local broker
+    count = 20000
+    sample = b"\x00" * 12
+    for size in [1, 10, 50]:
+      received = [0]
+      done = threading.Event()
+      def on_message(mqttc, obj, msg):
+        samples = PahoBatcher.unpack(msg.payload)
+        received[0] += 1 if samples is None else len(samples)
+        if received[0] >= count:
+          done.set()
+      pahos = PahoSubscriber()
+      pahos.paho_initialize(ptopic="batch")
+      pahos.set_on_message(on_message)
+      pahos.paho_connect()
+      pahos.paho_wait_connect(5)
+      pahop = PahoPublisher()
+      pahop.paho_initialize(ptopic="batch")
+      pahop.paho_batch_set(size, 10)
+      pahop.paho_connect()
+      pahop.paho_wait_connect(5)
+      start = time.time()
+      for i in range(count):
+        pahop.paho_pub(sample)
+      pahop.paho_flush()
+      done.wait(120)
+      elapsed = time.time() - start
+      print("batch_size=%d: %d samples in %.2f s, %.0f samples/s" % (size, received[0], elapsed, received[0] / elapsed))
+      pahop.paho_disconnect()
+      pahos.paho_disconnect()
@@ -0,0 +1,202 @@
+#!/usr/bin/python
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoClientPool.py
+# @brief  PahoClientPool class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import threading
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoNetworkLoop import PahoNetworkLoop
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoTopicAlias import PahoTopicAlias
+
+##
+# @class PahoClientPool
+# @brief Process-wide pool of MQTT clients shared by publishers
+#
+# Publishers connecting to the same broker with the same connection settings
+# share one MQTT client, i.e. one TCP session and one network loop.
+# Topic, QoS and retain stay per publisher because they are passed on
+# every publish() call. The topic aliases of MQTT v5 are also shared,
+# since they belong to the connection.
+#
+class PahoClientPool:
+
+  __instance = None
+  __instance_mutex = threading.Lock()
+
+  ##
+  # @brief Constructor
+  #
+  def __init__(self):
+    self.__clients = {}
+    self.__mutex = threading.Lock()
+
+  ##
+  # @brief Get the singleton instance
+  # @return PahoClientPool instance
+  #
+  @staticmethod
+  def instance():
+    with PahoClientPool.__instance_mutex:
+      if PahoClientPool.__instance is None:
+        PahoClientPool.__instance = PahoClientPool()
+    return PahoClientPool.__instance
+
+  ##
+  # @brief Call back function when succeeded to connect to broker
+  #
+  # The event is passed on to all publishers sharing the client. The
+  # state is changed with the same lock as the user list, so that a
+  # publisher joining at the same time gets the event exactly once,
+  # either here or from acquire.
+  #
+  def on_connect(self, mqttc, obj, flags, rc, properties=None):
+    if(rc == 0):
+      print(" Shared client connected to broker. ")
+      if properties is not None:
+        obj[4].connect(getattr(properties, "TopicAliasMaximum", 0))
+    else:
+      print("Shared client failed to connect to broker with code "+str(rc)+".")
+    with self.__mutex:
+      obj[5] = "connected" if rc == 0 else "connecting"
+      users = list(obj[3])
+    for user in users:
+      user.on_connect(mqttc, obj, flags, rc, properties)
+
+  ##
+  # @brief Call back function when succeeded to disconnect from broker
+  #
+  # The event is passed on to all publishers sharing the client.
+  #
+  def on_disconnect(self, client, userdata, rc, properties=None):
+    print(" Shared client disconnected from broker with code "+str(rc)+". ")
+    userdata[4].disconnect()
+    with self.__mutex:
+      userdata[5] = "connecting"
+      users = list(userdata[3])
+    for user in users:
+      user.on_disconnect(client, userdata, rc, properties)
+
+  ##
+  # @brief Call back function when a message was sent or acknowledged
+  #
+  # The event is passed on to all publishers sharing the client, which
+  # ignore message IDs they did not publish. The user list is replaced
+  # instead of modified, so that it is read here without the lock.
+  #
+  def on_publish(self, client, userdata, mid):
+    for user in userdata[3]:
+      user.on_publish(client, userdata, mid)
+
+  ##
+  # @brief Get the shared client for the key, connecting it on first use
+  # @param pkey Connection settings identifying the shared client
+  # @param puser Publisher creating a new client and applying client settings (protocol, inflight, TLS) to it
+  # @param phost MQTT broker endpoint address
+  # @param pport MQTT messaging service port number
+  # @param pkeepalive Lifetime of client
+  # @param psharedloop Whether to drive the client by the shared network loop
+  # @param pasync Whether to connect in background without waiting for the connection
+  # @return Shared MQTT client instance
+  #
+  # The client is connected outside the lock, so that an unreachable
+  # broker does not stall the other publishers. Publishers joining while
+  # it is connecting get on_connect from the CONNACK, later ones get it
+  # here. If a blocking connection fails, the client is removed from the
+  # pool and the error is raised.
+  #
+  def acquire(self, pkey, puser, phost, pport, pkeepalive, psharedloop=False, pasync=False):
+    with self.__mutex:
+      entry = self.__clients.get(pkey)
+      created = entry is None
+      if created:
+        client = puser.new_client()
+        # Client, number of users, whether driven by the shared loop, users, topic aliases and
+        # state ("connecting" until the CONNACK is handled, then "connected")
+        entry = [client, 0, psharedloop, [], PahoTopicAlias(), "connecting"]
+        client.user_data_set(entry)
+        client.on_connect = self.on_connect
+        client.on_disconnect = self.on_disconnect
+        client.on_publish = self.on_publish
+        puser.configure_client(client)
+        self.__clients[pkey] = entry
+      else:
+        puser.configure_inflight(entry[0])
+      entry[1] += 1
+      entry[3] = entry[3] + [puser]
+      client = entry[0]
+      connected = entry[5] == "connected"
+    if created:
+      try:
+        self.__connect(client, phost, pport, pkeepalive, psharedloop, pasync, puser.connect_options())
+      except:
+        with self.__mutex:
+          if self.__clients.get(pkey) is entry:
+            del self.__clients[pkey]
+        if psharedloop:
+          PahoNetworkLoop.instance().detach(client)
+        raise
+    elif connected:
+      puser.on_connect(client, entry, {}, 0)
+    return client
+
+  ##
+  # @brief Connect a new shared client and start its network loop
+  #
+  def __connect(self, pclient, phost, pport, pkeepalive, psharedloop, pasync, poptions):
+    if psharedloop:
+      PahoNetworkLoop.instance().attach(pclient)
+      if pasync:
+        PahoNetworkLoop.instance().connect_async(pclient, phost, pport, pkeepalive, poptions)
+      else:
+        pclient.connect(phost, pport, pkeepalive, **poptions)
+    else:
+      if pasync:
+        pclient.connect_async(phost, pport, pkeepalive, **poptions)
+      else:
+        pclient.connect(phost, pport, pkeepalive, **poptions)
+      pclient.loop_start()
+
+  ##
+  # @brief Get the topic aliases of the shared client
+  # @param pkey Connection settings identifying the shared client
+  # @return PahoTopicAlias instance
+  #
+  def topic_alias(self, pkey):
+    with self.__mutex:
+      return self.__clients[pkey][4]
+
+  ##
+  # @brief Release the shared client, disconnecting it when no user is left
+  # @param pkey Connection settings identifying the shared client
+  # @param puser Publisher releasing the client
+  #
+  def release(self, pkey, puser):
+    with self.__mutex:
+      entry = self.__clients.get(pkey)
+      if entry is None:
+        return
+      entry[3] = [user for user in entry[3] if user is not puser]
+      entry[1] -= 1
+      if entry[1] > 0:
+        return
+      del self.__clients[pkey]
+    if entry[2]:
+      PahoNetworkLoop.instance().detach(entry[0])
+    else:
+      entry[0].loop_stop(True)
+      entry[0].disconnect()
+
+  ##
+  # @brief Get the number of shared clients
+  # @return Number of connected shared clients
+  #
+  def size(self):
+    with self.__mutex:
+      return len(self.__clients)
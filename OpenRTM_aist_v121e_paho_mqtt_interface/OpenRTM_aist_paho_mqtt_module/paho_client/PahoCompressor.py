@@ -0,0 +1,114 @@
+#!/usr/bin/python
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoCompressor.py
+# @brief  PahoCompressor class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import struct
+import zlib
+try:
+  import lzma
+except ImportError:
+  lzma = None
+
+##
+# @class PahoCompressor
+# @brief Compress MQTT payloads with zlib or lzma
+#
+# Frame format (network byte order):
+#   magic 'RTMZ' | method (uint8, 1: zlib, 2: lzma) | compressed payload
+#
+# Payloads smaller than the minimum size, or not made smaller by the
+# compression, are sent as they are. Receivers pass every payload to
+# decompress(), so that messages from publishers with and without
+# compression can be mixed on a topic.
+#
+class PahoCompressor:
+
+  MAGIC = b"RTMZ"
+  HEADER = struct.Struct("!4sB")
+  METHODS = {"zlib": 1, "lzma": 2}
+
+  ##
+  # @brief Constructor
+  # @param pmethod Compression method, 'zlib' or 'lzma'
+  # @param plevel Compression level from 0 to 9, -1 for the default level of the method
+  # @param pminsize Minimum payload size in bytes to be compressed
+  #
+  def __init__(self, pmethod="zlib", plevel=-1, pminsize=1024):
+    if pmethod == "lzma" and lzma is None:
+      print("lzma is not installed. zlib is used for compression.")
+      pmethod = "zlib"
+    self.__method = pmethod
+    self.__level = plevel
+    self.__minsize = pminsize
+    self.__header = PahoCompressor.HEADER.pack(PahoCompressor.MAGIC, PahoCompressor.METHODS[pmethod])
+
+  ##
+  # @brief Compress a payload
+  # @param pdata Payload (bytes, or str encoded in UTF-8)
+  # @return Frame, or the payload as it is if it is not worth compressing
+  #
+  def compress(self, pdata):
+    if len(pdata) < self.__minsize:
+      return pdata
+    if not isinstance(pdata, bytes):
+      pdata = pdata.encode("utf-8")
+    if self.__method == "lzma":
+      if self.__level < 0:
+        body = lzma.compress(pdata)
+      else:
+        body = lzma.compress(pdata, preset=self.__level)
+    else:
+      body = zlib.compress(pdata, self.__level)
+    if len(body) + PahoCompressor.HEADER.size >= len(pdata):
+      return pdata
+    return self.__header + body
+
+  ##
+  # @brief Decompress a frame
+  # @param pframe Received payload
+  # @return Payload, the received payload as it is if it is not a frame, or None if the frame is broken
+  #
+  @staticmethod
+  def decompress(pframe):
+    if len(pframe) < PahoCompressor.HEADER.size or pframe[:4] != PahoCompressor.MAGIC:
+      return pframe
+    method = PahoCompressor.HEADER.unpack_from(pframe, 0)[1]
+    body = pframe[PahoCompressor.HEADER.size:]
+    try:
+      if method == PahoCompressor.METHODS["zlib"]:
+        return zlib.decompress(body)
+      elif method == PahoCompressor.METHODS["lzma"] and lzma is not None:
+        return lzma.decompress(body)
+    except Exception:
+      pass
+    return None
+
+if __name__ == '__main__':
+
+    import time
+
+    # Size and time of compression for payloads like a laser scan in CDR and JSON
+    scan = struct.pack("<II%dd" % 1081, 0, 0, *[1.0 + (i % 50) * 0.01 for i in range(1081)])
+    text = "{\"RTC.TimedDoubleSeq\": {\"tm\": {\"sec\": 0, \"nsec\": 0}, \"data\": [" + ", ".join([repr(1.0 + (i % 50) * 0.01) for i in range(1081)]) + "]}}"
+    for name, payload in (("CDR", scan), ("JSON", text)):
+      for method in ("zlib", "lzma"):
+        for level in (1, -1, 9):
+          compressor = PahoCompressor(method, level, 0)
+          start = time.time()
+          for i in range(100):
+            frame = compressor.compress(payload)
+          ctime = (time.time() - start) / 100 * 1e6
+          start = time.time()
+          for i in range(100):
+            data = PahoCompressor.decompress(frame)
+          dtime = (time.time() - start) / 100 * 1e6
+          print("%-4s %-4s level=%2d: %6d -> %6d bytes, compress %8.1fus, decompress %8.1fus" % (name, method, level, len(payload), len(frame), ctime, dtime))
@@ -0,0 +1,160 @@
+#!/usr/bin/python
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoFragmenter.py
+# @brief  PahoFragmenter class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import collections
+import random
+import struct
+import threading
+import time
+
+##
+# @class PahoFragmenter
+# @brief Split large payloads into several MQTT messages and reassemble them
+#
+# Frame format (network byte order):
+#   magic 'RTMF' | sender (uint32) | message id (uint32) | index (uint32) | count (uint32) | fragment
+#
+# The sender is a random number chosen by each publisher, so that message
+# ids of several publishers on a topic do not collide. Fragments of an
+# incomplete message are dropped when the message is not completed within
+# the timeout, or when the fragments held exceed the memory limit, the
+# oldest message first.
+#
+class PahoFragmenter:
+
+  MAGIC = b"RTMF"
+  HEADER = struct.Struct("!4sIIII")
+
+  ##
+  # @brief Constructor
+  # @param pmaxchunk Maximum size of a MQTT payload in bytes including the header, 0 not to split payloads
+  # @param ptimeout Time in seconds to wait for the remaining fragments of a message
+  # @param pmaxbytes Maximum total size in bytes of the fragments of incomplete messages
+  #
+  def __init__(self, pmaxchunk=0, ptimeout=10.0, pmaxbytes=67108864):
+    self.__chunk = max(pmaxchunk - PahoFragmenter.HEADER.size, 1)
+    self.__enabled = pmaxchunk > 0
+    self.__sender = random.getrandbits(32)
+    self.__msgid = 0
+    self.__idmutex = threading.Lock()
+    self.__timeout = ptimeout
+    self.__maxbytes = pmaxbytes
+    self.__incomplete = collections.OrderedDict()
+    self.__bytes = 0
+    self.__dropped = 0
+    self.__mutex = threading.Lock()
+
+  ##
+  # @brief Split a payload into fragments
+  # @param pdata Payload (bytes, or str encoded in UTF-8)
+  # @return List of frames, or a list of the payload as it is if it fits in a message
+  #
+  def split(self, pdata):
+    if not self.__enabled or len(pdata) <= self.__chunk + PahoFragmenter.HEADER.size:
+      return [pdata]
+    if not isinstance(pdata, bytes):
+      pdata = pdata.encode("utf-8")
+    with self.__idmutex:
+      self.__msgid = (self.__msgid + 1) & 0xffffffff
+      msgid = self.__msgid
+    count = (len(pdata) + self.__chunk - 1) // self.__chunk
+    frames = []
+    for index in range(count):
+      header = PahoFragmenter.HEADER.pack(PahoFragmenter.MAGIC, self.__sender, msgid, index, count)
+      frames.append(header + pdata[index*self.__chunk:(index+1)*self.__chunk])
+    return frames
+
+  ##
+  # @brief Add a received frame to its message
+  # @param ptopic Topic of the received message
+  # @param pframe Received payload
+  # @return Payload when the message is complete, the received payload as it is if it is not a frame, otherwise None
+  #
+  def reassemble(self, ptopic, pframe):
+    if len(pframe) < PahoFragmenter.HEADER.size or pframe[:4] != PahoFragmenter.MAGIC:
+      return pframe
+    magic, sender, msgid, index, count = PahoFragmenter.HEADER.unpack_from(pframe, 0)
+    body = pframe[PahoFragmenter.HEADER.size:]
+    if index >= count:
+      return None
+    if count == 1:
+      return body
+    key = (ptopic, sender, msgid)
+    now = time.time()
+    with self.__mutex:
+      self.__expire(now)
+      entry = self.__incomplete.get(key)
+      if entry is None:
+        # Deadline, fragments, number of received fragments and their size
+        entry = [now + self.__timeout, [None] * count, 0, 0]
+        self.__incomplete[key] = entry
+      parts = entry[1]
+      if len(parts) != count or parts[index] is not None:
+        # Inconsistent or redelivered fragment
+        return None
+      parts[index] = body
+      entry[2] += 1
+      entry[3] += len(body)
+      self.__bytes += len(body)
+      if entry[2] == count:
+        del self.__incomplete[key]
+        self.__bytes -= entry[3]
+        return b"".join(parts)
+      while self.__bytes > self.__maxbytes and self.__incomplete:
+        self.__drop()
+    return None
+
+  ##
+  # @brief Get the number of incomplete messages dropped
+  # @return Number of dropped messages
+  #
+  def dropped_count(self):
+    with self.__mutex:
+      return self.__dropped
+
+  ##
+  # @brief Drop the messages not completed within the timeout (called with the lock held)
+  #
+  def __expire(self, pnow):
+    while self.__incomplete:
+      key = next(iter(self.__incomplete))
+      if self.__incomplete[key][0] > pnow:
+        return
+      self.__drop()
+
+  ##
+  # @brief Drop the oldest incomplete message (called with the lock held)
+  #
+  def __drop(self):
+    key, entry = self.__incomplete.popitem(last=False)
+    self.__bytes -= entry[3]
+    self.__dropped += 1
+
+if __name__ == '__main__':
+
+    # Split and reassemble a payload of the size of a point cloud, with fragments in reverse order
+    payload = bytes(bytearray(range(256))) * 4096
+    sender = PahoFragmenter(65536)
+    receiver = PahoFragmenter()
+    start = time.time()
+    frames = sender.split(payload)
+    for frame in reversed(frames):
+      result = receiver.reassemble("test", frame)
+    elapsed = time.time() - start
+    print("%d bytes in %d fragments: %s, %.1f ms" % (len(payload), len(frames), str(result == payload), elapsed * 1e3))
+
+    # Incomplete messages are dropped by the memory limit
+    receiver = PahoFragmenter(0, 10.0, 100000)
+    for i in range(3):
+      receiver.reassemble("test", sender.split(payload)[0])
+    print("dropped by memory limit: %d" % receiver.dropped_count())
@@ -0,0 +1,278 @@
+#!/usr/bin/python
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoNetworkLoop.py
+# @brief  PahoNetworkLoop class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import select
+import socket
+import sys
+import threading
+import time
+import traceback
+
+##
+# @class PahoNetworkLoop
+# @brief Single network loop thread driving many MQTT clients
+#
+# Instead of one loop_start() thread per client, attached clients are
+# driven by one select() based I/O thread through loop_read(), loop_write()
+# and loop_misc(). Socket registration requested from other threads is
+# passed to the loop thread, which is the only user of the socket sets.
+#
+class PahoNetworkLoop:
+
+  __instance = None
+  __instance_mutex = threading.Lock()
+
+  ##
+  # @brief Constructor
+  # @param pmisc Interval of loop_misc() calls (keepalive and reconnection) in seconds
+  #
+  def __init__(self, pmisc=1.0):
+    self.__misc = pmisc
+    self.__readers = {}
+    self.__writers = set()
+    self.__wakeupR, self.__wakeupW = socket.socketpair()
+    self.__wakeupR.setblocking(False)
+    self.__wakeupW.setblocking(False)
+    self.__mutex = threading.Lock()
+    self.__requests = []
+    self.__clients = {}
+    self.__thread = None
+
+  ##
+  # @brief Get the singleton instance
+  # @return PahoNetworkLoop instance
+  #
+  @staticmethod
+  def instance():
+    with PahoNetworkLoop.__instance_mutex:
+      if PahoNetworkLoop.__instance is None:
+        PahoNetworkLoop.__instance = PahoNetworkLoop()
+    return PahoNetworkLoop.__instance
+
+  ##
+  # @brief Let the network loop drive a MQTT client
+  # @param client MQTT client instance, which must be attached before connect()
+  #
+  def attach(self, client):
+    client.on_socket_open = self.on_socket_open
+    client.on_socket_close = self.on_socket_close
+    client.on_socket_register_write = self.on_socket_register_write
+    client.on_socket_unregister_write = self.on_socket_unregister_write
+    with self.__mutex:
+      self.__clients[client] = ["connecting", 0, None]
+      if self.__thread is None:
+        self.__thread = threading.Thread(target=self.__run)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+  ##
+  # @brief Connect an attached MQTT client to broker without blocking the caller
+  # @param client MQTT client instance attached to the network loop
+  # @param phost MQTT broker endpoint address
+  # @param pport MQTT messaging service port number
+  # @param pkeepalive Lifetime of client
+  # @param poptions Other keyword arguments of connect_async() (MQTT v5 clean start and properties)
+  #
+  # DNS lookup, TCP connection and TLS handshake run in a short-lived thread,
+  # so that many clients handshake in parallel. A failed attempt is retried
+  # by the network loop like a lost connection.
+  #
+  def connect_async(self, client, phost, pport, pkeepalive, poptions=None):
+    client.connect_async(phost, pport, pkeepalive, **(poptions or {}))
+    self.__start_connect(client)
+
+  ##
+  # @brief Connect or reconnect a MQTT client in a short-lived thread
+  #
+  # The new socket is registered by the loop thread through on_socket_open.
+  #
+  def __start_connect(self, client):
+    connector = threading.Thread(target=self.__connect, args=(client,))
+    connector.daemon = True
+    connector.start()
+
+  def __connect(self, client):
+    try:
+      client.reconnect()
+    except (socket.error, ValueError):
+      with self.__mutex:
+        state = self.__clients.get(client)
+        if state is not None and state[0] == "connecting":
+          state[0] = "lost"
+          state[1] = time.time() + self.__misc
+
+  ##
+  # @brief Disconnect a MQTT client from broker and remove it from the network loop
+  # @param client MQTT client instance
+  # @param ptimeout Time to wait for DISCONNECT to be sent in seconds
+  #
+  def detach(self, client, ptimeout=1.0):
+    closed = threading.Event()
+    with self.__mutex:
+      state = self.__clients.get(client)
+      if state is None:
+        return
+      opened = client.socket() is not None
+      state[0] = "closing"
+      state[2] = closed
+    if opened:
+      client.disconnect()
+      closed.wait(ptimeout)
+    with self.__mutex:
+      self.__clients.pop(client, None)
+
+  ##
+  # @brief Call back functions from paho on socket state changes
+  #
+  def on_socket_open(self, client, userdata, sock):
+    self.__request(self.__open, client, sock)
+
+  def on_socket_close(self, client, userdata, sock):
+    self.__request(self.__close, client, sock)
+
+  def on_socket_register_write(self, client, userdata, sock):
+    self.__request(self.__want_write, client, sock, True)
+
+  def on_socket_unregister_write(self, client, userdata, sock):
+    self.__request(self.__want_write, client, sock, False)
+
+  ##
+  # @brief Pass a socket set operation to the loop thread and wake it up
+  #
+  def __request(self, func, *args):
+    with self.__mutex:
+      self.__requests.append((func, args))
+    try:
+      self.__wakeupW.send(b"\x00")
+    except socket.error:
+      pass
+
+  def __open(self, client, sock):
+    self.__readers[sock] = client
+    if client.want_write():
+      self.__writers.add(sock)
+    with self.__mutex:
+      state = self.__clients.get(client)
+      if state is not None and state[0] != "closing":
+        state[0] = "open"
+        return
+    # Detached while connecting in background
+    client.disconnect()
+
+  def __close(self, client, sock):
+    self.__readers.pop(sock, None)
+    self.__writers.discard(sock)
+    with self.__mutex:
+      state = self.__clients.get(client)
+      if state is None:
+        return
+      if state[0] == "closing":
+        state[2].set()
+      else:
+        state[0] = "lost"
+        state[1] = time.time() + self.__misc
+
+  def __want_write(self, client, sock, pwrite):
+    if not sock in self.__readers:
+      return
+    if pwrite:
+      self.__writers.add(sock)
+    else:
+      self.__writers.discard(sock)
+
+  ##
+  # @brief Keepalive handling and reconnection of lost clients
+  #
+  # Lost clients are reconnected in background as by connect_async, so
+  # that an unreachable broker does not stall the other clients.
+  #
+  def __housekeep(self):
+    now = time.time()
+    reconnecting = []
+    with self.__mutex:
+      clients = list(self.__clients.items())
+      for client, state in clients:
+        if state[0] == "lost" and now >= state[1]:
+          state[0] = "connecting"
+          reconnecting.append(client)
+    for client, state in clients:
+      try:
+        if state[0] == "open":
+          client.loop_misc()
+      except (socket.error, ValueError):
+        pass
+      except Exception:
+        self.__report(client)
+    for client in reconnecting:
+      self.__start_connect(client)
+
+  ##
+  # @brief Report an exception raised in the loop thread, e.g. by a callback of a client
+  #
+  # The loop thread is shared by all clients, so the client is identified
+  # by its client ID, or by the broker if the ID is assigned by the broker.
+  #
+  def __report(self, client):
+    clientid = getattr(client, "_client_id", b"")
+    if isinstance(clientid, bytes):
+      clientid = clientid.decode("utf-8", "replace")
+    if not clientid:
+      clientid = "%s:%s" % (getattr(client, "_host", ""), getattr(client, "_port", ""))
+    sys.stderr.write("Exception in shared network loop for client " + clientid + ":\n" + traceback.format_exc())
+
+  ##
+  # @brief Network loop thread
+  #
+  def __run(self):
+    last = time.time()
+    while True:
+      with self.__mutex:
+        requests = self.__requests
+        self.__requests = []
+      for func, args in requests:
+        func(*args)
+
+      try:
+        rlist, wlist, xlist = select.select(list(self.__readers) + [self.__wakeupR], list(self.__writers), [], self.__misc)
+      except (select.error, socket.error, ValueError):
+        rlist, wlist = [], []
+        for sock in list(self.__readers):
+          if sock.fileno() < 0:
+            self.__close(self.__readers[sock], sock)
+
+      if self.__wakeupR in rlist:
+        rlist.remove(self.__wakeupR)
+        try:
+          while self.__wakeupR.recv(4096):
+            pass
+        except socket.error:
+          pass
+      for sock in rlist:
+        client = self.__readers.get(sock)
+        try:
+          if client is not None:
+            client.loop_read()
+        except Exception:
+          self.__report(client)
+      for sock in wlist:
+        client = self.__readers.get(sock)
+        try:
+          if client is not None:
+            client.loop_write()
+        except Exception:
+          self.__report(client)
+
+      now = time.time()
+      if now - last >= self.__misc:
+        last = now
+        self.__housekeep()
@@ -46,8 +46,30 @@ class PahoPubSecure(PahoPublisher):
     self.__cacert = pcacert
     self.__clientcert = pcltcert
     self.__clientkey = pcltkey
-    self.get_client().tls_set(ca_certs=self.__cacert, certfile=self.__clientcert, keyfile=self.__clientkey, cert_reqs = mqtt.ssl.CERT_REQUIRED, tls_version = mqtt.ssl.PROTOCOL_TLSv1_2, ciphers = None)
-    self.get_client().tls_insecure_set(False)
+    self.tls_set_client(self.get_client())
+
+  ##
+  # @brief Enable TLS on a MQTT client with the specified files
+  # @param client MQTT client instance
+  #
+  def tls_set_client(self, client):
+    client.tls_set(ca_certs=self.__cacert, certfile=self.__clientcert, keyfile=self.__clientkey, cert_reqs = mqtt.ssl.CERT_REQUIRED, tls_version = mqtt.ssl.PROTOCOL_TLSv1_2, ciphers = None)
+    client.tls_insecure_set(False)
+
+  ##
+  # @brief Apply client settings to a MQTT client
+  # @param client MQTT client instance
+  #
+  def configure_client(self, client):
+    PahoPublisher.configure_client(self, client)
+    self.tls_set_client(client)
+
+  ##
+  # @brief Get the key of the shared client in the client pool
+  # @return Tuple of the connection settings and TLS material
+  #
+  def get_pool_key(self):
+    return PahoPublisher.get_pool_key(self) + (self.__cacert, self.__clientcert, self.__clientkey)
 
 if __name__ == '__main__':
 
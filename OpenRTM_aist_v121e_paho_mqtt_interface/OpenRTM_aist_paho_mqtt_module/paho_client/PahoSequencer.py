@@ -0,0 +1,195 @@
+#!/usr/bin/python
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoSequencer.py
+# @brief  PahoSequencer class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import collections
+import random
+import struct
+import threading
+import time
+
+##
+# @class PahoSequencer
+# @brief Number the messages of a publisher, and detect lost, duplicate and reordered messages
+#
+# Frame format (network byte order):
+#   magic 'RTMS' | sender (uint32) | sequence number (uint32) | send time (float64, UNIX time) | payload
+#
+# The sender is a random number chosen by each publisher, as with
+# PahoFragmenter. Receivers remember the sequence numbers of each sender
+# in a sliding bitmap of the window size below the highest number seen.
+# Numbers skipped by a message are counted as lost, and a skipped number
+# arriving later is counted as reordered instead. A number already
+# received is a duplicate, e.g. a QoS 1 message redelivered by the broker
+# after a reconnection, and is dropped if deduplication is enabled. A
+# message older than the window can not be told from a new one and is
+# counted as reordered. Up to MAX_SENDERS senders are remembered, the
+# least recently seen one is forgotten first.
+#
+# The transit time is the receive time minus the send time, and is
+# meaningful only if the clocks of the publisher and the subscriber are
+# synchronized.
+#
+class PahoSequencer:
+
+  MAGIC = b"RTMS"
+  HEADER = struct.Struct("!4sIId")
+  MAX_SENDERS = 256
+
+  ##
+  # @brief Constructor
+  # @param pwindow Number of the latest sequence numbers remembered for each sender
+  # @param pdedup Whether to drop duplicate messages
+  #
+  def __init__(self, pwindow=1024, pdedup=False):
+    self.__sender = random.getrandbits(32)
+    self.__seq = 0
+    self.__seqmutex = threading.Lock()
+    self.__window = max(pwindow, 1)
+    self.__mask = (1 << self.__window) - 1
+    self.__dedup = pdedup
+    # Sender: [highest sequence number, bitmap of received numbers below it]
+    self.__senders = collections.OrderedDict()
+    self.__received = 0
+    self.__lost = 0
+    self.__duplicates = 0
+    self.__reordered = 0
+    self.__transit = 0.0
+    self.__maxtransit = 0.0
+    self.__mutex = threading.Lock()
+
+  ##
+  # @brief Add the header with the next sequence number and the current time to a payload
+  # @param pdata Payload (bytes, or str encoded in UTF-8)
+  # @return Frame
+  #
+  def stamp(self, pdata):
+    if not isinstance(pdata, bytes):
+      pdata = pdata.encode("utf-8")
+    with self.__seqmutex:
+      self.__seq = (self.__seq + 1) & 0xffffffff
+      seq = self.__seq
+    return PahoSequencer.HEADER.pack(PahoSequencer.MAGIC, self.__sender, seq, time.time()) + pdata
+
+  ##
+  # @brief Strip the header from a received frame, counting lost, duplicate and reordered messages
+  # @param pframe Received payload
+  # @return Payload, the received payload as it is if it is not a frame, or None if it is a dropped duplicate
+  #
+  def check(self, pframe):
+    if len(pframe) < PahoSequencer.HEADER.size or pframe[:4] != PahoSequencer.MAGIC:
+      return pframe
+    magic, sender, seq, sent = PahoSequencer.HEADER.unpack_from(pframe, 0)
+    transit = time.time() - sent
+    with self.__mutex:
+      if self.__record(sender, seq):
+        self.__duplicates += 1
+        if self.__dedup:
+          return None
+      else:
+        self.__received += 1
+        self.__transit += transit
+        if transit > self.__maxtransit:
+          self.__maxtransit = transit
+    return pframe[PahoSequencer.HEADER.size:]
+
+  ##
+  # @brief Get the number of duplicate messages received
+  # @return Number of duplicates, which are dropped if deduplication is enabled
+  #
+  def duplicate_count(self):
+    with self.__mutex:
+      return self.__duplicates
+
+  ##
+  # @brief Get the statistics of the received messages
+  # @return Dictionary of the numbers of 'received' (not duplicate), 'lost', 'duplicate' and 'reordered' messages, and 'transit' and 'max_transit' times in seconds
+  #
+  def stats(self):
+    with self.__mutex:
+      return {"received": self.__received, "lost": self.__lost, "duplicate": self.__duplicates, "reordered": self.__reordered,
+              "transit": self.__transit / self.__received if self.__received else 0.0, "max_transit": self.__maxtransit}
+
+  ##
+  # @brief Record a sequence number (called with the lock held)
+  # @return True if the number was already received
+  #
+  def __record(self, psender, pseq):
+    # Pop and insert again to keep the senders in order of use
+    state = self.__senders.pop(psender, None)
+    if state is None:
+      if len(self.__senders) >= PahoSequencer.MAX_SENDERS:
+        self.__senders.popitem(last=False)
+      self.__senders[psender] = [pseq, 1]
+      return False
+    self.__senders[psender] = state
+    ahead = (pseq - state[0]) & 0xffffffff
+    if ahead == 0:
+      return True
+    if ahead < 0x80000000:
+      # Skipped numbers are lost until they arrive
+      self.__lost += ahead - 1
+      if ahead < self.__window:
+        state[1] = ((state[1] << ahead) | 1) & self.__mask
+      else:
+        state[1] = 1
+      state[0] = pseq
+      return False
+    behind = 0x100000000 - ahead
+    if behind < self.__window:
+      bit = 1 << behind
+      if state[1] & bit:
+        return True
+      state[1] |= bit
+    self.__reordered += 1
+    if self.__lost > 0:
+      self.__lost -= 1
+    return False
+
+if __name__ == '__main__':
+
+    # Redelivery of the last messages after a reconnection, out of order
+    sender = PahoSequencer()
+    receiver = PahoSequencer(1024, True)
+    frames = [sender.stamp(b"data %d" % i) for i in range(10000)]
+    redelivered = frames[-20:]
+    random.shuffle(redelivered)
+    received = [data for data in (receiver.check(frame) for frame in frames + redelivered) if data is not None]
+    print("received %d of %d messages, %d duplicates dropped" % (len(received), len(frames) + len(redelivered), receiver.duplicate_count()))
+
+    # Loss and reordering like QoS 0 over a lossy link: 1% lost, 1% swapped with the next message
+    receiver = PahoSequencer()
+    arrived = [frame for frame in frames if random.random() >= 0.01]
+    lost = len(frames) - len(arrived)
+    swapped = 0
+    i = 0
+    while i < len(arrived) - 1:
+      if random.random() < 0.01:
+        arrived[i], arrived[i + 1] = arrived[i + 1], arrived[i]
+        swapped += 1
+        i += 1
+      i += 1
+    for frame in arrived:
+      receiver.check(frame)
+    print("lost %d, swapped %d: %s" % (lost, swapped, str(receiver.stats())))
+
+    # Cost per message of numbering and checking
+    start = time.time()
+    for frame in frames:
+      sender.stamp(frame)
+    stime = (time.time() - start) / len(frames) * 1e6
+    receiver = PahoSequencer()
+    start = time.time()
+    for frame in frames:
+      receiver.check(frame)
+    ctime = (time.time() - start) / len(frames) * 1e6
+    print("stamp %.2f us, check %.2f us per message" % (stime, ctime))
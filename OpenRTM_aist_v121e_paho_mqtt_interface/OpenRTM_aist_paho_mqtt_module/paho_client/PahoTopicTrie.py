@@ -0,0 +1,147 @@
+#!/usr/bin/python
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoTopicTrie.py
+# @brief  PahoTopicTrie class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import threading
+
+##
+# @class PahoTopicTrie
+# @brief Find the values registered for the topic filters matching a topic
+#
+# Topic filters are stored level by level in a tree, so that a topic is
+# matched in time proportional to its number of levels rather than to
+# the number of filters. Wildcards '+' and '#' follow MQTT, and do not
+# match topics beginning with '$' at the first level. Results are cached
+# per topic until a filter is added or removed.
+#
+class PahoTopicTrie:
+
+  ##
+  # @brief Constructor
+  # @param pcachesize Maximum number of topics of which results are cached, 0 not to cache results
+  #
+  def __init__(self, pcachesize=1024):
+    # Node: [dict of level to child node, list of values]
+    self.__root = [{}, []]
+    self.__cache = {}
+    self.__cachesize = pcachesize
+    self.__mutex = threading.Lock()
+
+  ##
+  # @brief Register a value for a topic filter
+  # @param pfilter Topic filter
+  # @param pvalue Value returned by match() for the topics matching the filter
+  #
+  def add(self, pfilter, pvalue):
+    with self.__mutex:
+      node = self.__root
+      for level in pfilter.split("/"):
+        child = node[0].get(level)
+        if child is None:
+          child = [{}, []]
+          node[0][level] = child
+        node = child
+      node[1].append(pvalue)
+      self.__cache.clear()
+
+  ##
+  # @brief Unregister a value from a topic filter
+  # @param pfilter Topic filter
+  # @param pvalue Value registered by add()
+  #
+  def remove(self, pfilter, pvalue):
+    with self.__mutex:
+      path = [self.__root]
+      levels = pfilter.split("/")
+      for level in levels:
+        node = path[-1][0].get(level)
+        if node is None:
+          return
+        path.append(node)
+      node[1][:] = [value for value in node[1] if value is not pvalue]
+      # Remove the nodes left without values and children
+      for i in range(len(levels), 0, -1):
+        if path[i][0] or path[i][1]:
+          break
+        del path[i - 1][0][levels[i - 1]]
+      self.__cache.clear()
+
+  ##
+  # @brief Find the values of the filters matching a topic
+  # @param ptopic Topic of a received message
+  # @return Tuple of the values
+  #
+  def match(self, ptopic):
+    with self.__mutex:
+      result = self.__cache.get(ptopic)
+      if result is not None:
+        return result
+      values = []
+      wildcard = not ptopic.startswith("$")
+      nodes = [self.__root]
+      for level in ptopic.split("/"):
+        following = []
+        for node in nodes:
+          children = node[0]
+          if wildcard:
+            child = children.get("#")
+            if child is not None:
+              values.extend(child[1])
+            child = children.get("+")
+            if child is not None:
+              following.append(child)
+          child = children.get(level)
+          if child is not None:
+            following.append(child)
+        nodes = following
+        wildcard = True
+        if not nodes:
+          break
+      for node in nodes:
+        values.extend(node[1])
+        # 'a/#' also matches 'a'
+        child = node[0].get("#")
+        if child is not None:
+          values.extend(child[1])
+      result = tuple(values)
+      if self.__cachesize > 0:
+        if len(self.__cache) >= self.__cachesize:
+          self.__cache.clear()
+        self.__cache[ptopic] = result
+      return result
+
+if __name__ == '__main__':
+
+    import time
+    import paho.mqtt.client as mqtt
+
+    # Dispatch to 80 data ports compared with matching every filter
+    filters = ["factory/line%d/robot%d/joint_states" % (i // 10, i % 10) for i in range(76)]
+    filters += ["factory/+/robot0/status", "factory/line1/#", "factory/#", "$SYS/#"]
+    trie = PahoTopicTrie()
+    uncached = PahoTopicTrie(0)
+    for i, f in enumerate(filters):
+      trie.add(f, i)
+      uncached.add(f, i)
+    topics = ["factory/line%d/robot%d/joint_states" % (i // 10, i % 10) for i in range(76)] + ["factory/line3/robot0/status", "$SYS/broker/load"]
+    for topic in topics:
+      linear = tuple(i for i, f in enumerate(filters) if mqtt.topic_matches_sub(f, topic))
+      assert sorted(uncached.match(topic)) == sorted(linear), topic
+      assert sorted(trie.match(topic)) == sorted(linear), topic
+    trie.remove("factory/#", 78)
+    assert 78 not in trie.match("factory/line3/robot0/status")
+    for name, func in (("linear", lambda t: [i for i, f in enumerate(filters) if mqtt.topic_matches_sub(f, t)]), ("trie", uncached.match), ("trie with cache", trie.match)):
+      start = time.time()
+      for n in range(100):
+        for topic in topics:
+          func(topic)
+      print("%-18s %8.2f us per message" % (name, (time.time() - start) / (100 * len(topics)) * 1e6))
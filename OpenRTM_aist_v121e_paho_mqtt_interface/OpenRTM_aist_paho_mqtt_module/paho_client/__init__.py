@@ -2,3 +2,13 @@ import OpenRTM_aist_paho_mqtt_module.paho_client.PahoPublisher
 import OpenRTM_aist_paho_mqtt_module.paho_client.PahoSubscriber
 import OpenRTM_aist_paho_mqtt_module.paho_client.PahoPubSecure
 import OpenRTM_aist_paho_mqtt_module.paho_client.PahoSubSecure
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoNetworkLoop
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoClientPool
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoBatcher
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoDispatcher
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoCompressor
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoFragmenter
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoTopicAlias
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoSequencer
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoTopicTrie
+import OpenRTM_aist_paho_mqtt_module.paho_client.PahoSubscriberPool
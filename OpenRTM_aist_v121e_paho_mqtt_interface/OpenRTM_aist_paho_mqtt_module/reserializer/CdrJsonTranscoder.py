@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+# -*- coding: euc-jp -*-
+
+##
+# @file  CdrJsonTranscoder.py
+# @brief CdrJsonTranscoder class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+from omniORB import CORBA
+import binascii
+import json
+import struct
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+# Format character, size (= alignment) and text conversion of basic types
+PRIMITIVES = {
+  CORBA.tk_short: ("h", 2, None),
+  CORBA.tk_long: ("i", 4, None),
+  CORBA.tk_ushort: ("H", 2, None),
+  CORBA.tk_ulong: ("I", 4, None),
+  CORBA.tk_longlong: ("q", 8, None),
+  CORBA.tk_ulonglong: ("Q", 8, None),
+  CORBA.tk_float: ("f", 4, "_float"),
+  CORBA.tk_double: ("d", 8, "_float"),
+  CORBA.tk_boolean: ("?", 1, "_bool"),
+  CORBA.tk_char: ("c", 1, "_char"),
+}
+
+INFINITY = float("inf")
+
+##
+# @brief Format a float the same way as json.dumps()
+#
+def _float(val):
+  if val != val:
+    return "NaN"
+  elif val == INFINITY:
+    return "Infinity"
+  elif val == -INFINITY:
+    return "-Infinity"
+  return repr(val)
+
+##
+# @brief Format a char the same way as json.dumps()
+#
+# Only ASCII is accepted, since other characters depend on the code set of
+# the ORB. ValueError makes the caller fall back to cdrUnmarshal().
+#
+def _char(val):
+  return json.encoder.encode_basestring_ascii(val.decode("ascii"))
+
+##
+# @brief Format a string the same way as json.dumps()
+#
+def _string(val):
+  return json.encoder.encode_basestring_ascii(val.decode("ascii"))
+
+_bool = {True: "true", False: "false"}
+
+##
+# @brief Format a sequence of floats the same way as json.dumps()
+#
+# The sum is finite only if all values are finite, and then repr() gives
+# the same text as json.dumps() without a Python function per element.
+#
+def _floats(vals):
+  total = sum(vals)
+  if total - total == 0:
+    return ", ".join(map(repr, vals))
+  return ", ".join(map(_float, vals))
+
+##
+# @brief Read a sequence of basic type
+# @param order Byte order, "<" or ">"
+# @param char Format character of the type
+# @param n Number of the values
+#
+# NumPy reads the values into an array without a format string per length
+# and converts them to Python values at once, if it is installed.
+#
+def _array(order, char, n, b, o):
+  if numpy is not None:
+    return numpy.frombuffer(b, order + char, n, o).tolist()
+  return struct.unpack_from("%s%d%s" % (order, n, char), b, o)
+
+##
+# @brief Format a sequence of octet in base64 text
+# @param n Number of the octets
+#
+# The octets are encoded from a view of the CDR buffer without copying them.
+#
+def _base64(b, o, n):
+  if o + n > len(b):
+    raise ValueError("sequence of octet exceeds the data")
+  return binascii.b2a_base64(memoryview(b)[o:o+n])[:-1]
+
+##
+# @class CdrJsonTranscoder
+# @brief Generate a function writing JSON text directly from CDR data
+#
+# The function walks the CDR buffer according to the TypeCode and produces
+# the same text as json.dumps() of the dict objects made by DataTypeFormat,
+# without unmarshalled objects and dict objects in between. Consecutive
+# members of basic types with known alignment are read by a single
+# struct.unpack_from() call, e.g. RTC.TimedLong becomes
+#
+#   v = _s1.unpack_from(b, o); o += 12
+#   p.append('{"tm": {"sec": %s, "nsec": %s}, "data": %s}' % (v[0], v[1], v[2]))
+#
+# Sequences and arrays of octet are written in base64 text. Types with
+# members of other kinds (enum, wstring, sequence of char, ...) are not
+# supported, and compile() returns None for them.
+#
+class CdrJsonTranscoder:
+
+  ##
+  # @brief Constructor
+  # @param endian True for little endian, False for big endian
+  #
+  def __init__(self, endian):
+    self._order = "<" if endian else ">"
+    self._namespace = {"_float": _float, "_floats": _floats, "_char": _char, "_string": _string, "_bool": _bool,
+                       "_ulong": struct.Struct(self._order + "I"), "_array": _array, "_base64": _base64}
+    self._count = 0
+
+  ##
+  # @brief Compile the transcoder
+  # @param typecode TypeCode of the data type
+  # @param typename Name of the data type, the key of the JSON object
+  # @param sample dict object of the data type, giving the order of the keys
+  # @return Function converting CDR data to JSON text, or None if not supported
+  #
+  def compile(self, typecode, typename, sample):
+    if not self.supported(typecode):
+      return None
+    body = self.Body(self)
+    body.literal("{" + json.dumps(typename) + ": ")
+    self.struct(body, self.unalias(typecode), sample)
+    body.literal("}")
+    body.flush()
+    lines = ["def _transcode(b):", "  o = 0", "  p = []"]
+    lines += ["  " + line for line in body.lines]
+    lines += ["  if o != len(b):", "    raise ValueError('CDR data size mismatch')", "  return ''.join(p)"]
+    return self.define("\n".join(lines) + "\n", "_transcode")
+
+  ##
+  # @brief Define a generated function in the namespace of the transcoder
+  #
+  def define(self, source, name):
+    exec(compile(source, "<transcoder %s>" % name, "exec"), self._namespace)
+    return self._namespace[name]
+
+  ##
+  # @brief Register a value in the namespace of the transcoder
+  # @return Name of the value
+  #
+  def constant(self, prefix, val):
+    name = self.newName(prefix)
+    self._namespace[name] = val
+    return name
+
+  ##
+  # @brief Get a new name for a generated variable
+  #
+  def newName(self, prefix):
+    self._count += 1
+    return "%s%d" % (prefix, self._count)
+
+  ##
+  # @brief Resolve aliases (typedef)
+  #
+  @staticmethod
+  def unalias(typecode):
+    while typecode.kind() == CORBA.tk_alias:
+      typecode = typecode.content_type()
+    return typecode
+
+  ##
+  # @brief Whether the transcoder supports all members of the type
+  #
+  def supported(self, typecode):
+    typecode = self.unalias(typecode)
+    kind = typecode.kind()
+    if kind in PRIMITIVES or kind == CORBA.tk_string:
+      return True
+    elif kind == CORBA.tk_struct:
+      for i in range(typecode.member_count()):
+        if not self.supported(typecode.member_type(i)):
+          return False
+      return True
+    elif kind in (CORBA.tk_sequence, CORBA.tk_array):
+      content = self.unalias(typecode.content_type())
+      # Sequences and arrays of char are mapped to strings
+      if content.kind() == CORBA.tk_char:
+        return False
+      if content.kind() == CORBA.tk_octet:
+        return True
+      return self.supported(content)
+    return False
+
+  ##
+  # @brief Generate the code of a struct
+  # @param body Body of the function being generated
+  # @param typecode TypeCode of the struct
+  # @param sample dict object of the struct, or None to use the declaration order
+  #
+  def struct(self, body, typecode, sample):
+    names = [typecode.member_name(i) for i in range(typecode.member_count())]
+    if sample is None:
+      sample = dict((name, None) for name in names)
+    if list(sample) == names:
+      body.literal("{")
+      for i in range(len(names)):
+        if i:
+          body.literal(", ")
+        body.literal(json.dumps(names[i]) + ": ")
+        self.value(body, typecode.member_type(i), sample[names[i]])
+      body.literal("}")
+      return
+    # The keys of dict objects are not in the declaration order (Python 2).
+    # The members are read in the declaration order, and then the texts of
+    # them are joined in the order of the keys.
+    marks = []
+    for i in range(len(names)):
+      marks.append(self.newName("m"))
+      body.code("%s = len(p)" % marks[-1])
+      self.value(body, typecode.member_type(i), sample[names[i]])
+    body.code("r = [''.join(p[i:j]) for i, j in zip((%s,), (%s,))]" % (", ".join(marks), ", ".join(marks[1:] + ["None"])))
+    body.code("del p[%s:]" % marks[0])
+    body.literal("{")
+    first = True
+    for name in sample:
+      if not first:
+        body.literal(", ")
+      first = False
+      body.literal(json.dumps(name) + ": ")
+      body.expression("r[%d]" % names.index(name))
+    body.literal("}")
+
+  ##
+  # @brief Generate the code of a value
+  #
+  def value(self, body, typecode, sample):
+    typecode = self.unalias(typecode)
+    kind = typecode.kind()
+    if kind in PRIMITIVES:
+      body.primitive(*PRIMITIVES[kind])
+    elif kind == CORBA.tk_string:
+      body.align(4)
+      body.code("n = _ulong.unpack_from(b, o)[0]")
+      body.code("p.append(_string(b[o+4:o+3+n])); o += 4 + n")
+      body.unknown()
+    elif kind == CORBA.tk_struct:
+      self.struct(body, typecode, sample if isinstance(sample, dict) else None)
+    else:
+      self.sequence(body, typecode)
+
+  ##
+  # @brief Generate the code of a sequence or an array
+  #
+  def sequence(self, body, typecode):
+    content = self.unalias(typecode.content_type())
+    if typecode.kind() == CORBA.tk_sequence:
+      body.align(4)
+      body.code("n = _ulong.unpack_from(b, o)[0]; o += 4")
+      body.known(4, 0)
+    else:
+      body.flush()
+      body.code("n = %d" % typecode.length())
+    if content.kind() == CORBA.tk_octet:
+      body.code("p.append('\"' + _base64(b, o, n) + '\"'); o += n")
+      body.unknown()
+    elif content.kind() in PRIMITIVES:
+      char, size, conv = PRIMITIVES[content.kind()]
+      pad = body.padding(size)
+      body.code("if n:")
+      if pad is None:
+        body.code("  o = (o + %d) & %d" % (size - 1, -size))
+      elif pad:
+        body.code("  o += %d" % pad)
+      body.code("  q = _array('%s', '%s', n, b, o); o += n * %d" % (self._order, char, size))
+      if conv is None:
+        body.code("  p.append('[' + ', '.join(map(str, q)) + ']')")
+      elif conv == "_bool":
+        body.code("  p.append('[' + ', '.join([_bool[x] for x in q]) + ']')")
+      elif conv == "_float":
+        body.code("  p.append('[' + _floats(q) + ']')")
+      else:
+        body.code("  p.append('[' + ', '.join(map(%s, q)) + ']')" % conv)
+      body.code("else:")
+      body.code("  p.append('[]')")
+      if size < 4 or typecode.kind() == CORBA.tk_array:
+        body.unknown()
+      else:
+        body.known(4, 0)
+    else:
+      # Elements are converted by another function starting at any alignment
+      element = self.Body(self)
+      element.unknown()
+      self.value(element, content, None)
+      element.flush()
+      func = self.constant("_e", None)
+      lines = ["def %s(b, o):" % func, "  p = []"]
+      lines += ["  " + line for line in element.lines]
+      lines += ["  return o, ''.join(p)"]
+      self.define("\n".join(lines) + "\n", func)
+      body.code("q = []")
+      body.code("for i in range(n):")
+      body.code("  o, t = %s(b, o)" % func)
+      body.code("  q.append(t)")
+      body.code("p.append('[' + ', '.join(q) + ']')")
+      body.unknown()
+
+  ##
+  # @class Body
+  # @brief Lines of a generated function and the alignment known at generation time
+  #
+  class Body:
+
+    ##
+    # @brief Constructor
+    # @param transcoder CdrJsonTranscoder generating the function
+    #
+    def __init__(self, transcoder):
+      self._transcoder = transcoder
+      self.lines = []
+      # Offset is known to be 'phase' modulo 'modulus'
+      self._modulus = 8
+      self._phase = 0
+      self._format = ""
+      self._size = 0
+      self._text = ""
+      self._args = []
+
+    ##
+    # @brief Add literal JSON text
+    #
+    def literal(self, text):
+      self._text += text.replace("%", "%%")
+
+    ##
+    # @brief Add a value of basic type to the pending struct.unpack_from() call
+    #
+    def primitive(self, char, size, conv):
+      pad = self.padding(size)
+      if pad is None:
+        self.align(size)
+        pad = 0
+      self._format += "x" * pad + char
+      self._size += pad + size
+      self._phase = (self._phase + pad + size) % self._modulus
+      value = "v[%d]" % (len(self._format.replace("x", "")) - 1)
+      if conv == "_bool":
+        value = "_bool[%s]" % value
+      elif conv is not None:
+        value = "%s(%s)" % (conv, value)
+      self.expression(value)
+
+    ##
+    # @brief Add JSON text given by an expression
+    #
+    def expression(self, value):
+      self._text += "%s"
+      self._args.append(value)
+
+    ##
+    # @brief Padding before a value of the alignment, or None if not known
+    #
+    def padding(self, size):
+      if self._modulus < size:
+        return None
+      return (-self._phase) % size
+
+    ##
+    # @brief Align the offset
+    #
+    def align(self, size):
+      pad = self.padding(size)
+      if pad is None:
+        self.flush()
+        self.code("o = (o + %d) & %d" % (size - 1, -size))
+        self.known(size, 0)
+      elif pad:
+        self._format += "x" * pad
+        self._size += pad
+        self._phase = (self._phase + pad) % self._modulus
+
+    ##
+    # @brief Add a line of code after the pending values and text
+    #
+    def code(self, line):
+      self.flush()
+      self.lines.append(line)
+
+    ##
+    # @brief Set the alignment known after the code
+    #
+    def known(self, modulus, phase):
+      self._modulus = modulus
+      self._phase = phase
+
+    ##
+    # @brief Forget the alignment after code of variable length
+    #
+    def unknown(self):
+      self.known(1, 0)
+
+    ##
+    # @brief Generate the pending struct.unpack_from() call and text
+    #
+    def flush(self):
+      if self._size:
+        name = self._transcoder.constant("_s", struct.Struct(self._transcoder._order + self._format))
+        self.lines.append("v = %s.unpack_from(b, o); o += %d" % (name, self._size))
+      if self._args:
+        self.lines.append("p.append(%r %% (%s,))" % (self._text, ", ".join(self._args)))
+      elif self._text:
+        self.lines.append("p.append(%r)" % self._text.replace("%%", "%"))
+      self._format = ""
+      self._size = 0
+      self._text = ""
+      self._args = []
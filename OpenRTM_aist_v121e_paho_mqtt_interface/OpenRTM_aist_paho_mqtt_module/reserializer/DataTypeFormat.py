@@ -14,9 +14,57 @@
 #
 
 from omniORB import *
+from omniORB import CORBA
+import omniORB
 import OpenRTM_aist
 import RTC
+import binascii
 import json
+import struct
+import threading
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+from OpenRTM_aist_paho_mqtt_module.reserializer.CdrJsonTranscoder import CdrJsonTranscoder
+from OpenRTM_aist_paho_mqtt_module.reserializer.JsonCdrWriter import JsonCdrWriter
+from OpenRTM_aist_paho_mqtt_module.reserializer.JsonBackend import JsonBackend
+
+##
+# @brief Encode a sequence of octet as base64 text for JSON
+#
+# A list of numbers, as in the default value, is also accepted.
+#
+def _toBase64(data):
+  if isinstance(data, list):
+    data = bytes(bytearray(data))
+  return binascii.b2a_base64(data)[:-1]
+
+##
+# @brief Decode base64 text of JSON to a sequence of octet
+#
+# Values other than text are passed as they are.
+#
+def _fromBase64(val):
+  if isinstance(val, basestring):
+    return binascii.a2b_base64(val)
+  return val
+
+##
+# @brief Raise KeyError for the first key of a dict object not in the members of a struct
+#
+# Keys not in the data type are rejected as by DataTypeFormat.convertDictToDataType().
+#
+def _unknownKey(d, known):
+  for key in d:
+    if key not in known:
+      raise KeyError(key)
+
+# TypeCode kinds of values converted as they are
+PLAIN_KINDS = (CORBA.tk_short, CORBA.tk_long, CORBA.tk_ushort, CORBA.tk_ulong,
+               CORBA.tk_float, CORBA.tk_double, CORBA.tk_boolean, CORBA.tk_char,
+               CORBA.tk_octet, CORBA.tk_string, CORBA.tk_longlong, CORBA.tk_ulonglong,
+               CORBA.tk_longdouble, CORBA.tk_wchar, CORBA.tk_wstring)
 
 ##
 # @class DataTypeFormat
@@ -24,13 +72,31 @@ import json
 #
 class DataTypeFormat:
 
+  # Converters compiled for each data type, keyed by repository ID and binary
+  _converters = {}
+  _converters_mutex = threading.Lock()
+  # Transcoders from CDR to JSON, keyed by repository ID and endian
+  _transcoders = {}
+  # Writers from JSON to CDR, keyed by repository ID, endian and binary
+  _writers = {}
+
   ##
   # @brief Constructor
+  # @param datatype DataType object
+  # @param endian True for little endian, False for big endian
+  # @param backend Name of the JSON backend parsing the messages, or "auto"
   #
-  def __init__(self, datatype, endian):
+  def __init__(self, datatype, endian, backend="auto"):
     self._datatype = datatype
     self._endian = endian
-    self._TYPE_NAME = 'RTC.' + any.to_any(self._datatype).typecode().name()
+    self._json = JsonBackend(backend)
+    self._typecode = any.to_any(self._datatype).typecode()
+    self._TYPE_NAME = 'RTC.' + self._typecode.name()
+    self._toDict, self._fromDict = self.compileConverters(self._typecode)
+    self._toBinDict, self._fromBinDict = self.compileConverters(self._typecode, True)
+    self._transcoder = self.compileTranscoder(self._typecode)
+    self._writer = self.compileWriter(self._typecode)
+    self._binWriter = self.compileWriter(self._typecode, True)
 
   ##
   # @brief Convert DataType object to dict object
@@ -67,15 +133,85 @@ class DataTypeFormat:
 
     return dataobj
 
+  ##
+  # @brief Convert a member value the same way as convertDataTypeToDict()
+  #
+  def convertValueToDict(self, val):
+    if hasattr(val, '__dict__'):
+      return self.convertDataTypeToDict(val)
+    return val
+
+  ##
+  # @brief Convert a member value the same way as convertDictToDataType()
+  #
+  def convertValueToDataType(self, val, item):
+    if isinstance(val, dict):
+      return self.convertDictToDataType(val, item)
+    return val
+
+  ##
+  # @brief Get the converters compiled for a data type
+  # @param typecode TypeCode of the data type
+  # @param binary True to keep sequences of octet as bytes, False to encode them in base64 for JSON
+  # @return Tuple of the functions converting DataType object to dict object and back
+  #
+  # The converters are generated once per data type from the TypeCode and
+  # shared by all instances, so that no reflection runs per message.
+  #
+  def compileConverters(self, typecode, binary=False):
+    key = (typecode.id(), binary)
+    with DataTypeFormat._converters_mutex:
+      converters = DataTypeFormat._converters.get(key)
+      if converters is None:
+        converters = DataTypeConverterCompiler(self, binary).compile(typecode)
+        DataTypeFormat._converters[key] = converters
+    return converters
+
+  ##
+  # @brief Get the transcoder from CDR to JSON compiled for a data type
+  # @param typecode TypeCode of the data type
+  # @return Function converting CDR data to JSON text, or None if the type is not supported
+  #
+  def compileTranscoder(self, typecode):
+    key = (typecode.id(), bool(self._endian))
+    with DataTypeFormat._converters_mutex:
+      if not key in DataTypeFormat._transcoders:
+        sample = self._toDict(self._datatype)
+        DataTypeFormat._transcoders[key] = CdrJsonTranscoder(self._endian).compile(typecode, self._TYPE_NAME, sample)
+      return DataTypeFormat._transcoders[key]
+
+  ##
+  # @brief Get the writer from JSON to CDR compiled for a data type
+  # @param typecode TypeCode of the data type
+  # @param binary True for sequences of octet given as bytes, False for base64 text of JSON
+  # @return Function converting dict object to CDR data, or None if the type is not supported
+  #
+  def compileWriter(self, typecode, binary=False):
+    key = (typecode.id(), bool(self._endian), binary)
+    with DataTypeFormat._converters_mutex:
+      if not key in DataTypeFormat._writers:
+        DataTypeFormat._writers[key] = JsonCdrWriter(self._endian, binary).compile(typecode)
+      return DataTypeFormat._writers[key]
+
   ##
   # @brief Reserialize from CDR to JSON
   #
-  # CDR data -> (unmarshal) -> DataType object -> convertDataTypeToDict() -> dict object-> (serialize) -> JSON text
+  # CDR data -> (transcode) -> JSON text
+  #
+  # Falls back to the conversion below for the data not supported by the
+  # transcoder, e.g. strings other than ASCII.
+  #
+  # CDR data -> (unmarshal) -> DataType object -> compiled converter -> dict object-> (serialize) -> JSON text
   #
   def reserializeFromCdrToJson(self, cdrdata):
-    dataobj = cdrUnmarshal(any.to_any(self._datatype).typecode(), cdrdata, self._endian)
+    if self._transcoder is not None:
+      try:
+        return self._transcoder(cdrdata)
+      except (ValueError, struct.error):
+        pass
+    dataobj = cdrUnmarshal(self._typecode, cdrdata, self._endian)
     dictobj = {}
-    dictobj[self._TYPE_NAME] = self.convertDataTypeToDict(dataobj)
+    dictobj[self._TYPE_NAME] = self._toDict(dataobj)
     jsontext = json.dumps(dictobj)
 
     return jsontext
@@ -83,12 +219,318 @@ class DataTypeFormat:
   ##
   # @brief Reserialize from JSON to CDR
   #
-  # JSON text -> (deserialize) -> dict object -> convertDictToDataType() -> DataType object -> (marshal) -> CDR data
+  # JSON text -> (deserialize by JSON backend) -> dict object -> (write) -> CDR data
+  #
+  # Falls back to the conversion below for the data not supported by the
+  # writer, e.g. strings other than ASCII, so that invalid data raises the
+  # same exceptions as before.
+  #
+  # JSON text -> (deserialize) -> dict object -> compiled converter -> DataType object -> (marshal) -> CDR data
   #
   def reserializeFromJsonToCdr(self, jsontext):
-    dictobj = json.loads(jsontext)
+    dictobj = self._json.loads(jsontext)
+    dictobj = dictobj[self._TYPE_NAME]
+
+    return self.reserializeFromDictToCdr(dictobj)
+
+  ##
+  # @brief Reserialize from CDR to MessagePack
+  #
+  # CDR data -> (unmarshal) -> DataType object -> compiled converter -> dict object-> (pack) -> MessagePack data
+  #
+  # The structure is the same as JSON, {"RTC.<Type>": {...}}. Sequences of
+  # octet are packed as binary instead of base64 text.
+  #
+  def reserializeFromCdrToMsgpack(self, cdrdata):
+    dataobj = cdrUnmarshal(self._typecode, cdrdata, self._endian)
+    dictobj = {}
+    dictobj[self._TYPE_NAME] = self._toBinDict(dataobj)
+    msgpackdata = msgpack.packb(dictobj, use_bin_type=True)
+
+    return msgpackdata
+
+  ##
+  # @brief Reserialize from MessagePack to CDR
+  #
+  # MessagePack data -> (unpack) -> dict object -> (write) -> CDR data
+  #
+  def reserializeFromMsgpackToCdr(self, msgpackdata):
+    dictobj = msgpack.unpackb(msgpackdata, raw=False)
     dictobj = dictobj[self._TYPE_NAME]
-    dataobj = self.convertDictToDataType(dictobj, eval(self._TYPE_NAME))
-    cdrdata = cdrMarshal(any.to_any(self._datatype).typecode(), dataobj, self._endian)
+
+    return self.reserializeFromDictToCdr(dictobj, True)
+
+  ##
+  # @brief Reserialize from dict object to CDR
+  #
+  # Falls back to the compiled converter and cdrMarshal() for the data not
+  # supported by the writer.
+  #
+  # @param dictobj dict object of the data type
+  # @param binary True if sequences of octet are bytes, False if base64 text
+  #
+  def reserializeFromDictToCdr(self, dictobj, binary=False):
+    writer = self._binWriter if binary else self._writer
+    if writer is not None:
+      try:
+        return writer(dictobj)
+      except (ValueError, TypeError, AttributeError, OverflowError, struct.error):
+        pass
+    if binary:
+      dataobj = self._fromBinDict(dictobj)
+    else:
+      dataobj = self._fromDict(dictobj)
+    cdrdata = cdrMarshal(self._typecode, dataobj, self._endian)
 
     return cdrdata
+
+##
+# @class DataTypeConverterCompiler
+# @brief Generate the source code of converters between DataType object and dict object
+#
+# A struct becomes a dict display, e.g. for RTC.TimedLong
+#   lambda obj: {'tm': {'sec': obj.tm.sec, 'nsec': obj.tm.nsec}, 'data': obj.data}
+# and a dict becomes a call of the struct constructor with the members in
+# declaration order, where missing keys take the default values of
+# OpenRTM_aist.instantiateDataType() and keys not in the data type raise
+# KeyError, as convertDictToDataType() does. Sequences and arrays of octet (bytes)
+# are encoded in base64 text for JSON unless binary is specified. Members of kinds other than struct,
+# sequence, array and basic types (enum, union, ...) are converted by the
+# recursive functions of DataTypeFormat.
+#
+class DataTypeConverterCompiler:
+
+  ##
+  # @brief Constructor
+  # @param formatter DataTypeFormat converting the members of other kinds
+  # @param binary True to keep sequences of octet as bytes
+  #
+  def __init__(self, formatter, binary=False):
+    self._binary = binary
+    self._namespace = {}
+    self._namespace['_toBase64'] = _toBase64
+    self._namespace['_fromBase64'] = _fromBase64
+    self._namespace['_toDictValue'] = formatter.convertValueToDict
+    self._namespace['_toDataTypeValue'] = formatter.convertValueToDataType
+    self._namespace['_copy'] = list
+    self._namespace['_unknownKey'] = _unknownKey
+    self._count = 0
+
+  ##
+  # @brief Compile the converters
+  # @param typecode TypeCode of the data type
+  # @return Tuple of the functions converting DataType object to dict object and back
+  #
+  def compile(self, typecode):
+    todict = self.evaluate("lambda obj: " + self.toDictExpr(typecode, "obj"))
+    fromdict = self._namespace[self.fromDictFunc(typecode)]
+    return todict, fromdict
+
+  ##
+  # @brief Evaluate a generated expression in the namespace of the converters
+  #
+  def evaluate(self, source):
+    return eval(source, self._namespace)
+
+  ##
+  # @brief Define a generated function in the namespace of the converters
+  # @return Name of the function
+  #
+  def define(self, source, name):
+    exec(compile(source, "<converter %s>" % name, "exec"), self._namespace)
+    return name
+
+  ##
+  # @brief Get a new name in the namespace of the converters
+  #
+  def newName(self, prefix):
+    self._count += 1
+    return "%s%d" % (prefix, self._count)
+
+  ##
+  # @brief Register a value in the namespace of the converters
+  # @return Name of the value
+  #
+  def constant(self, val):
+    name = self.newName("_v")
+    self._namespace[name] = val
+    return name
+
+  ##
+  # @brief Resolve aliases (typedef)
+  #
+  @staticmethod
+  def unalias(typecode):
+    while typecode.kind() == CORBA.tk_alias:
+      typecode = typecode.content_type()
+    return typecode
+
+  ##
+  # @brief Generate the expression converting a value to dict object
+  # @param typecode TypeCode of the value
+  # @param expr Expression of the value
+  #
+  def toDictExpr(self, typecode, expr):
+    typecode = self.unalias(typecode)
+    kind = typecode.kind()
+    if kind in PLAIN_KINDS:
+      return expr
+    elif kind == CORBA.tk_struct:
+      members = []
+      for i in range(typecode.member_count()):
+        name = typecode.member_name(i)
+        members.append("%r: %s" % (name, self.toDictExpr(typecode.member_type(i), expr + "." + name)))
+      return "{" + ", ".join(members) + "}"
+    elif kind in (CORBA.tk_sequence, CORBA.tk_array):
+      content = self.unalias(typecode.content_type())
+      if content.kind() == CORBA.tk_octet and not self._binary:
+        return "_toBase64(%s)" % expr
+      if content.kind() in PLAIN_KINDS:
+        return expr
+      func = self.constant(self.evaluate("lambda obj: " + self.toDictExpr(content, "obj")))
+      return "[%s(v) for v in %s]" % (func, expr)
+    else:
+      return "_toDictValue(%s)" % expr
+
+  ##
+  # @brief Generate the function converting dict object to a struct
+  # @param typecode TypeCode of the struct
+  # @return Name of the function
+  #
+  def fromDictFunc(self, typecode):
+    default = OpenRTM_aist.instantiateDataType(omniORB.findType(typecode.id()))
+    cls = self.constant(default.__class__)
+    func = self.newName("_f")
+    known = self.constant(frozenset([typecode.member_name(i) for i in range(typecode.member_count())]))
+    args = []
+    for i in range(typecode.member_count()):
+      name = typecode.member_name(i)
+      args.append(self.fromDictExpr(typecode.member_type(i), name, getattr(default, name)))
+    source = "def %s(d):\n  if not %s.issuperset(d):\n    _unknownKey(d, %s)\n  return %s(%s)\n" % (func, known, known, cls, ", ".join(args))
+    return self.define(source, func)
+
+  ##
+  # @brief Generate the expression converting a member of dict object
+  # @param typecode TypeCode of the member
+  # @param name Member name
+  # @param default Default value of the member
+  #
+  def fromDictExpr(self, typecode, name, default):
+    typecode = self.unalias(typecode)
+    kind = typecode.kind()
+    key = "%r" % name
+    if kind == CORBA.tk_struct:
+      func = self.fromDictFunc(typecode)
+      return "%s(d[%s]) if %s in d else %s({})" % (func, key, key, func)
+    elif kind in (CORBA.tk_sequence, CORBA.tk_array):
+      content = self.unalias(typecode.content_type())
+      dflt = self.constant(default)
+      if isinstance(default, list):
+        dflt = "_copy(%s)" % dflt
+      if content.kind() == CORBA.tk_struct:
+        func = self.fromDictFunc(content)
+        return "[%s(v) for v in d[%s]] if %s in d else %s" % (func, key, key, dflt)
+      elif content.kind() == CORBA.tk_string:
+        # JSON strings are unicode
+        return "[str(v) for v in d[%s]] if %s in d else %s" % (key, key, dflt)
+      elif content.kind() == CORBA.tk_octet and not self._binary:
+        return "_fromBase64(d[%s]) if %s in d else %s" % (key, key, dflt)
+      return "d[%s] if %s in d else %s" % (key, key, dflt)
+    elif kind == CORBA.tk_string:
+      return "str(d[%s]) if %s in d else %s" % (key, key, self.constant(default))
+    elif kind in PLAIN_KINDS:
+      return "d[%s] if %s in d else %s" % (key, key, self.constant(default))
+    else:
+      dflt = self.constant(default)
+      return "_toDataTypeValue(d[%s], %s) if %s in d else %s" % (key, dflt, key, dflt)
+
+if __name__ == '__main__':
+
+    import time
+
+    ##
+    # @brief Average time of a conversion in microseconds and its result, or None if it fails
+    #
+    def measure(func, count=10000):
+      try:
+        start = time.time()
+        for i in range(count):
+          result = func()
+        return (time.time() - start) / count * 1e6, result
+      except Exception:
+        return None, None
+
+    # Keys not in the data type are rejected as by convertDictToDataType(),
+    # and missing members take the default values, by the writer, the
+    # compiled converter and MessagePack
+    formatter = DataTypeFormat(OpenRTM_aist.instantiateDataType(RTC.TimedLong), True)
+    paths = [("writer", lambda d: formatter.reserializeFromJsonToCdr(json.dumps({"RTC.TimedLong": d}))),
+             ("converter", lambda d: cdrMarshal(formatter._typecode, formatter._fromDict(d), True))]
+    if msgpack:
+      paths.append(("msgpack", lambda d: formatter.reserializeFromMsgpackToCdr(msgpack.packb({"RTC.TimedLong": d}, use_bin_type=True))))
+    for path, func in paths:
+      for dictobj in ({"tm": {"sec": 1, "nsec": 2}, "data": 3, "unknown": 4}, {"tm": {"sec": 1, "unknown": 2}, "data": 3}):
+        try:
+          func(dictobj)
+          raise AssertionError("%s accepted %r" % (path, dictobj))
+        except KeyError:
+          pass
+      for dictobj in ({"data": 3}, {"tm": {"nsec": 2}}, {}):
+        expected = cdrMarshal(formatter._typecode, formatter.convertDictToDataType(dictobj, RTC.TimedLong), True)
+        assert func(dictobj) == expected, "%s %r" % (path, dictobj)
+      print("key check by %s: OK" % path)
+    print("")
+
+    # Compiled converters against the recursive ones for all struct types in
+    # RTC module (BasicDataTypes, ExtendedDataTypes and the others loaded)
+    print("%-36s %10s %10s %10s %10s %10s %10s %s" % ("type", "c2j old", "c2j new", "c2j direct", "j2c old", "j2c new", "j2c direct", "same"))
+    for name in sorted(dir(RTC)):
+      desc = omniORB.findType(getattr(getattr(RTC, name), '_NP_RepositoryId', None))
+      if not desc or desc[0] != omniORB.tcInternal.tv_struct:
+        continue
+      try:
+        datatype = OpenRTM_aist.instantiateDataType(getattr(RTC, name))
+        formatter = DataTypeFormat(datatype, True)
+        cdrdata = cdrMarshal(any.to_any(datatype).typecode(), datatype, True)
+      except Exception:
+        continue
+
+      c2jold, oldjson = measure(lambda: json.dumps({formatter._TYPE_NAME: formatter.convertDataTypeToDict(cdrUnmarshal(any.to_any(datatype).typecode(), cdrdata, True))}))
+      c2jnew, newjson = measure(lambda: json.dumps({formatter._TYPE_NAME: formatter._toDict(cdrUnmarshal(formatter._typecode, cdrdata, True))}))
+      if newjson is None:
+        continue
+      c2jdirect, directjson = None, newjson
+      if formatter._transcoder is not None:
+        c2jdirect, directjson = measure(lambda: formatter._transcoder(cdrdata))
+      j2cold, oldcdr = measure(lambda: cdrMarshal(any.to_any(datatype).typecode(), formatter.convertDictToDataType(json.loads(newjson)[formatter._TYPE_NAME], eval(formatter._TYPE_NAME)), True))
+      j2cnew, newcdr = measure(lambda: cdrMarshal(formatter._typecode, formatter._fromDict(json.loads(newjson)[formatter._TYPE_NAME]), True))
+      j2cdirect, directcdr = None, newcdr
+      if formatter._writer is not None:
+        j2cdirect, directcdr = measure(lambda: formatter._writer(json.loads(newjson)[formatter._TYPE_NAME]))
+
+      if c2jold is None or j2cold is None:
+        # The recursive converters do not support the type
+        same = "old unsupported, new round trip " + ("OK" if newcdr == cdrdata else "unsupported")
+      else:
+        same = str(oldjson == newjson and oldcdr == newcdr)
+      same += ", direct " + str(directjson == newjson and directcdr == newcdr)
+      times = ["%8.1fus" % t if t is not None else "%10s" % "-" for t in (c2jold, c2jnew, c2jdirect, j2cold, j2cnew, j2cdirect)]
+      print("%-36s %s %s" % (formatter._TYPE_NAME, " ".join(times), same))
+
+    # Sequences of the size of a LiDAR scan
+    print("")
+    print("%-36s %10s %10s %10s %10s %s" % ("10000 elements", "c2j new", "c2j direct", "j2c new", "j2c direct", "same"))
+    for name, data in (("TimedDoubleSeq", [0.125] * 10000), ("TimedFloatSeq", [0.5] * 10000), ("TimedLongSeq", [12345] * 10000),
+                       ("TimedShortSeq", [-123] * 10000), ("TimedOctetSeq", bytes(bytearray(range(250))) * 40)):
+      if not hasattr(RTC, name):
+        continue
+      datatype = OpenRTM_aist.instantiateDataType(getattr(RTC, name))
+      datatype.data = data
+      formatter = DataTypeFormat(datatype, True)
+      cdrdata = cdrMarshal(formatter._typecode, datatype, True)
+      c2jnew, newjson = measure(lambda: json.dumps({formatter._TYPE_NAME: formatter._toDict(cdrUnmarshal(formatter._typecode, cdrdata, True))}), 100)
+      c2jdirect, directjson = measure(lambda: formatter.reserializeFromCdrToJson(cdrdata), 100)
+      j2cnew, newcdr = measure(lambda: cdrMarshal(formatter._typecode, formatter._fromDict(json.loads(newjson)[formatter._TYPE_NAME]), True), 100)
+      j2cdirect, directcdr = measure(lambda: formatter.reserializeFromJsonToCdr(newjson), 100)
+      times = ["%8.1fus" % t if t is not None else "%10s" % "-" for t in (c2jnew, c2jdirect, j2cnew, j2cdirect)]
+      print("%-36s %s %s" % (formatter._TYPE_NAME, " ".join(times), str(directjson == newjson and directcdr == newcdr)))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: euc-jp -*-
+
+##
+# @file  DataTypeFormatPool.py
+# @brief DataTypeFormatPool class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+from omniORB import *
+import collections
+import multiprocessing
+import threading
+import OpenRTM_aist
+import RTC
+from OpenRTM_aist_paho_mqtt_module.reserializer.DataTypeFormat import DataTypeFormat
+
+# DataTypeFormat of a worker process
+_formatter = None
+
+##
+# @brief Initialize a worker process
+#
+def _initialize(typename, endian, backend):
+  global _formatter
+  _formatter = DataTypeFormat(OpenRTM_aist.instantiateDataType(eval(typename)), endian, backend)
+
+##
+# @brief Reserialize from JSON to CDR in a worker process
+#
+def _reserializeFromJsonToCdr(jsontext):
+  return _formatter.reserializeFromJsonToCdr(jsontext)
+
+##
+# @class DataTypeFormatPool
+# @brief Reserialize from JSON to CDR in worker processes
+#
+# JSON decoding is pure Python and holds the GIL, so one high rate topic
+# saturates a single core. The messages are reserialized by a pool of
+# worker processes, and the CDR data is passed to the call back function
+# in the original order by a collector thread. At most 'window' messages
+# are being reserialized at once; submit() waits for a free slot.
+#
+class DataTypeFormatPool:
+
+  ##
+  # @brief Constructor
+  # @param datatype DataType object
+  # @param endian True for little endian, False for big endian
+  # @param procs Number of worker processes
+  # @param window Maximum number of messages being reserialized at once
+  # @param callback Function called with the CDR data, or None if reserializing failed
+  # @param backend Name of the JSON backend, or "auto"
+  #
+  def __init__(self, datatype, endian, procs, window, callback, backend="auto"):
+    typename = 'RTC.' + any.to_any(datatype).typecode().name()
+    try:
+      # Worker processes must not inherit the threads of ORB by fork
+      context = multiprocessing.get_context("spawn")
+    except AttributeError:
+      context = multiprocessing
+    self._pool = context.Pool(procs, _initialize, (typename, endian, backend))
+    self._callback = callback
+    self._results = collections.deque()
+    self._slots = threading.Semaphore(window)
+    self._cond = threading.Condition(threading.Lock())
+    self._running = True
+    self._thread = threading.Thread(target=self._collect)
+    self._thread.daemon = True
+    self._thread.start()
+
+  ##
+  # @brief Start reserializing a JSON message
+  # @param jsontext JSON text
+  #
+  def submit(self, jsontext):
+    self._slots.acquire()
+    with self._cond:
+      if not self._running:
+        self._slots.release()
+        return
+      self._results.append(self._pool.apply_async(_reserializeFromJsonToCdr, (jsontext,)))
+      self._cond.notify()
+
+  ##
+  # @brief Pass the submitted messages to the call back function and stop the worker processes
+  #
+  def stop(self):
+    with self._cond:
+      self._running = False
+      self._cond.notify()
+    self._thread.join()
+    self._pool.terminate()
+
+  ##
+  # @brief Collector thread passing the results in the submitted order
+  #
+  def _collect(self):
+    while True:
+      with self._cond:
+        while not self._results and self._running:
+          self._cond.wait()
+        if not self._results:
+          return
+        result = self._results.popleft()
+      try:
+        cdrdata = result.get()
+      except Exception as e:
+        print("Exception in JSON decoding process: " + str(e))
+        cdrdata = None
+      self._slots.release()
+      self._callback(cdrdata)
@@ -1 +1,5 @@
 import OpenRTM_aist_paho_mqtt_module.reserializer.DataTypeFormat
+import OpenRTM_aist_paho_mqtt_module.reserializer.DataTypeFormatPool
+import OpenRTM_aist_paho_mqtt_module.reserializer.CdrJsonTranscoder
+import OpenRTM_aist_paho_mqtt_module.reserializer.JsonCdrWriter
+import OpenRTM_aist_paho_mqtt_module.reserializer.JsonBackend
@@ -0,0 +1,759 @@
+#!/usr/bin/env python3
+# -*- coding: euc-jp -*-
+
+##
+# @file   InPortPahoSubMsgpack.py
+# @brief  InPortPahoSubMsgpack class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+# Based on InPortPahoSubJson.py, Copyright (C) 2020
+#     Daishi Yoshino
+#     Revitalization Center
+#     University of Aizu, Japan
+# Originally under LGPL in OpenRTM-aist, http://www.openrtm.org/
+#
+
+from omniORB import any
+import OpenRTM_aist
+import OpenRTM__POA,OpenRTM
+import RTC
+import time
+import sys
+try:
+  import msgpack
+except ImportError:
+  msgpack = None
+import paho.mqtt.client as mqtt
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoSubscriber import PahoSubscriber
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoCompressor import PahoCompressor
+from OpenRTM_aist_paho_mqtt_module.reserializer.DataTypeFormat import DataTypeFormat
+from OpenRTM_aist.ManagerActionListener import ManagerActionListener
+
+##
+# @class InPortPahoSubMsgpack
+# @brief InPortPahoSubMsgpack class
+#
+class InPortPahoSubMsgpack(OpenRTM_aist.InPortProvider, PahoSubscriber):
+    
+  """
+  """
+
+  ##
+  # @brief Constructor
+  #
+  def __init__(self):
+    OpenRTM_aist.InPortProvider.__init__(self)
+    PahoSubscriber.__init__(self)
+
+    self.setInterfaceType("mqtt_msgpack")
+    
+    self._buffer = None
+    self._profile = None
+    self._listeners = None
+    self._bufferReadListener = None
+
+    callback = self.on_message
+    PahoSubscriber.set_on_message(self, callback)
+
+    self._mgr = OpenRTM_aist.Manager.instance()
+    self._mgr.addManagerActionListener(ManagerActionListener(self))
+
+    return
+
+  ##
+  # @brief Destructor
+  #
+  def __del__(self):
+    PahoSubscriber.__del__(self)
+    return
+
+  ##
+  # @brief Exit
+  #
+  def exit(self):
+    if self._bufferReadListener is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_READ].removeListener(self._bufferReadListener)
+      self._bufferReadListener = None
+    oid = OpenRTM_aist.Manager.instance().getPOA().servant_to_id(self)
+    OpenRTM_aist.Manager.instance().getPOA().deactivate_object(oid)
+
+  ##
+  # @brief Initializing configuration
+  #
+  def init(self, prop):
+    pass
+
+  ##
+  # @brief Set buffer
+  #
+  def setBuffer(self, buffer):
+    self._buffer = buffer
+    return
+
+  ##
+  # @brief Set listener
+  #
+  def setListener(self, info, listeners):
+    self._profile = info
+    self._listeners = listeners
+    # Wake up the writes waiting with flow control when the buffer is read
+    if listeners is not None and PahoSubscriber.paho_flow_control_enabled(self) and self._bufferReadListener is None:
+      self._bufferReadListener = BufferReadListener(self)
+      listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_READ].addListener(self._bufferReadListener, True)
+    return
+
+  ##
+  # @brief Call back function when received MQTT message
+  #
+  def on_message(self, mqttc, obj, msg):
+    try:
+      self._rtcout.RTC_PARANOID("InPortPahoSubMsgpack.on_message()")
+      data = PahoSubscriber.paho_reassemble(self, msg)
+      if data is None:
+        return OpenRTM.PORT_OK
+      data = PahoCompressor.decompress(data)
+      if data is None:
+        self._rtcout.RTC_WARN("Broken compressed message was dropped.")
+        return OpenRTM.PORT_ERROR
+
+      cdrmsg = self.__formatter.reserializeFromMsgpackToCdr(data)
+
+      return self.put(cdrmsg)
+
+    except:
+      self._rtcout.RTC_TRACE(OpenRTM_aist.Logger.print_exception())
+      return OpenRTM.UNKNOWN_ERROR
+
+  ##
+  # @brief Write reserialized data to the buffer
+  #
+  def put(self, cdrmsg):
+    try:
+      self._rtcout.RTC_PARANOID("InPortPahoSubMsgpack.put()")
+
+      if cdrmsg is None:
+        return OpenRTM.UNKNOWN_ERROR
+
+      if not self._buffer:
+        self.onReceiverError(cdrmsg)
+        return OpenRTM.PORT_ERROR
+
+      self._rtcout.RTC_PARANOID("received data size: %d", len(cdrmsg))
+
+      self.onReceived(cdrmsg)
+
+      if not self._connector:
+        return OpenRTM.PORT_ERROR
+
+      # With flow control, wait for a read of the buffer instead of dropping the data
+      flow = PahoSubscriber.paho_flow_begin(self)
+      ret = self._connector.write(cdrmsg)
+      while (ret == OpenRTM_aist.BufferStatus.BUFFER_FULL or ret == OpenRTM_aist.BufferStatus.TIMEOUT) and PahoSubscriber.paho_flow_wait(self, flow):
+        ret = self._connector.write(cdrmsg)
+
+      return self.convertReturn(ret, cdrmsg)
+
+    except:
+      self._rtcout.RTC_TRACE(OpenRTM_aist.Logger.print_exception())
+      return OpenRTM.UNKNOWN_ERROR
+
+  ##
+  # @brief Return codes conversion
+  #
+  def convertReturn(self, status, data):
+    if status == OpenRTM_aist.BufferStatus.BUFFER_OK:
+      self.onBufferWrite(data)
+      return OpenRTM.PORT_OK
+            
+    elif status == OpenRTM_aist.BufferStatus.BUFFER_ERROR:
+      self.onReceiverError(data)
+      return OpenRTM.PORT_ERROR
+
+    elif status == OpenRTM_aist.BufferStatus.BUFFER_FULL:
+      self.onBufferFull(data)
+      self.onReceiverFull(data)
+      return OpenRTM.BUFFER_FULL
+
+    elif status == OpenRTM_aist.BufferStatus.BUFFER_EMPTY:
+      return OpenRTM.BUFFER_EMPTY
+
+    elif status == OpenRTM_aist.BufferStatus.PRECONDITION_NOT_MET:
+      self.onReceiverError(data)
+      return OpenRTM.PORT_ERROR
+
+    elif status == OpenRTM_aist.BufferStatus.TIMEOUT:
+      self.onBufferWriteTimeout(data)
+      self.onReceiverTimeout(data)
+      return OpenRTM.BUFFER_TIMEOUT
+
+    else:
+      self.onReceiverError(data)
+      return OpenRTM.UNKNOWN_ERROR
+
+  ##
+  # @brief Publish Interface information
+  #
+  def publishInterface(self, properties):
+    self._rtcout.RTC_TRACE("publishInterace()")
+
+    if self.subscribePahoSubMsgpack(properties):
+      return True
+
+    return False
+
+  ##
+  # @brief Find index of the properties
+  #
+  # acceptable properties:
+  #     {<key>, dataport.<key>, dataport.inport.<key>}
+  #
+  def findProp(self, properties, key):
+    index = OpenRTM_aist.NVUtil.find_index(properties, key)
+    if index >= 0: return index
+    index = OpenRTM_aist.NVUtil.find_index(properties, 'dataport.' + key)
+    if index >= 0: return index
+    index = OpenRTM_aist.NVUtil.find_index(properties, 'dataport.inport.' + key)
+    if index >= 0: return index
+    return -1
+
+  ##
+  # @brief Set properties relating to Paho Client
+  #
+  def subscribePahoSubMsgpack(self, properties):
+    self._rtcout.RTC_TRACE("subscribePahoSubMsgpack()")
+
+    PN_HOST = "host"
+    PN_PORT = "msport"
+    PN_KPALV = "kpalv"
+    PN_TOPIC = "topic"
+    PN_QOS = "qos"
+    PN_ID = "id"
+    PN_CS = "cs"
+    PN_LOOP = "loop"
+    PN_ASYNC = "async"
+    PN_WORKERS = "workers"
+    PN_RINGSZ = "ring_size"
+    PN_FRAGTO = "frag_timeout"
+    PN_FRAGMEM = "frag_mem"
+    PN_PROTOCOL = "protocol"
+    PN_SHARE = "share_group"
+    PN_FLOW = "flow_control"
+    PN_BUFLEN = "buffer.length"
+    PN_POOL = "pool"
+    PN_DEDUP = "dedup"
+    PN_DEDUPWIN = "dedup_window"
+
+    index0 = self.findProp(properties, PN_HOST)
+    index1 = self.findProp(properties, PN_PORT)
+    index2 = self.findProp(properties, PN_KPALV)
+    index3 = self.findProp(properties, PN_TOPIC)
+    index4 = self.findProp(properties, PN_QOS)
+    index5 = self.findProp(properties, PN_ID)
+    index6 = self.findProp(properties, PN_CS)
+    index7 = self.findProp(properties, PN_LOOP)
+    index8 = self.findProp(properties, PN_ASYNC)
+    index9 = self.findProp(properties, PN_WORKERS)
+    indexA = self.findProp(properties, PN_RINGSZ)
+    indexB = self.findProp(properties, PN_FRAGTO)
+    indexC = self.findProp(properties, PN_FRAGMEM)
+    indexD = self.findProp(properties, PN_PROTOCOL)
+    indexE = self.findProp(properties, PN_SHARE)
+    indexF = self.findProp(properties, PN_FLOW)
+    indexG = self.findProp(properties, PN_BUFLEN)
+    indexH = self.findProp(properties, PN_POOL)
+    indexI = self.findProp(properties, PN_DEDUP)
+    indexJ = self.findProp(properties, PN_DEDUPWIN)
+
+    tmp_host = "localhost"
+    tmp_port = 1883
+    tmp_kpalv = 60
+    tmp_topic = "test"
+    tmp_qos = 0
+    tmp_id = ""
+    tmp_cs = True
+    tmp_loop = "thread"
+    tmp_async = False
+    tmp_workers = 0
+    tmp_ringsz = 1000
+    tmp_fragto = 10.0
+    tmp_fragmem = 67108864
+    tmp_protocol = "311"
+    tmp_share = ""
+    tmp_flow = False
+    tmp_buflen = 8
+    tmp_pool = False
+    tmp_dedup = False
+    tmp_dedupwin = 1024
+
+    if index0 < 0:
+      print("Server address not found. Default server address '" + tmp_host + "' is used.")
+    else:
+      try:
+        tmp_host = any.from_any(properties[index0].value, keep_structs=True)
+        if not tmp_host:
+          self._rtcout.RTC_ERROR("Server address has no string.")
+          return False
+        print("Server address: " + tmp_host)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index1 < 0:
+      print("Port number not found. Default port '" + str(tmp_port) + "' is used.")
+    else:
+      try:
+        str_port = any.from_any(properties[index1].value, keep_structs=True)
+        if not str_port:
+          self._rtcout.RTC_ERROR("Port number has no string.")
+          return False
+        tmp_port = int(str_port)
+        if tmp_port < 0 or tmp_port > 65535:
+          tmp_port = 1883
+        print("Port: " + str(tmp_port))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index2 < 0:
+      print("Keepalive not found. Default keepalve '" + str(tmp_kpalv) + "' is used.")
+    else:
+      try:
+        str_kpalv = any.from_any(properties[index2].value, keep_structs=True)
+        if not str_kpalv:
+          self._rtcout.RTC_ERROR("Keepalive has no string.")
+          return False
+        tmp_kpalv = int(str_kpalv)
+        if tmp_kpalv < 0 or tmp_kpalv > 86400:
+          tmp_kpalv = 60
+        print("keepalive: " + str(tmp_kpalv))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index3 < 0:
+      print("Topic not found. Default Topic '" + tmp_topic + "' is used.")
+    else:
+      try:
+        tmp_topic = any.from_any(properties[index3].value, keep_structs=True)
+        if not tmp_topic:
+          self._rtcout.RTC_ERROR("Topic has no string.")
+          return False
+        print("Topic: " + tmp_topic)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index4 < 0:
+      print("QoS not found. Default QoS '" + str(tmp_qos) + "' is used.")
+    else:
+      try:
+        str_qos = any.from_any(properties[index4].value, keep_structs=True)
+        if not str_qos:
+          self._rtcout.RTC_ERROR("QoS has no string.")
+          return False
+        tmp_qos = int(str_qos)
+        if tmp_qos < 0 or tmp_qos > 2:
+          tmp_qos = 0
+        print("QoS: " + str(tmp_qos))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index5 < 0:
+      print("Client ID not found. Random number ID is used.")
+    else:
+      try:
+        tmp_id = any.from_any(properties[index5].value, keep_structs=True)
+        if not tmp_id:
+          tmp_id = ""
+          print("Client ID has no string. Random number ID is used.")
+        else:
+          print("Client ID: " + tmp_id)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index6 < 0:
+      print("CleanSession not found. Default clean_session '" + str(tmp_cs) + "' is used.")
+    else:
+      try:
+        str_cs = any.from_any(properties[index6].value, keep_structs=True)
+        if not str_cs:
+          self._rtcout.RTC_ERROR("Clean session has no string.")
+          return False
+        if str_cs == "False" or str_cs == "false" or str_cs == "FALSE" or str_cs == "f" or str_cs == "F" or str_cs == "0":
+          tmp_cs = False
+        print("Clean session: " + str(tmp_cs))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index7 < 0:
+      print("NetworkLoop not found. Default network_loop '" + tmp_loop + "' is used.")
+    else:
+      try:
+        tmp_loop = any.from_any(properties[index7].value, keep_structs=True)
+        if not tmp_loop:
+          self._rtcout.RTC_ERROR("NetworkLoop has no string.")
+          return False
+        if not tmp_loop in ("thread", "shared"):
+          tmp_loop = "thread"
+        print("network_loop: " + tmp_loop)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index8 < 0:
+      print("AsyncConnect not found. Default async_connect '" + str(tmp_async) + "' is used.")
+    else:
+      try:
+        str_async = any.from_any(properties[index8].value, keep_structs=True)
+        if not str_async:
+          self._rtcout.RTC_ERROR("AsyncConnect has no string.")
+          return False
+        if str_async == "True" or str_async == "true" or str_async == "TRUE" or str_async == "t" or str_async == "T" or str_async == "1":
+          tmp_async = True
+        print("async_connect: " + str(tmp_async))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if index9 < 0:
+      print("Workers not found. Default workers '" + str(tmp_workers) + "' is used.")
+    else:
+      try:
+        str_workers = any.from_any(properties[index9].value, keep_structs=True)
+        if not str_workers:
+          self._rtcout.RTC_ERROR("Workers has no string.")
+          return False
+        tmp_workers = int(str_workers)
+        if tmp_workers < 0 or tmp_workers > 64:
+          tmp_workers = 0
+        print("workers: " + str(tmp_workers))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexA < 0:
+      print("RingSize not found. Default ring_size '" + str(tmp_ringsz) + "' is used.")
+    else:
+      try:
+        str_ringsz = any.from_any(properties[indexA].value, keep_structs=True)
+        if not str_ringsz:
+          self._rtcout.RTC_ERROR("RingSize has no string.")
+          return False
+        tmp_ringsz = int(str_ringsz)
+        if tmp_ringsz < 1 or tmp_ringsz > 1000000:
+          tmp_ringsz = 1000
+        print("ring_size: " + str(tmp_ringsz))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if msgpack is None:
+      self._rtcout.RTC_ERROR("msgpack is not installed.")
+      return False
+
+    if indexB < 0:
+      print("FragmentTimeout not found. Default frag_timeout '" + str(tmp_fragto) + "' is used.")
+    else:
+      try:
+        str_fragto = any.from_any(properties[indexB].value, keep_structs=True)
+        if not str_fragto:
+          self._rtcout.RTC_ERROR("FragmentTimeout has no string.")
+          return False
+        tmp_fragto = float(str_fragto)
+        if tmp_fragto < 0.0 or tmp_fragto > 3600.0:
+          tmp_fragto = 10.0
+        print("frag_timeout: " + str(tmp_fragto))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexC < 0:
+      print("FragmentMemory not found. Default frag_mem '" + str(tmp_fragmem) + "' is used.")
+    else:
+      try:
+        str_fragmem = any.from_any(properties[indexC].value, keep_structs=True)
+        if not str_fragmem:
+          self._rtcout.RTC_ERROR("FragmentMemory has no string.")
+          return False
+        tmp_fragmem = int(str_fragmem)
+        if tmp_fragmem < 0 or tmp_fragmem > 4294967295:
+          tmp_fragmem = 67108864
+        print("frag_mem: " + str(tmp_fragmem))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexD < 0:
+      print("Protocol not found. Default protocol '" + tmp_protocol + "' is used.")
+    else:
+      try:
+        tmp_protocol = any.from_any(properties[indexD].value, keep_structs=True)
+        if not tmp_protocol:
+          self._rtcout.RTC_ERROR("Protocol has no string.")
+          return False
+        if not tmp_protocol in ("311", "5"):
+          tmp_protocol = "311"
+        print("protocol: " + tmp_protocol)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexE < 0:
+      print("ShareGroup not found. Shared subscription is not used.")
+    else:
+      try:
+        tmp_share = any.from_any(properties[indexE].value, keep_structs=True)
+        if not tmp_share:
+          tmp_share = ""
+          print("ShareGroup has no string. Shared subscription is not used.")
+        else:
+          print("share_group: " + tmp_share)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexF < 0:
+      print("FlowControl not found. Default flow_control '" + str(tmp_flow) + "' is used.")
+    else:
+      try:
+        str_flow = any.from_any(properties[indexF].value, keep_structs=True)
+        if not str_flow:
+          self._rtcout.RTC_ERROR("FlowControl has no string.")
+          return False
+        if str_flow == "True" or str_flow == "true" or str_flow == "TRUE" or str_flow == "t" or str_flow == "T" or str_flow == "1":
+          tmp_flow = True
+        print("flow_control: " + str(tmp_flow))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexG >= 0:
+      try:
+        str_buflen = any.from_any(properties[indexG].value, keep_structs=True)
+        if not str_buflen:
+          self._rtcout.RTC_ERROR("BufferLength has no string.")
+          return False
+        tmp_buflen = int(str_buflen)
+        if tmp_buflen < 1:
+          tmp_buflen = 8
+        print("buffer_length: " + str(tmp_buflen))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexH < 0:
+      print("ClientPool not found. Default client_pool '" + str(tmp_pool) + "' is used.")
+    else:
+      try:
+        str_pool = any.from_any(properties[indexH].value, keep_structs=True)
+        if not str_pool:
+          self._rtcout.RTC_ERROR("ClientPool has no string.")
+          return False
+        if str_pool == "True" or str_pool == "true" or str_pool == "TRUE" or str_pool == "t" or str_pool == "T" or str_pool == "1":
+          tmp_pool = True
+        print("client_pool: " + str(tmp_pool))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexI < 0:
+      print("Deduplication not found. Default dedup '" + str(tmp_dedup) + "' is used.")
+    else:
+      try:
+        str_dedup = any.from_any(properties[indexI].value, keep_structs=True)
+        if not str_dedup:
+          self._rtcout.RTC_ERROR("Deduplication has no string.")
+          return False
+        if str_dedup == "True" or str_dedup == "true" or str_dedup == "TRUE" or str_dedup == "t" or str_dedup == "T" or str_dedup == "1":
+          tmp_dedup = True
+        print("dedup: " + str(tmp_dedup))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    if indexJ < 0:
+      print("DedupWindow not found. Default dedup_window '" + str(tmp_dedupwin) + "' is used.")
+    else:
+      try:
+        str_dedupwin = any.from_any(properties[indexJ].value, keep_structs=True)
+        if not str_dedupwin:
+          self._rtcout.RTC_ERROR("DedupWindow has no string.")
+          return False
+        tmp_dedupwin = int(str_dedupwin)
+        if tmp_dedupwin < 1 or tmp_dedupwin > 65536:
+          tmp_dedupwin = 1024
+        print("dedup_window: " + str(tmp_dedupwin))
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    self.generateDataTypeInfo(properties)
+
+    if self.__datatype and self.__endian:
+      self.__formatter = DataTypeFormat(self.__datatype, self.__endian)
+    else:
+      self._rtcout.RTC_ERROR("DataType or Endian is unknown.")
+      return False
+
+    print("[connecting to MQTT broker start]")
+    PahoSubscriber.paho_protocol_set(self, mqtt.MQTTv5 if tmp_protocol == "5" else mqtt.MQTTv311)
+    PahoSubscriber.paho_initialize(self, tmp_id, tmp_cs, tmp_topic, tmp_qos)
+    PahoSubscriber.paho_share_set(self, tmp_share)
+    PahoSubscriber.paho_shared_loop_set(self, tmp_loop == "shared")
+    PahoSubscriber.paho_async_set(self, tmp_async)
+    PahoSubscriber.paho_dispatch_set(self, tmp_workers, tmp_ringsz)
+    PahoSubscriber.paho_reassembly_set(self, tmp_fragto, tmp_fragmem)
+    PahoSubscriber.paho_flow_control_set(self, tmp_buflen if tmp_flow else 0)
+    PahoSubscriber.paho_pool_set(self, tmp_pool)
+    PahoSubscriber.paho_dedup_set(self, tmp_dedup, tmp_dedupwin)
+    PahoSubscriber.paho_connect(self, tmp_host, tmp_port, tmp_kpalv)
+    print("[connecting to MQTT broker end]")
+
+    return True
+
+  ##
+  # @brief Connector data listener functions
+  #
+  def onBufferWrite(self, data):
+    if self._listeners is not None and self._profile is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_WRITE].notify(self._profile, data)
+    return
+
+  def onBufferFull(self, data):
+    if self._listeners is not None and self._profile is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_FULL].notify(self._profile, data)
+    return
+
+  def onBufferWriteTimeout(self, data):
+    if self._listeners is not None and self._profile is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_WRITE_TIMEOUT].notify(self._profile, data)
+    return
+
+  def onBufferWriteOverwrite(self, data):
+    if self._listeners is not None and self._profile is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_BUFFER_OVERWRITE].notify(self._profile, data)
+    return
+
+  def onReceived(self, data):
+    if self._listeners is not None and self._profile is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_RECEIVED].notify(self._profile, data)
+    return
+
+  def onReceiverFull(self, data):
+    if self._listeners is not None and self._profile is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_RECEIVER_FULL].notify(self._profile, data)
+    return
+
+  def onReceiverTimeout(self, data):
+    if self._listeners is not None and self._profile is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_RECEIVER_TIMEOUT].notify(self._profile, data)
+    return
+
+  def onReceiverError(self, data):
+    if self._listeners is not None and self._profile is not None:
+      self._listeners.connectorData_[OpenRTM_aist.ConnectorDataListenerType.ON_RECEIVER_ERROR].notify(self._profile, data)
+    return
+
+  ##
+  # @brief Generate information about datatype and endian
+  #
+  def generateDataTypeInfo(self, properties):
+    PN_DATA_TYPE = "dataport.data_type"
+    PN_ENDIAN = "dataport.serializer.cdr.endian"
+
+    DELIMITER1 = "RTC/"
+    DELIMITER2 = ":"
+    PREFIX = "RTC."
+
+    tmp_datatype = None
+    tmp_endian = None
+
+    indexDT = OpenRTM_aist.NVUtil.find_index(properties, PN_DATA_TYPE)
+    if indexDT < 0:
+      print("  Can not find DataType.")
+      self._rtcout.RTC_ERROR("DataType is not set.")
+      return False
+    else:
+      try:
+        tmp_datatype = any.from_any(properties[indexDT].value, keep_structs=True)
+        if not tmp_datatype:
+          self._rtcout.RTC_ERROR("DataType has no string.")
+          return False
+        print("  DataType: " + tmp_datatype)
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    indexED = OpenRTM_aist.NVUtil.find_index(properties, PN_ENDIAN)
+    if indexED < 0:
+      print("  Can not find Endian.")
+      self._rtcout.RTC_ERROR("Endian is not set.")
+      return False
+    else:
+      try:
+        tmp_endian = any.from_any(properties[indexED].value, keep_structs=True)
+        if not tmp_endian:
+          self._rtcout.RTC_ERROR("Endian has no string.")
+          return False
+        #print("  Endian: " + tmp_endian)
+        tmp_endian = OpenRTM_aist.split(tmp_endian, ",")
+        tmp_endian = OpenRTM_aist.normalize(tmp_endian)
+        print("  Normalized endian: " + tmp_endian)
+        if tmp_endian == "little":
+          self.__endian = True
+        elif tmp_endian == "big":
+          self.__endian = False
+        else:
+          self.__endian = None
+      except:
+        self._rtcout.RTC_ERROR(OpenRTM_aist.Logger.print_exception())
+
+    check1 = tmp_datatype.find(DELIMITER1)
+    check2 = tmp_datatype.rfind(DELIMITER2)
+    if check1 >= 0 and check2 >= 0:
+      tmp_datatype = tmp_datatype[check1+len(DELIMITER1):check2]
+    tmp_datatype = PREFIX + tmp_datatype
+    self.__datatype = OpenRTM_aist.instantiateDataType(eval(tmp_datatype))
+
+##
+# @class BufferReadListener
+# @brief Wake up the writes waiting for the full buffer with flow control
+#
+class BufferReadListener(OpenRTM_aist.ConnectorDataListener):
+  def __init__(self, InPortPahoSubMsgpack):
+    self._InPortPahoSubMsgpack = InPortPahoSubMsgpack
+
+  ##
+  # @brief Notify a read of the buffer, ignoring the buffers of the other connectors of the port
+  #
+  def __call__(self, info, cdrdata):
+    if info.id == self._InPortPahoSubMsgpack._profile.id:
+      PahoSubscriber.paho_flow_notify(self._InPortPahoSubMsgpack)
+    return OpenRTM_aist.ConnectorListenerStatus.NO_CHANGE, cdrdata
+
+##
+# @class ManagerActionListener
+# @brief ManagerActionListener class
+#
+class ManagerActionListener(ManagerActionListener):
+  def __init__(self, InPortPahoSubMsgpack):
+    self._InPortPahoSubMsgpack = InPortPahoSubMsgpack
+
+  def preShutdown(self):
+    pass
+
+  ##
+  # @brief Clean up mqtt communication module instance when RTC exit
+  #
+  def postShutdown(self):
+    print("[disconnecting from MQTT broker start]")
+    self._InPortPahoSubMsgpack.paho_disconnect()
+    print("[disconnecting from MQTT broker end]")
+
+  def preReinit(self):
+    pass
+
+  def postReinit(self):
+    pass
+
+##
+# @brief Initialize InPortPahoSubMsgpack module
+#
+def InPortPahoSubMsgpackInit(self):
+  factory = OpenRTM_aist.InPortProviderFactory.instance()
+  factory.addFactory("mqtt_msgpack",
+                     InPortPahoSubMsgpack,
+                     OpenRTM_aist.Delete)
+
+##
+# @brief Register InPortPahoSubMsgpack module
+#
+def registerModule():
+  print("[Paho Subscriber initialization start]")
+  InPortPahoSubMsgpackInit()
+  print("[Paho Subscriber initialization end]")
@@ -6,5 +6,9 @@ import OpenRTM_aist_paho_mqtt_module.OutPortPahoPubJson
 import OpenRTM_aist_paho_mqtt_module.InPortPahoSubJson
 import OpenRTM_aist_paho_mqtt_module.OutPortPahoPubJsonSecure
 import OpenRTM_aist_paho_mqtt_module.InPortPahoSubJsonSecure
+import OpenRTM_aist_paho_mqtt_module.OutPortPahoPubMsgpack
+import OpenRTM_aist_paho_mqtt_module.InPortPahoSubMsgpack
+import OpenRTM_aist_paho_mqtt_module.OutPortPahoPubMsgpackSecure
+import OpenRTM_aist_paho_mqtt_module.InPortPahoSubMsgpackSecure
 import OpenRTM_aist_paho_mqtt_module.paho_client
 import OpenRTM_aist_paho_mqtt_module.reserializer
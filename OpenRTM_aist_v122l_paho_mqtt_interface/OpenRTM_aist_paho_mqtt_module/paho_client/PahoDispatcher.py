@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoDispatcher.py
+# @brief  PahoDispatcher class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import collections
+import sys
+import threading
+import time
+import traceback
+
+##
+# @class PahoDispatcher
+# @brief Pass received MQTT messages from the network loop to worker threads
+#
+# The on_message call back of paho only appends the message to a bounded
+# ring, so that socket reads and keepalive are not delayed by decoding and
+# buffer writes. Messages of the same topic always go to the same worker,
+# which keeps their order. When the ring of a worker is full, the network
+# loop waits for a free entry instead of dropping the message, until the
+# time given by limit_wait.
+#
+class PahoDispatcher:
+
+  ##
+  # @brief Constructor
+  # @param pworkers Number of worker threads
+  # @param psize Maximum number of messages waiting for each worker
+  # @param phandler Call back function handling a message, on_message(mqttc, obj, msg)
+  #
+  def __init__(self, pworkers, psize, phandler):
+    self.__size = psize
+    self.__handler = phandler
+    self.__running = True
+    self.__maxwait = None
+    self.__dropped = 0
+    self.__rings = []
+    self.__threads = []
+    for i in range(pworkers):
+      self.__rings.append((collections.deque(), threading.Condition(threading.Lock())))
+      thread = threading.Thread(target=self.__run, args=(i,))
+      thread.daemon = True
+      thread.start()
+      self.__threads.append(thread)
+
+  ##
+  # @brief Call back function for paho, which queues the message to a worker
+  #
+  def on_message(self, mqttc, obj, msg):
+    if len(self.__rings) > 1:
+      ring, cond = self.__rings[hash(msg.topic) % len(self.__rings)]
+    else:
+      ring, cond = self.__rings[0]
+    with cond:
+      deadline = None if self.__maxwait is None else self.__maxwait()
+      while len(ring) >= self.__size and self.__running:
+        if deadline is None:
+          cond.wait()
+          continue
+        remain = deadline - time.time()
+        if remain <= 0:
+          self.__dropped += 1
+          return
+        cond.wait(remain)
+      if not self.__running:
+        return
+      ring.append((mqttc, obj, msg))
+      cond.notify_all()
+
+  ##
+  # @brief Limit the time the network loop waits for a free entry
+  # @param pdeadline Function giving the time (time.time()) until which a message may wait, or None to wait until an entry is free
+  #
+  # A message still not queued at the time is dropped and counted, so that
+  # the network loop can handle PINGREQ and PINGRESP before the keepalive
+  # expires.
+  #
+  def limit_wait(self, pdeadline=None):
+    self.__maxwait = pdeadline
+
+  ##
+  # @brief Get the number of messages dropped after waiting for a free entry
+  # @return Number of dropped messages
+  #
+  def dropped_count(self):
+    return self.__dropped
+
+  ##
+  # @brief Handle the queued messages and stop the worker threads
+  # @param ptimeout Time to wait for each worker in seconds
+  #
+  def stop(self, ptimeout=1.0):
+    self.__running = False
+    for ring, cond in self.__rings:
+      with cond:
+        cond.notify_all()
+    for thread in self.__threads:
+      if thread is not threading.current_thread():
+        thread.join(ptimeout)
+
+  ##
+  # @brief Worker thread
+  #
+  def __run(self, pindex):
+    ring, cond = self.__rings[pindex]
+    while True:
+      with cond:
+        while not ring and self.__running:
+          cond.wait()
+        if not ring:
+          return
+        mqttc, obj, msg = ring.popleft()
+        cond.notify_all()
+      try:
+        self.__handler(mqttc, obj, msg)
+      except Exception:
+        sys.stderr.write("Exception in message dispatcher worker " + str(pindex) + " for topic " + msg.topic + ":\n" + traceback.format_exc())
@@ -13,7 +13,19 @@
 #     University of Aizu, Japan
 #
 
+import collections
+import threading
+import time
 import paho.mqtt.client as mqtt
+from paho.mqtt.properties import Properties
+from paho.mqtt.packettypes import PacketTypes
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoClientPool import PahoClientPool
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoNetworkLoop import PahoNetworkLoop
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoBatcher import PahoBatcher
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoCompressor import PahoCompressor
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoFragmenter import PahoFragmenter
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoSequencer import PahoSequencer
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoTopicAlias import PahoTopicAlias
 
 ##
 # @class PahoPublisher
@@ -21,11 +33,48 @@ import paho.mqtt.client as mqtt
 #
 class PahoPublisher:
 
+  # Message ID placeholder while a conflated payload is passed to publish()
+  SENDING = -1
+  # Return code of paho_pub when the bounded queue stays full until the timeout
+  ERR_TIMEOUT = -100
+
   ##
   # @brief Constructor
   #
   def __init__(self):
+    self.__protocol = mqtt.MQTTv311
     self.__pubcl = mqtt.Client(protocol=mqtt.MQTTv311)
+    self.__alias = PahoTopicAlias()
+    self.__properties = None
+    self.__pooled = False
+    self.__poolkey = None
+    self.__sharedloop = False
+    self.__async = False
+    self.__offline = "queue"
+    self.__pending = collections.deque(maxlen=1000)
+    self.__pendingdropped = 0
+    self.__pendingmutex = threading.Lock()
+    self.__connected = False
+    self.__ready = threading.Event()
+    self.__batcher = None
+    self.__compressor = None
+    self.__fragmenter = None
+    self.__sequencer = None
+    self.__maxqueued = 0
+    self.__conflate = False
+    self.__slot = None
+    self.__inflight = None
+    self.__early = set()
+    self.__slotmutex = threading.Lock()
+    self.__queuesize = 0
+    self.__policy = "drop_oldest"
+    self.__qtimeout = 1.0
+    self.__queue = collections.deque()
+    self.__outstanding = set()
+    self.__sending = 0
+    self.__qearly = set()
+    self.__dropped = 0
+    self.__qcond = threading.Condition(threading.Lock())
     print("PahoPublisher constructor was called.")
 
   ##
@@ -37,19 +86,70 @@ class PahoPublisher:
   ##
   # @brief Call back function when succeeded to connect to broker
   #
-  def on_connect(self, mqttc, obj, flags, rc):
+  def on_connect(self, mqttc, obj, flags, rc, properties=None):
     #print("rc: "+str(rc))
     if(rc == 0):
       print(" Connected to broker. ")
+      if properties is not None and self.__poolkey is None:
+        self.__alias.connect(getattr(properties, "TopicAliasMaximum", 0))
+      with self.__pendingmutex:
+        while self.__pending:
+          pdata, pretain = self.__pending.popleft()
+          self.__alias.publish(mqttc, self.__topic, pdata, self.__qos, pretain, self.__properties)
+        self.__connected = True
+        self.__ready.set()
+      if self.__conflate:
+        with self.__slotmutex:
+          self.__inflight = None
+        self.__conflate_send()
+      if self.__queuesize > 0:
+        if self.__qos == 0:
+          # QoS 0 messages not written before the disconnection are gone
+          with self.__qcond:
+            self.__outstanding.clear()
+        self.__queue_send()
     else:
       print("Failed to connect to broker with code "+str(rc)+".")
 
   ##
   # @brief Call back function when succeeded to disconnect from broker
   #
-  def on_disconnect(self, client, userdata, rc):
+  def on_disconnect(self, client, userdata, rc, properties=None):
+    self.__ready.clear()
+    if self.__poolkey is None:
+      self.__alias.disconnect()
     print(" Disconnected from broker with code "+str(rc)+". ")
 
+  ##
+  # @brief Call back function when a message was sent (QoS 0) or acknowledged (QoS 1, 2)
+  #
+  # With both the bounded queue and conflation, the message ID is passed
+  # on to conflation after the queue bookkeeping, since conflated messages
+  # are published without the queue.
+  #
+  def on_publish(self, client, userdata, mid):
+    if self.__queuesize > 0:
+      queued = False
+      with self.__qcond:
+        if mid in self.__outstanding:
+          self.__outstanding.discard(mid)
+          queued = True
+        elif self.__sending > 0:
+          self.__qearly.add(mid)
+      if queued:
+        self.__queue_send()
+        return
+    if not self.__conflate:
+      return
+    with self.__slotmutex:
+      if self.__inflight == PahoPublisher.SENDING:
+        self.__early.add(mid)
+        return
+      if self.__inflight != mid:
+        return
+      self.__inflight = None
+    self.__conflate_send()
+
   ##
   # @brief Initialize paho client
   # @param pclientid Client ID
@@ -69,13 +169,260 @@ class PahoPublisher:
     self.__retain = pretain
     self.__will = pwill
     self.__willretain = False
-    self.__pubcl.reinitialise(self.__clientid, self.__cleansession)
+    if self.__protocol == mqtt.MQTTv5:
+      # reinitialise() resets the protocol version to 3.1.1
+      self.__pubcl = self.new_client(self.__clientid)
+    else:
+      self.__pubcl.reinitialise(self.__clientid, self.__cleansession)
     if self.__qos > 0:
       self.__pubcl.max_inflight_messages_set(self.__maxinflight)
+      self.__pubcl.max_queued_messages_set(self.__maxqueued)
     if self.__will:
       self.__pubcl.will_set(self.__topic, self.__will, self.__qos, self.__willretain)
     self.__pubcl.on_connect = self.on_connect
     self.__pubcl.on_disconnect = self.on_disconnect
+    self.__pubcl.on_publish = self.on_publish
+
+  ##
+  # @brief Select the version of MQTT protocol
+  # @param pprotocol mqtt.MQTTv311 or mqtt.MQTTv5
+  #
+  # Must be called before paho_initialize. With MQTT v5, QoS 0 messages
+  # are sent with topic aliases when the broker allows them.
+  #
+  def paho_protocol_set(self, pprotocol=mqtt.MQTTv311):
+    self.__protocol = pprotocol
+
+  ##
+  # @brief Share the MQTT client with other publishers connected to the same broker
+  # @param ppool Whether to use the process-wide client pool
+  #
+  # Not applicable with a fixed client ID or a last will, since both belong
+  # to a single MQTT session.
+  #
+  def paho_pool_set(self, ppool=True):
+    if ppool and (self.__clientid or self.__will):
+      print("Client pool can not be used with client ID or last will. Own client is used.")
+      ppool = False
+    self.__pooled = ppool
+
+  ##
+  # @brief Limit the number of messages queued in the MQTT client
+  # @param pmaxqueued Maximum number of outgoing QoS 1 and 2 messages, 0 for no limit
+  #
+  # paho_pub returns MQTT_ERR_QUEUE_SIZE when the queue is full.
+  #
+  def paho_max_queued_set(self, pmaxqueued=0):
+    self.__maxqueued = pmaxqueued
+    if self.__qos > 0:
+      self.__pubcl.max_queued_messages_set(self.__maxqueued)
+
+  ##
+  # @brief Drive the MQTT client by the network loop shared in the process
+  # @param pshared Whether to use the shared network loop instead of own loop thread
+  #
+  def paho_shared_loop_set(self, pshared=True):
+    self.__sharedloop = pshared
+
+  ##
+  # @brief Connect to MQTT broker in background
+  # @param pasync Whether paho_connect returns without waiting for the connection
+  # @param poffline Policy for data published before the first CONNACK, 'queue' or 'reject'
+  #
+  # With 'queue', up to 1000 messages are held and sent when the connection
+  # is established, and the oldest ones are dropped and counted beyond that.
+  # With 'reject', paho_pub fails until connected. After the connection is
+  # once established, messages are passed to paho during reconnection as
+  # with a synchronous connection, and paho_pub returns the result of paho.
+  #
+  def paho_async_set(self, pasync=True, poffline="queue"):
+    self.__async = pasync
+    self.__offline = poffline
+
+  ##
+  # @brief Send several payloads in one MQTT message
+  # @param psize Maximum number of payloads in a message, 1 disables batching
+  # @param pms Maximum time in milliseconds a payload waits to be sent, 0 for no limit
+  #
+  # Receivers unpack the messages with PahoBatcher.unpack().
+  #
+  def paho_batch_set(self, psize=1, pms=10):
+    if psize > 1:
+      self.__batcher = PahoBatcher(psize, pms, self.__publish_batch)
+    else:
+      self.__batcher = None
+
+  ##
+  # @brief Compress the payloads of MQTT messages
+  # @param pmethod Compression method, 'zlib' or 'lzma', or 'none' to disable compression
+  # @param plevel Compression level from 0 to 9, -1 for the default level of the method
+  # @param pminsize Minimum payload size in bytes to be compressed
+  #
+  # A frame of batched payloads is compressed as a whole. Receivers restore
+  # the payloads with PahoCompressor.decompress().
+  #
+  def paho_compress_set(self, pmethod="none", plevel=-1, pminsize=1024):
+    if pmethod in PahoCompressor.METHODS:
+      self.__compressor = PahoCompressor(pmethod, plevel, pminsize)
+    else:
+      self.__compressor = None
+
+  ##
+  # @brief Split large payloads into several MQTT messages
+  # @param pmaxchunk Maximum size of a MQTT payload in bytes, 0 not to split payloads
+  #
+  # Payloads are split after batching and compression. Receivers reassemble
+  # the messages with PahoFragmenter.reassemble(). Not combined with
+  # conflation, which holds a single message.
+  #
+  def paho_fragment_set(self, pmaxchunk=0):
+    if pmaxchunk > 0 and self.__conflate:
+      print("Fragmentation can not be used with conflation. Fragmentation is disabled.")
+      pmaxchunk = 0
+    if pmaxchunk > 0:
+      self.__fragmenter = PahoFragmenter(pmaxchunk)
+    else:
+      self.__fragmenter = None
+
+  ##
+  # @brief Number the messages so that subscribers can drop duplicates
+  # @param psequence Whether to add a sequence number to each message
+  #
+  # The number is added after batching and compression and before
+  # splitting. Receivers strip it with PahoSequencer.check().
+  #
+  def paho_sequence_set(self, psequence=True):
+    if psequence:
+      self.__sequencer = PahoSequencer()
+    else:
+      self.__sequencer = None
+
+  ##
+  # @brief Let MQTT broker discard messages not delivered in time
+  # @param pexpiry Message Expiry Interval of MQTT v5 in seconds, 0 for no expiry
+  #
+  # The broker drops the messages queued for an offline subscriber when
+  # they expire, so a subscriber reconnecting with a kept session does not
+  # receive stale data.
+  #
+  def paho_expiry_set(self, pexpiry=0):
+    if pexpiry > 0 and self.__protocol != mqtt.MQTTv5:
+      print("Message expiry can not be used with MQTT 3.1.1. Message expiry is disabled.")
+      pexpiry = 0
+    if pexpiry > 0:
+      self.__properties = Properties(PacketTypes.PUBLISH)
+      self.__properties.MessageExpiryInterval = pexpiry
+    else:
+      self.__properties = None
+
+  ##
+  # @brief Bound the number of messages waiting to be sent
+  # @param psize Maximum number of waiting messages, 0 to pass all messages to paho at once
+  # @param ppolicy Policy when the queue is full, 'drop_oldest', 'drop_newest' or 'block'
+  # @param ptimeout Time to wait for a free entry with 'block' in seconds
+  #
+  # Messages are passed to paho only while fewer than max inflight of them
+  # are being sent, i.e. neither written to the socket (QoS 0) nor
+  # acknowledged (QoS 1, 2). The others wait in a queue of psize entries,
+  # so at most psize + max inflight messages are held while the broker is
+  # slow or unreachable. Dropped messages are counted.
+  #
+  def paho_queue_set(self, psize=0, ppolicy="drop_oldest", ptimeout=1.0):
+    self.__queuesize = psize
+    self.__policy = ppolicy
+    self.__qtimeout = ptimeout
+
+  ##
+  # @brief Get the number of messages dropped by the bounded queue or while connecting in background
+  # @return Number of dropped messages
+  #
+  def paho_dropped_count(self):
+    with self.__pendingmutex:
+      pending = self.__pendingdropped
+    with self.__qcond:
+      return self.__dropped + pending
+
+  ##
+  # @brief Keep only the latest unsent payload instead of queueing all payloads
+  # @param pconflate Whether to conflate payloads
+  #
+  # At most one message of this publisher is in paho's outgoing queue.
+  # A payload put while the previous one is being sent replaces the unsent
+  # payload in a single slot, which is sent when the previous message is
+  # written to the socket (QoS 0) or acknowledged (QoS 1, 2). Not combined
+  # with batching.
+  #
+  def paho_conflate_set(self, pconflate=True):
+    if pconflate and self.__batcher:
+      print("Batching can not be used with conflation. Batching is disabled.")
+      self.__batcher.stop()
+      self.__batcher = None
+    self.__conflate = pconflate
+
+  ##
+  # @brief Send the payloads waiting for batching at once
+  #
+  def paho_flush(self):
+    if self.__batcher:
+      self.__batcher.flush()
+
+  ##
+  # @brief Wait until the connection to MQTT broker is established
+  # @param ptimeout Time to wait in seconds, or None to wait forever
+  # @return True if connected
+  #
+  def paho_wait_connect(self, ptimeout=None):
+    return self.__ready.wait(ptimeout)
+
+  ##
+  # @brief Apply client settings to a MQTT client
+  # @param client MQTT client instance
+  #
+  def configure_client(self, client):
+    self.configure_inflight(client)
+
+  ##
+  # @brief Apply the limits of QoS 1 and 2 messages to a MQTT client
+  # @param client MQTT client instance
+  #
+  # Called for every publisher joining a shared client, so that the
+  # limits are set when any of the publishers uses QoS 1 or 2.
+  #
+  def configure_inflight(self, client):
+    if self.__qos > 0:
+      client.max_inflight_messages_set(self.__maxinflight)
+      client.max_queued_messages_set(self.__maxqueued)
+
+  ##
+  # @brief Create a MQTT client of the selected protocol version
+  # @param pclientid Client ID
+  # @return MQTT client instance
+  #
+  def new_client(self, pclientid=""):
+    return mqtt.Client(pclientid, protocol=self.__protocol)
+
+  ##
+  # @brief Get the arguments of connect() depending on the protocol version
+  # @return Dictionary of keyword arguments
+  #
+  # A MQTT v5 session is kept after disconnection only when clean session
+  # is disabled, as with MQTT 3.1.1.
+  #
+  def connect_options(self):
+    if self.__protocol != mqtt.MQTTv5:
+      return {}
+    properties = None
+    if not self.__cleansession:
+      properties = Properties(PacketTypes.CONNECT)
+      properties.SessionExpiryInterval = 0xFFFFFFFF
+    return {"clean_start": self.__cleansession, "properties": properties}
+
+  ##
+  # @brief Get the key of the shared client in the client pool
+  # @return Tuple of the connection settings
+  #
+  def get_pool_key(self):
+    return (self.__host, self.__port, self.__keepalive, self.__cleansession, self.__maxinflight, self.__maxqueued, self.__sharedloop, self.__protocol)
 
   ##
   # @brief Connect to MQTT broker
@@ -87,28 +434,220 @@ class PahoPublisher:
     self.__host = phost
     self.__port = pport
     self.__keepalive = pkeepalive
-    self.__pubcl.connect(self.__host, self.__port, self.__keepalive)
+    self.__connected = False
+    if self.__pooled:
+      self.__poolkey = self.get_pool_key()
+      self.__pubcl = PahoClientPool.instance().acquire(self.__poolkey, self, self.__host, self.__port, self.__keepalive, self.__sharedloop, self.__async)
+      self.__alias = PahoClientPool.instance().topic_alias(self.__poolkey)
+      return
+    if self.__sharedloop:
+      PahoNetworkLoop.instance().attach(self.__pubcl)
+      if self.__async:
+        PahoNetworkLoop.instance().connect_async(self.__pubcl, self.__host, self.__port, self.__keepalive, self.connect_options())
+      else:
+        self.__pubcl.connect(self.__host, self.__port, self.__keepalive, **self.connect_options())
+      return
+    if self.__async:
+      self.__pubcl.connect_async(self.__host, self.__port, self.__keepalive, **self.connect_options())
+    else:
+      self.__pubcl.connect(self.__host, self.__port, self.__keepalive, **self.connect_options())
     self.__pubcl.loop_start()
 
   ##
   # @brief Disconnect from MQTT broker
   #
   def paho_disconnect(self):
+    if self.__batcher:
+      self.__batcher.stop()
+    if self.__dropped > 0:
+      print(" "+str(self.__dropped)+" messages were dropped by the outgoing queue. ")
+    if self.__pendingdropped > 0:
+      print(" "+str(self.__pendingdropped)+" messages put before connection were dropped. ")
+    if self.__poolkey is not None:
+      PahoClientPool.instance().release(self.__poolkey, self)
+      self.__poolkey = None
+      return
+    if self.__sharedloop:
+      PahoNetworkLoop.instance().detach(self.__pubcl)
+      return
     self.__pubcl.loop_stop(True)
     self.__pubcl.disconnect()
 
   ##
   # @brief Publish a MQTT message
   # @param pdata Message payload
+  # @return MQTT_ERR_SUCCESS, the error code of paho (MQTT_ERR_NO_CONN, MQTT_ERR_QUEUE_SIZE, ...) or ERR_TIMEOUT
   #
   def paho_pub(self, pdata):
-    self.__pubcl.publish(self.__topic, pdata, self.__qos, self.__retain)
+    if self.__batcher:
+      rc = self.__batcher.add(pdata)
+      if rc is None:
+        return mqtt.MQTT_ERR_SUCCESS
+      return rc
+    if self.__compressor:
+      pdata = self.__compressor.compress(pdata)
+    if self.__sequencer:
+      pdata = self.__sequencer.stamp(pdata)
+    if self.__conflate:
+      if self.__offline == "reject" and self.__async and not self.__connected:
+        return mqtt.MQTT_ERR_NO_CONN
+      with self.__slotmutex:
+        self.__slot = pdata
+      self.__conflate_send()
+      return self.__held_rc()
+    return self.__publish_split(pdata, self.__retain)
 
   ##
   # @brief Publish a null message to clear retained message from MQTT broker
   #
   def paho_pub_nullmsg(self):
-    self.__pubcl.publish(self.__topic, "", self.__qos, True)
+    with self.__slotmutex:
+      self.__slot = None
+    self.__publish("", True)
+
+  ##
+  # @brief Publish a frame of batched payloads
+  #
+  def __publish_batch(self, pframe):
+    if self.__compressor:
+      pframe = self.__compressor.compress(pframe)
+    if self.__sequencer:
+      pframe = self.__sequencer.stamp(pframe)
+    return self.__publish_split(pframe, self.__retain)
+
+  ##
+  # @brief Publish a payload, split into fragments if it is larger than the maximum size
+  #
+  # The remaining fragments are not sent once a fragment fails, and the
+  # receiver drops the incomplete message after its timeout. Fragments
+  # held for the reconnection (QoS 1, 2 or the bounded queue) are not
+  # failures, and MQTT_ERR_NO_CONN is returned after all of them.
+  #
+  def __publish_split(self, pdata, pretain):
+    if not self.__fragmenter:
+      return self.__publish(pdata, pretain)
+    held = self.__qos > 0 or self.__queuesize > 0
+    rc = mqtt.MQTT_ERR_SUCCESS
+    for frame in self.__fragmenter.split(pdata):
+      rc = self.__publish(frame, pretain)
+      if rc != mqtt.MQTT_ERR_SUCCESS and not (held and rc == mqtt.MQTT_ERR_NO_CONN):
+        return rc
+    return rc
+
+  ##
+  # @brief Send the conflated payload unless a previous message is still being sent
+  #
+  # publish() is called without the slot lock, since paho calls on_publish
+  # with its own message lock held.
+  #
+  def __conflate_send(self):
+    while True:
+      with self.__slotmutex:
+        if self.__inflight is not None or self.__slot is None or not self.__ready.is_set():
+          return
+        pdata = self.__slot
+        self.__slot = None
+        self.__inflight = PahoPublisher.SENDING
+        self.__early.clear()
+      info = self.__alias.publish(self.__pubcl, self.__topic, pdata, self.__qos, self.__retain, self.__properties)
+      with self.__slotmutex:
+        if info.rc == mqtt.MQTT_ERR_QUEUE_SIZE or (self.__qos == 0 and info.rc != mqtt.MQTT_ERR_SUCCESS):
+          # Not queued by paho, keep it for the next connection unless replaced
+          if self.__slot is None:
+            self.__slot = pdata
+          self.__inflight = None
+          return
+        if info.mid in self.__early or info.is_published():
+          self.__inflight = None
+        else:
+          self.__inflight = info.mid
+          return
+
+  ##
+  # @brief Add a message to the bounded queue according to the overflow policy
+  #
+  def __enqueue(self, pdata, pretain):
+    with self.__qcond:
+      if len(self.__queue) >= self.__queuesize:
+        if self.__policy == "drop_newest":
+          self.__dropped += 1
+          return mqtt.MQTT_ERR_QUEUE_SIZE
+        elif self.__policy == "drop_oldest":
+          self.__queue.popleft()
+          self.__dropped += 1
+        else:
+          deadline = time.time() + self.__qtimeout
+          while len(self.__queue) >= self.__queuesize:
+            remain = deadline - time.time()
+            if remain <= 0:
+              self.__dropped += 1
+              return PahoPublisher.ERR_TIMEOUT
+            self.__qcond.wait(remain)
+      self.__queue.append((pdata, pretain))
+    self.__queue_send()
+    return self.__held_rc()
+
+  ##
+  # @brief Get the result of a message held by conflation or the bounded queue
+  # @return MQTT_ERR_NO_CONN while the established connection is lost, otherwise MQTT_ERR_SUCCESS
+  #
+  # The message is sent after the reconnection, as paho does for QoS 1 and
+  # 2 messages published while not connected.
+  #
+  def __held_rc(self):
+    if self.__connected and not self.__ready.is_set():
+      return mqtt.MQTT_ERR_NO_CONN
+    return mqtt.MQTT_ERR_SUCCESS
+
+  ##
+  # @brief Pass queued messages to paho while fewer than max inflight are being sent
+  #
+  # publish() is called without the queue lock, since paho calls on_publish
+  # with its own message lock held.
+  #
+  def __queue_send(self):
+    while True:
+      with self.__qcond:
+        if not self.__queue or not self.__ready.is_set():
+          return
+        if len(self.__outstanding) + self.__sending >= self.__maxinflight:
+          return
+        pdata, pretain = self.__queue.popleft()
+        if self.__sending == 0:
+          self.__qearly.clear()
+        self.__sending += 1
+        self.__qcond.notify_all()
+      info = self.__alias.publish(self.__pubcl, self.__topic, pdata, self.__qos, pretain, self.__properties)
+      with self.__qcond:
+        self.__sending -= 1
+        if info.rc == mqtt.MQTT_ERR_QUEUE_SIZE or (self.__qos == 0 and info.rc != mqtt.MQTT_ERR_SUCCESS):
+          # Not queued by paho, keep it for the next connection
+          self.__queue.appendleft((pdata, pretain))
+          return
+        if info.mid not in self.__qearly and not info.is_published():
+          self.__outstanding.add(info.mid)
+
+  ##
+  # @brief Publish, or hold the message until the first CONNACK according to the offline policy
+  #
+  def __publish(self, pdata, pretain):
+    if self.__queuesize > 0:
+      if self.__offline == "reject" and self.__async and not self.__connected:
+        return mqtt.MQTT_ERR_NO_CONN
+      return self.__enqueue(pdata, pretain)
+    if self.__async and not self.__connected:
+      with self.__pendingmutex:
+        if not self.__connected:
+          if self.__offline == "reject":
+            return mqtt.MQTT_ERR_NO_CONN
+          # The limit of paho's queue applies to the held QoS 1 and 2 messages as well
+          if self.__qos > 0 and self.__maxqueued > 0 and len(self.__pending) >= self.__maxqueued:
+            return mqtt.MQTT_ERR_QUEUE_SIZE
+          if len(self.__pending) == self.__pending.maxlen:
+            self.__pendingdropped += 1
+          self.__pending.append((pdata, pretain))
+          return mqtt.MQTT_ERR_SUCCESS
+    return self.__alias.publish(self.__pubcl, self.__topic, pdata, self.__qos, pretain, self.__properties).rc
 
   ##
   # @brief Get MQTT client
@@ -126,3 +665,61 @@ if __name__ == '__main__':
     pahop.paho_disconnect()
 
     del pahop
+
+    # The checks below need a broker on localhost as well
+    import socket
+    received = []
+    checker = mqtt.Client()
+    checker.on_message = lambda client, userdata, msg: received.append(msg.payload)
+    checker.connect("localhost")
+    checker.subscribe("check/#", 1)
+    checker.loop_start()
+    time.sleep(0.5)
+
+    def lose_connection(ppub):
+      ppub.get_client().socket().shutdown(socket.SHUT_RDWR)
+      while ppub.paho_wait_connect(0):
+        time.sleep(0.01)
+
+    # offline='reject' fails only before the first CONNACK of an async connection,
+    # conflated and queued messages are held during a reconnection
+    for name, conflate, queuesize in (("conflate", True, 0), ("queue", False, 10)):
+      for pasync in (False, True):
+        mode = name + (" async" if pasync else " sync")
+        pahop = PahoPublisher()
+        pahop.paho_initialize(ptopic="check/reject", pqos=1)
+        pahop.paho_async_set(pasync, "reject")
+        pahop.paho_conflate_set(conflate)
+        pahop.paho_queue_set(queuesize)
+        rc = pahop.paho_pub(mode + " before")
+        assert rc == (mqtt.MQTT_ERR_NO_CONN if pasync else mqtt.MQTT_ERR_SUCCESS), mode
+        pahop.paho_connect()
+        assert pahop.paho_wait_connect(5), mode
+        lose_connection(pahop)
+        rc = pahop.paho_pub(mode + " reconnecting")
+        assert rc == mqtt.MQTT_ERR_NO_CONN, mode
+        assert pahop.paho_wait_connect(5), mode
+        time.sleep(0.5)
+        assert ((mode + " before").encode() in received) != pasync, mode
+        assert (mode + " reconnecting").encode() in received, mode
+        pahop.paho_disconnect()
+        print("reject " + mode + ": OK")
+
+    # Conflation with the bounded queue sends every message put after the previous one was acknowledged
+    pahop = PahoPublisher()
+    pahop.paho_initialize(ptopic="check/conflate", pqos=1)
+    pahop.paho_conflate_set(True)
+    pahop.paho_queue_set(10)
+    pahop.paho_connect()
+    assert pahop.paho_wait_connect(5)
+    del received[:]
+    for i in range(5):
+      pahop.paho_pub("conflated %d" % i)
+      time.sleep(0.2)
+    time.sleep(0.5)
+    assert received == [("conflated %d" % i).encode() for i in range(5)], received
+    pahop.paho_disconnect()
+    print("conflate with queue: OK")
+
+    checker.loop_stop()
+    checker.disconnect()
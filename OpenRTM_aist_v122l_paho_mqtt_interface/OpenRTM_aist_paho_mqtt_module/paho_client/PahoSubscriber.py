@@ -13,7 +13,16 @@
 #     University of Aizu, Japan
 #
 
+import threading
+import time
 import paho.mqtt.client as mqtt
+from paho.mqtt.properties import Properties
+from paho.mqtt.packettypes import PacketTypes
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoNetworkLoop import PahoNetworkLoop
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoSubscriberPool import PahoSubscriberPool
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoDispatcher import PahoDispatcher
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoFragmenter import PahoFragmenter
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoSequencer import PahoSequencer
 
 ##
 # @class PahoSubscriber
@@ -21,11 +30,32 @@ import paho.mqtt.client as mqtt
 #
 class PahoSubscriber:
 
+  # Maximum time in seconds to wait for a read of the full buffer with flow control
+  FLOW_TIMEOUT = 1.0
+  # Part of each keepalive period the network loop may wait for the full buffer or ring of the workers
+  FLOW_KEEPALIVE = 0.5
+
   ##
   # @brief Constructor
   #
   def __init__(self):
+    self.__protocol = mqtt.MQTTv311
+    self.__share = ""
+    self.__receivemax = 0
+    self.__stopping = False
+    self.__reads = 0
+    self.__flowperiod = 0.0
+    self.__flowcond = threading.Condition()
     self.__subcl = mqtt.Client(protocol=mqtt.MQTTv311)
+    self.__pooled = False
+    self.__poolkey = None
+    self.__sharedloop = False
+    self.__async = False
+    self.__ready = threading.Event()
+    self.__dispatcher = None
+    self.__fragmenter = PahoFragmenter()
+    self.__dedup = False
+    self.__sequencer = PahoSequencer()
     print("PahoSubscriber constructor was called.")
 
   ##
@@ -37,24 +67,27 @@ class PahoSubscriber:
   ##
   # @brief Call back function when succeeded to connect to broker
   #
-  def on_connect(self, mqttc, obj, flags, rc):
+  def on_connect(self, mqttc, obj, flags, rc, properties=None):
     #print("rc: "+str(rc))
     if(rc == 0):
       print(" Connected to broker. ")
-      self.__subcl.subscribe(self.__topic, self.__qos)
+      if self.__poolkey is None:
+        self.__subcl.subscribe(self.get_topic_filter(), self.__qos)
+      self.__ready.set()
     else:
       print("Failed to connect to broker with code "+str(rc)+".")
 
   ##
   # @brief Call back function when succeeded to disconnect from broker
   #
-  def on_disconnect(self, client, userdata, rc):
+  def on_disconnect(self, client, userdata, rc, properties=None):
+    self.__ready.clear()
     print(" Disconnected from broker with code "+str(rc)+". ")
 
   ##
   # @brief Call back function when started to subscribe messages
   #
-  def on_subscribe(self, mqttc, obj, mid, granted_qos):
+  def on_subscribe(self, mqttc, obj, mid, granted_qos, properties=None):
     print("Subscription started: "+str(mid)+" "+str(granted_qos))
 
   ##
@@ -63,6 +96,12 @@ class PahoSubscriber:
   def on_message(self, mqttc, obj, msg):
     print(msg.topic+" "+str(msg.qos)+" "+str(msg.payload))
 
+  ##
+  # @brief Pass a message received by the shared client to the call back function
+  #
+  def deliver(self, mqttc, obj, msg):
+    self.__subcl.on_message(mqttc, obj, msg)
+
   ##
   # @brief Initialize paho client
   # @param pclientid Client ID
@@ -75,12 +114,291 @@ class PahoSubscriber:
     self.__cleansession = pcleansession
     self.__topic = ptopic
     self.__qos = pqos
-    self.__subcl.reinitialise(self.__clientid, self.__cleansession)
+    if self.__protocol == mqtt.MQTTv5:
+      # reinitialise() resets the protocol version to 3.1.1
+      self.__subcl = mqtt.Client(self.__clientid, protocol=self.__protocol)
+    else:
+      self.__subcl.reinitialise(self.__clientid, self.__cleansession)
     self.__subcl.on_connect = self.on_connect
     self.__subcl.on_disconnect = self.on_disconnect
     self.__subcl.on_subscribe = self.on_subscribe
     self.__subcl.on_message = self.on_message
 
+  ##
+  # @brief Select the version of MQTT protocol
+  # @param pprotocol mqtt.MQTTv311 or mqtt.MQTTv5
+  #
+  # Must be called before paho_initialize.
+  #
+  def paho_protocol_set(self, pprotocol=mqtt.MQTTv311):
+    self.__protocol = pprotocol
+
+  ##
+  # @brief Share the subscription with other subscribers in a group
+  # @param pgroup Share name, or an empty string to receive all messages
+  #
+  # Subscribes to '$share/<group>/<topic>' of MQTT v5, so that the broker
+  # delivers each message to only one of the subscribers in the group.
+  # Must be called after paho_initialize. Fragments of a message may be
+  # delivered to different subscribers, so publishers should not split
+  # payloads into fragments.
+  #
+  def paho_share_set(self, pgroup=""):
+    if pgroup and self.__protocol != mqtt.MQTTv5:
+      print("Shared subscription can not be used with MQTT 3.1.1. Shared subscription is disabled.")
+      pgroup = ""
+    if pgroup and ("/" in pgroup or "+" in pgroup or "#" in pgroup):
+      print("Share name can not contain '/', '+' or '#'. Shared subscription is disabled.")
+      pgroup = ""
+    self.__share = pgroup
+
+  ##
+  # @brief Get the topic filter to subscribe to
+  # @return Topic, or shared subscription filter of the topic
+  #
+  def get_topic_filter(self):
+    if self.__share:
+      return "$share/" + self.__share + "/" + self.__topic
+    return self.__topic
+
+  ##
+  # @brief Get the arguments of connect() depending on the protocol version
+  # @return Dictionary of keyword arguments
+  #
+  # A MQTT v5 session is kept after disconnection only when clean session
+  # is disabled, as with MQTT 3.1.1.
+  #
+  def connect_options(self):
+    if self.__protocol != mqtt.MQTTv5:
+      return {}
+    properties = None
+    if not self.__cleansession or self.__receivemax > 0:
+      properties = Properties(PacketTypes.CONNECT)
+      if not self.__cleansession:
+        properties.SessionExpiryInterval = 0xFFFFFFFF
+      if self.__receivemax > 0:
+        properties.ReceiveMaximum = self.__receivemax
+    return {"clean_start": self.__cleansession, "properties": properties}
+
+  ##
+  # @brief Share the MQTT client with other subscribers connected to the same broker
+  # @param ppool Whether to use the process-wide subscriber pool
+  #
+  # Must be called after paho_initialize, paho_share_set and
+  # paho_flow_control_set. Not applicable with a fixed client ID, which
+  # belongs to a single MQTT session, with a share group, or with flow
+  # control, which would hold back the messages of all subscribers
+  # sharing the client.
+  #
+  def paho_pool_set(self, ppool=True):
+    if ppool and self.__clientid:
+      print("Subscriber pool can not be used with client ID. Own client is used.")
+      ppool = False
+    if ppool and self.__share:
+      print("Subscriber pool can not be used with share group. Own client is used.")
+      ppool = False
+    if ppool and self.__receivemax > 0:
+      print("Subscriber pool can not be used with flow control. Own client is used.")
+      ppool = False
+    self.__pooled = ppool
+
+  ##
+  # @brief Create a MQTT client of the selected protocol version
+  # @return MQTT client instance
+  #
+  def new_client(self):
+    return mqtt.Client(protocol=self.__protocol)
+
+  ##
+  # @brief Apply client settings to a MQTT client
+  # @param client MQTT client instance
+  #
+  def configure_client(self, client):
+    pass
+
+  ##
+  # @brief Get the key of the shared client in the subscriber pool
+  # @return Tuple of the connection settings
+  #
+  def get_pool_key(self):
+    return (self.__host, self.__port, self.__keepalive, self.__cleansession, self.__sharedloop, self.__protocol)
+
+  ##
+  # @brief Drive the MQTT client by the network loop shared in the process
+  # @param pshared Whether to use the shared network loop instead of own loop thread
+  #
+  def paho_shared_loop_set(self, pshared=True):
+    self.__sharedloop = pshared
+
+  ##
+  # @brief Handle received messages in worker threads instead of the network loop
+  # @param pworkers Number of worker threads, 0 to handle messages in the network loop
+  # @param psize Maximum number of messages waiting for each worker
+  #
+  # Must be called after paho_initialize and set_on_message.
+  #
+  def paho_dispatch_set(self, pworkers=0, psize=1000):
+    if pworkers > 0:
+      self.__dispatcher = PahoDispatcher(pworkers, psize, self.__subcl.on_message)
+      self.__subcl.on_message = self.__dispatcher.on_message
+
+  ##
+  # @brief Set the limits for reassembling fragmented messages
+  # @param ptimeout Time in seconds to wait for the remaining fragments of a message
+  # @param pmaxbytes Maximum total size in bytes of the fragments of incomplete messages
+  #
+  def paho_reassembly_set(self, ptimeout=10.0, pmaxbytes=67108864):
+    self.__fragmenter = PahoFragmenter(0, ptimeout, pmaxbytes)
+
+  ##
+  # @brief Drop messages redelivered by MQTT broker
+  # @param pdedup Whether to drop duplicate messages
+  # @param pwindow Number of the latest sequence numbers of each publisher remembered
+  #
+  # Only messages numbered by publishers with paho_sequence_set are
+  # checked. paho acknowledges a QoS 1 message when on_message returns,
+  # so the broker redelivers a message received just before the
+  # connection was lost. Lost and reordered messages are detected within
+  # the window as well.
+  #
+  def paho_dedup_set(self, pdedup=False, pwindow=1024):
+    self.__dedup = pdedup
+    self.__sequencer = PahoSequencer(pwindow, pdedup)
+
+  ##
+  # @brief Reassemble a fragmented message and strip its sequence number
+  # @param msg Received MQTT message
+  # @return Payload when the message is complete, the payload of msg if it is not fragmented, otherwise None
+  #
+  # None is also returned for a duplicate message, which is dropped before
+  # decompression and deserialization.
+  #
+  def paho_reassemble(self, msg):
+    payload = self.__fragmenter.reassemble(msg.topic, msg.payload)
+    if payload is None:
+      return None
+    return self.__sequencer.check(payload)
+
+  ##
+  # @brief Get the number of duplicate messages received
+  # @return Number of duplicates, which are dropped with paho_dedup_set
+  #
+  def paho_duplicate_count(self):
+    return self.__sequencer.duplicate_count()
+
+  ##
+  # @brief Get the statistics of the messages numbered by publishers
+  # @return Dictionary of PahoSequencer.stats()
+  #
+  def paho_sequence_stats(self):
+    return self.__sequencer.stats()
+
+  ##
+  # @brief Hold back received messages while the buffer of the data port is full
+  # @param preceivemax Receive Maximum of MQTT v5, i.e. number of QoS 1 and 2 messages sent by the broker without acknowledgement, 0 to disable flow control
+  #
+  # paho acknowledges a QoS 1 or 2 message when on_message returns, so the
+  # data port retries a write failed with a full buffer (paho_flow_wait)
+  # before returning, and the broker stops sending when Receive Maximum
+  # messages are unacknowledged. With paho_dispatch_set, a message is
+  # acknowledged when it is queued to a worker, and the network loop waits
+  # while the ring of the worker is full. Not applicable with the shared
+  # network loop without workers, where the wait would stop all the clients
+  # of the loop.
+  #
+  # The network loop handles no PINGREQ and PINGRESP while it waits, so it
+  # waits at most FLOW_KEEPALIVE of each keepalive period in total. After
+  # that, messages are dropped as without flow control until the period
+  # ends, and the messages received meanwhile are handled without delay.
+  # Writes in the worker threads wait without limit.
+  #
+  # Must be called after paho_shared_loop_set and paho_dispatch_set.
+  #
+  def paho_flow_control_set(self, preceivemax=0):
+    if preceivemax > 0 and self.__sharedloop and self.__dispatcher is None:
+      print("Flow control can not be used with shared network loop without workers. Flow control is disabled.")
+      preceivemax = 0
+    if preceivemax > 0 and self.__protocol != mqtt.MQTTv5:
+      print("Receive Maximum can not be used with MQTT 3.1.1. Only writes to the full buffer are retried.")
+    self.__receivemax = min(preceivemax, 65535)
+
+  ##
+  # @brief Whether flow control is enabled
+  # @return True if writes to the full buffer are retried
+  #
+  def paho_flow_control_enabled(self):
+    return self.__receivemax > 0
+
+  ##
+  # @brief Start a write to the buffer with flow control
+  # @return State of the write to be passed to paho_flow_wait
+  #
+  # The number of reads of the buffer is taken before the write, so that a
+  # read between the failed write and paho_flow_wait is not missed.
+  #
+  def paho_flow_begin(self):
+    deadline = None
+    if self.__dispatcher is None and self.__keepalive > 0:
+      deadline = self.__flow_deadline()
+    return [self.__reads, deadline]
+
+  ##
+  # @brief Get the time until which the network loop may wait in the current keepalive period
+  #
+  def __flow_deadline(self):
+    now = time.time()
+    with self.__flowcond:
+      if now >= self.__flowperiod + self.__keepalive:
+        self.__flowperiod = now
+      return self.__flowperiod + self.__keepalive * PahoSubscriber.FLOW_KEEPALIVE
+
+  ##
+  # @brief Wait for a read of the full buffer before retrying a write
+  # @param pflow State of the write given by paho_flow_begin
+  # @return True to retry, False if flow control is disabled, the wait in the network loop is over or the subscriber is disconnecting
+  #
+  # Returns at once if the buffer was read since the last write, and waits
+  # at most FLOW_TIMEOUT in case the read is not notified.
+  #
+  def paho_flow_wait(self, pflow):
+    if self.__receivemax <= 0:
+      return False
+    with self.__flowcond:
+      timeout = PahoSubscriber.FLOW_TIMEOUT
+      if pflow[1] is not None:
+        timeout = min(timeout, pflow[1] - time.time())
+        if timeout <= 0:
+          return False
+      if self.__reads == pflow[0] and not self.__stopping:
+        self.__flowcond.wait(timeout)
+      pflow[0] = self.__reads
+      return not self.__stopping
+
+  ##
+  # @brief Notify a read of the buffer to the writes waiting with flow control
+  #
+  def paho_flow_notify(self):
+    if self.__receivemax <= 0:
+      return
+    with self.__flowcond:
+      self.__reads += 1
+      self.__flowcond.notify_all()
+
+  ##
+  # @brief Connect to MQTT broker in background
+  # @param pasync Whether paho_connect returns without waiting for the connection
+  #
+  def paho_async_set(self, pasync=True):
+    self.__async = pasync
+
+  ##
+  # @brief Wait until the connection to MQTT broker is established
+  # @param ptimeout Time to wait in seconds, or None to wait forever
+  # @return True if connected
+  #
+  def paho_wait_connect(self, ptimeout=None):
+    return self.__ready.wait(ptimeout)
+
   ##
   # @brief Connect to MQTT broker
   # @param phost MQTT broker endpoint address
@@ -91,7 +409,26 @@ class PahoSubscriber:
     self.__host = phost
     self.__port = pport
     self.__keepalive = pkeepalive
-    self.__subcl.connect(self.__host, self.__port, self.__keepalive)
+    with self.__flowcond:
+      self.__stopping = False
+    if self.__dispatcher and self.__receivemax > 0 and self.__keepalive > 0:
+      # Workers waiting for the full buffer must not stop the network loop for the keepalive
+      self.__dispatcher.limit_wait(self.__flow_deadline)
+    if self.__pooled:
+      self.__poolkey = self.get_pool_key()
+      PahoSubscriberPool.instance().acquire(self.__poolkey, self, self.__host, self.__port, self.__keepalive, self.__sharedloop, self.__async, self.__topic, self.__qos)
+      return
+    if self.__sharedloop:
+      PahoNetworkLoop.instance().attach(self.__subcl)
+      if self.__async:
+        PahoNetworkLoop.instance().connect_async(self.__subcl, self.__host, self.__port, self.__keepalive, self.connect_options())
+      else:
+        self.__subcl.connect(self.__host, self.__port, self.__keepalive, **self.connect_options())
+      return
+    if self.__async:
+      self.__subcl.connect_async(self.__host, self.__port, self.__keepalive, **self.connect_options())
+    else:
+      self.__subcl.connect(self.__host, self.__port, self.__keepalive, **self.connect_options())
     self.__subcl.loop_start()
     # You should select loop_forever method, if you use this code as a mqtt subscriber client.
     #self.__subcl.loop_forever()
@@ -100,8 +437,29 @@ class PahoSubscriber:
   # @brief Disconnect from MQTT broker
   #
   def paho_disconnect(self):
-    self.__subcl.loop_stop(True)
-    self.__subcl.disconnect()
+    # Release on_message waiting for the full buffer before joining the loop
+    with self.__flowcond:
+      self.__stopping = True
+      self.__flowcond.notify_all()
+    if self.__poolkey is not None:
+      PahoSubscriberPool.instance().release(self.__poolkey, self, self.__topic)
+      self.__poolkey = None
+    elif self.__sharedloop:
+      PahoNetworkLoop.instance().detach(self.__subcl)
+    else:
+      self.__subcl.loop_stop(True)
+      self.__subcl.disconnect()
+    if self.__dispatcher:
+      self.__dispatcher.stop()
+      if self.__dispatcher.dropped_count() > 0:
+        print(" "+str(self.__dispatcher.dropped_count())+" messages were dropped while the workers were busy. ")
+    if self.__fragmenter.dropped_count() > 0:
+      print(" "+str(self.__fragmenter.dropped_count())+" incomplete fragmented messages were dropped. ")
+    stats = self.__sequencer.stats()
+    if stats["received"] > 0:
+      print(" "+str(stats["received"])+" numbered messages were received: "+str(stats["lost"])+" lost, "+str(stats["duplicate"])+" duplicate, "+str(stats["reordered"])+" reordered. ")
+    if self.__dedup and stats["duplicate"] > 0:
+      print(" "+str(stats["duplicate"])+" duplicate messages were dropped. ")
 
   ##
   # @brief Set the call back function
@@ -0,0 +1,244 @@
+#!/usr/bin/python3
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoSubscriberPool.py
+# @brief  PahoSubscriberPool class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import threading
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoNetworkLoop import PahoNetworkLoop
+from OpenRTM_aist_paho_mqtt_module.paho_client.PahoTopicTrie import PahoTopicTrie
+
+##
+# @class PahoSubscriberPool
+# @brief Process-wide pool of MQTT clients shared by subscribers
+#
+# Subscribers connecting to the same broker with the same connection
+# settings share one MQTT client. The topic filters of all subscribers
+# are subscribed in one SUBSCRIBE packet when the client connects, and
+# each received message is passed to the subscribers of the matching
+# filters found by a PahoTopicTrie. A filter used by several subscribers
+# is subscribed once with the highest QoS. Filters of subscribers joining
+# a connected client within SUBSCRIBE_DELAY are also subscribed at once.
+#
+# Brokers deliver a message matching overlapping filters of a client
+# once in general (e.g. mosquitto), and it is passed to every subscriber
+# of the matching filters. Brokers sending a copy per matching
+# subscription, which MQTT 3.1.1 allows, make the subscribers of
+# overlapping filters receive the message more than once.
+#
+class PahoSubscriberPool:
+
+  __instance = None
+  __instance_mutex = threading.Lock()
+
+  # Time in seconds to collect the filters of joining subscribers into a SUBSCRIBE packet
+  SUBSCRIBE_DELAY = 0.01
+
+  ##
+  # @brief Constructor
+  #
+  def __init__(self):
+    self.__clients = {}
+    self.__mutex = threading.Lock()
+
+  ##
+  # @brief Get the singleton instance
+  # @return PahoSubscriberPool instance
+  #
+  @staticmethod
+  def instance():
+    with PahoSubscriberPool.__instance_mutex:
+      if PahoSubscriberPool.__instance is None:
+        PahoSubscriberPool.__instance = PahoSubscriberPool()
+    return PahoSubscriberPool.__instance
+
+  ##
+  # @brief Call back function when succeeded to connect to broker
+  #
+  # All topic filters are subscribed at once, then the event is passed on
+  # to all subscribers sharing the client. The state is changed with the
+  # same lock as the subscriber list, so that a subscriber joining at the
+  # same time gets the event exactly once, either here or from acquire.
+  #
+  def on_connect(self, mqttc, obj, flags, rc, properties=None):
+    if(rc == 0):
+      print(" Shared subscriber connected to broker. ")
+      with self.__mutex:
+        obj[6] = "connected"
+        topics = [(pfilter, max(users.values())) for pfilter, users in obj[3].items()]
+        users = [user for subscribers in obj[3].values() for user in subscribers]
+        del obj[4][:]
+      if topics:
+        mqttc.subscribe(topics)
+    else:
+      print("Shared subscriber failed to connect to broker with code "+str(rc)+".")
+      with self.__mutex:
+        obj[6] = "connecting"
+        users = [user for subscribers in obj[3].values() for user in subscribers]
+    for user in users:
+      user.on_connect(mqttc, obj, flags, rc, properties)
+
+  ##
+  # @brief Call back function when succeeded to disconnect from broker
+  #
+  # The event is passed on to all subscribers sharing the client.
+  #
+  def on_disconnect(self, client, userdata, rc, properties=None):
+    print(" Shared subscriber disconnected from broker with code "+str(rc)+". ")
+    with self.__mutex:
+      userdata[6] = "connecting"
+      users = [user for subscribers in userdata[3].values() for user in subscribers]
+    for user in users:
+      user.on_disconnect(client, userdata, rc, properties)
+
+  ##
+  # @brief Call back function when started to subscribe messages
+  #
+  def on_subscribe(self, mqttc, obj, mid, granted_qos, properties=None):
+    print("Shared subscription started: "+str(mid)+" "+str(granted_qos))
+
+  ##
+  # @brief Call back function when received a message
+  #
+  # The message is passed to the subscribers of the matching filters.
+  #
+  def on_message(self, mqttc, obj, msg):
+    for user in obj[2].match(msg.topic):
+      user.deliver(mqttc, obj, msg)
+
+  ##
+  # @brief Get the shared client for the key, connecting it on first use
+  # @param pkey Connection settings identifying the shared client
+  # @param puser Subscriber creating a new client and applying client settings (protocol, TLS) to it
+  # @param phost MQTT broker endpoint address
+  # @param pport MQTT messaging service port number
+  # @param pkeepalive Lifetime of client
+  # @param psharedloop Whether to drive the client by the shared network loop
+  # @param pasync Whether to connect in background without waiting for the connection
+  # @param pfilter Topic filter of the subscriber
+  # @param pqos Quality of MQTT messaging service
+  # @return Shared MQTT client instance
+  #
+  # The client is connected outside the lock, so that an unreachable
+  # broker does not stall the other subscribers. Subscribers joining while
+  # it is connecting get on_connect from the CONNACK, later ones get it
+  # here. If a blocking connection fails, the client is removed from the
+  # pool and the error is raised.
+  #
+  def acquire(self, pkey, puser, phost, pport, pkeepalive, psharedloop, pasync, pfilter, pqos):
+    with self.__mutex:
+      entry = self.__clients.get(pkey)
+      created = entry is None
+      if created:
+        client = puser.new_client()
+        # Client, whether driven by the shared loop, trie of subscribers, subscribers and QoS per filter,
+        # filters waiting to be subscribed, the timer to subscribe them and
+        # state ("connecting" until the CONNACK is handled, then "connected")
+        entry = [client, psharedloop, PahoTopicTrie(), {}, [], None, "connecting"]
+        client.user_data_set(entry)
+        client.on_connect = self.on_connect
+        client.on_disconnect = self.on_disconnect
+        client.on_subscribe = self.on_subscribe
+        client.on_message = self.on_message
+        puser.configure_client(client)
+        self.__clients[pkey] = entry
+      users = entry[3].setdefault(pfilter, {})
+      if not users or pqos > max(users.values()):
+        entry[4].append((pfilter, pqos))
+        if entry[5] is None:
+          entry[5] = threading.Timer(PahoSubscriberPool.SUBSCRIBE_DELAY, self.__subscribe, (entry,))
+          entry[5].daemon = True
+          entry[5].start()
+      users[puser] = pqos
+      entry[2].add(pfilter, puser)
+      client = entry[0]
+      connected = entry[6] == "connected"
+    if created:
+      try:
+        self.__connect(client, phost, pport, pkeepalive, psharedloop, pasync, puser.connect_options())
+      except:
+        with self.__mutex:
+          if self.__clients.get(pkey) is entry:
+            del self.__clients[pkey]
+          if entry[5] is not None:
+            entry[5].cancel()
+        if psharedloop:
+          PahoNetworkLoop.instance().detach(client)
+        raise
+    elif connected:
+      puser.on_connect(client, entry, {}, 0)
+    return client
+
+  ##
+  # @brief Connect a new shared client and start its network loop
+  #
+  def __connect(self, pclient, phost, pport, pkeepalive, psharedloop, pasync, poptions):
+    if psharedloop:
+      PahoNetworkLoop.instance().attach(pclient)
+      if pasync:
+        PahoNetworkLoop.instance().connect_async(pclient, phost, pport, pkeepalive, poptions)
+      else:
+        pclient.connect(phost, pport, pkeepalive, **poptions)
+    else:
+      if pasync:
+        pclient.connect_async(phost, pport, pkeepalive, **poptions)
+      else:
+        pclient.connect(phost, pport, pkeepalive, **poptions)
+      pclient.loop_start()
+
+  ##
+  # @brief Subscribe to the filters of the subscribers joined since the last SUBSCRIBE
+  #
+  # Filters joined before CONNACK are subscribed by on_connect instead.
+  #
+  def __subscribe(self, pentry):
+    with self.__mutex:
+      topics = [(pfilter, pqos) for pfilter, pqos in pentry[4] if pfilter in pentry[3]]
+      del pentry[4][:]
+      pentry[5] = None
+    if topics and pentry[0].is_connected():
+      pentry[0].subscribe(topics)
+
+  ##
+  # @brief Release the shared client, disconnecting it when no subscriber is left
+  # @param pkey Connection settings identifying the shared client
+  # @param puser Subscriber releasing the client
+  # @param pfilter Topic filter of the subscriber
+  #
+  def release(self, pkey, puser, pfilter):
+    with self.__mutex:
+      entry = self.__clients.get(pkey)
+      if entry is None:
+        return
+      entry[2].remove(pfilter, puser)
+      users = entry[3].get(pfilter, {})
+      users.pop(puser, None)
+      if users:
+        return
+      entry[3].pop(pfilter, None)
+      if entry[3]:
+        entry[0].unsubscribe(pfilter)
+        return
+      del self.__clients[pkey]
+      if entry[5] is not None:
+        entry[5].cancel()
+    if entry[1]:
+      PahoNetworkLoop.instance().detach(entry[0])
+    else:
+      entry[0].loop_stop(True)
+      entry[0].disconnect()
+
+  ##
+  # @brief Get the number of shared clients
+  # @return Number of connected shared clients
+  #
+  def size(self):
+    with self.__mutex:
+      return len(self.__clients)
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+# -*- coding: euc-jp -*-
+
+##
+# @file   PahoTopicAlias.py
+# @brief  PahoTopicAlias class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import copy
+import threading
+import paho.mqtt.client as mqtt
+from paho.mqtt.properties import Properties
+from paho.mqtt.packettypes import PacketTypes
+
+##
+# @class PahoTopicAlias
+# @brief Replace topic names of outgoing MQTT v5 messages by topic aliases
+#
+# The first message on a topic carries the topic name and a new alias,
+# and the following messages carry the alias only with an empty topic
+# name. Aliases are numbered up to the Topic Alias Maximum in CONNACK,
+# and topics beyond the maximum are sent with their names. The table is
+# cleared on every connection, since aliases are valid only within a
+# network connection.
+#
+# Aliases are used only for QoS 0. paho resends stored QoS 1 and 2
+# messages as they are after reconnecting, and a message carrying an
+# alias only is not valid on a new connection.
+#
+class PahoTopicAlias:
+
+  ##
+  # @brief Constructor
+  #
+  def __init__(self):
+    self.__maximum = 0
+    self.__aliases = {}
+    self.__sent = set()
+    self.__mutex = threading.Lock()
+
+  ##
+  # @brief Start using aliases on a new connection
+  # @param pmaximum Topic Alias Maximum of the broker, 0 not to use aliases
+  #
+  def connect(self, pmaximum):
+    with self.__mutex:
+      self.__maximum = pmaximum
+      self.__aliases.clear()
+      self.__sent.clear()
+
+  ##
+  # @brief Stop using aliases until the next connection
+  #
+  def disconnect(self):
+    with self.__mutex:
+      self.__maximum = 0
+      self.__aliases.clear()
+      self.__sent.clear()
+
+  ##
+  # @brief Publish a message with the alias of its topic
+  # @param client MQTT client instance
+  # @param ptopic Topic name
+  # @param pdata Message payload
+  # @param pqos Quality of MQTT messaging service
+  # @param pretain Whether to retain the message in MQTT broker
+  # @param pproperties Other properties of the message, or None
+  # @return MQTTMessageInfo of paho
+  #
+  # publish() is called with the lock held, so that the message defining
+  # an alias is queued in paho before the messages using it.
+  #
+  def publish(self, client, ptopic, pdata, pqos, pretain, pproperties=None):
+    if pqos > 0 or self.__maximum == 0:
+      return client.publish(ptopic, pdata, pqos, pretain, pproperties)
+    with self.__mutex:
+      alias = self.__aliases.get(ptopic)
+      if alias is None:
+        if len(self.__aliases) >= self.__maximum:
+          return client.publish(ptopic, pdata, pqos, pretain, pproperties)
+        alias = len(self.__aliases) + 1
+        self.__aliases[ptopic] = alias
+      if pproperties is None:
+        properties = Properties(PacketTypes.PUBLISH)
+      else:
+        properties = copy.copy(pproperties)
+      properties.TopicAlias = alias
+      if alias in self.__sent:
+        return client.publish("", pdata, pqos, pretain, properties)
+      info = client.publish(ptopic, pdata, pqos, pretain, properties)
+      if info.rc == mqtt.MQTT_ERR_SUCCESS:
+        self.__sent.add(alias)
+      return info
+
+if __name__ == '__main__':
+
+    # Packet sizes of a small message with and without the alias
+    topic = "factory/line3/robot12/arm/joint_states"
+    properties = Properties(PacketTypes.PUBLISH)
+    properties.TopicAlias = 1
+    payload = b"\x00" * 16
+    plain = 2 + 2 + len(topic) + 1 + len(payload)
+    aliased = 2 + 2 + len(properties.pack()) + len(payload)
+    print("PUBLISH packet: %d bytes with topic name, %d bytes with topic alias" % (plain, aliased))
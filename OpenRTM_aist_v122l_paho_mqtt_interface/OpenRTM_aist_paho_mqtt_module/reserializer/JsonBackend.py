@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: euc-jp -*-
+
+##
+# @file  JsonBackend.py
+# @brief JsonBackend class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+import importlib
+import json
+
+##
+# @class JsonBackend
+# @brief JSON parser used by the reserializer
+#
+# orjson, ujson or rapidjson is used if installed, in this order, and the
+# standard json module otherwise. A backend can be pinned by name.
+#
+# Only parsing is switched. The JSON text of the OutPorts is written by
+# CdrJsonTranscoder in the format of json.dumps(), which the other
+# libraries do not reproduce (separators, NaN and Infinity), so that the
+# messages stay identical whichever library is installed.
+#
+class JsonBackend:
+
+  # Backends in the order of preference
+  NAMES = ("orjson", "ujson", "rapidjson", "json")
+
+  ##
+  # @brief Constructor
+  # @param name Name of the backend, or "auto" for the first installed one
+  #
+  def __init__(self, name="auto"):
+    self.name = None
+    self._loads = None
+    names = JsonBackend.NAMES
+    if name != "auto":
+      names = (name,) + names
+    for candidate in names:
+      try:
+        module = importlib.import_module(candidate)
+      except ImportError:
+        if candidate == name:
+          print("JSON backend '" + name + "' is not installed. Another backend is used.")
+        continue
+      self.name = candidate
+      self._loads = module.loads
+      break
+
+  ##
+  # @brief Parse JSON text
+  # @param text JSON text (str or bytes)
+  # @return Parsed object
+  #
+  # NaN, Infinity and integers out of 64 bit written by json.dumps() are
+  # not accepted by some backends. Such text is parsed by the json module,
+  # so the result does not depend on the backend.
+  #
+  def loads(self, text):
+    try:
+      return self._loads(text)
+    except ValueError:
+      if self.name == "json":
+        raise
+      return json.loads(text)
+
+if __name__ == '__main__':
+
+  import time
+  from omniORB import *
+  import omniORB
+  import OpenRTM_aist
+  import RTC
+  from OpenRTM_aist_paho_mqtt_module.reserializer.DataTypeFormat import DataTypeFormat
+
+  ##
+  # @brief Average time of a call in microseconds and its result, or None if it fails
+  #
+  def measure(func, count=10000):
+    try:
+      start = time.time()
+      for i in range(count):
+        result = func()
+      return (time.time() - start) / count * 1e6, result
+    except Exception:
+      return None, None
+
+  # Parsing the JSON text of OutPortPahoPubJson for all struct types in RTC
+  # module with the installed backends, against the json module. Writing
+  # by the backends is shown against CdrJsonTranscoder for reference.
+  modules = []
+  for name in JsonBackend.NAMES:
+    try:
+      modules.append(importlib.import_module(name))
+    except ImportError:
+      pass
+  backends = [JsonBackend(module.__name__) for module in modules]
+  print("%-36s %s %s" % ("loads", " ".join(["%10s" % b.name for b in backends]), "same"))
+  samples = []
+  for name in sorted(dir(RTC)):
+    desc = omniORB.findType(getattr(getattr(RTC, name), '_NP_RepositoryId', None))
+    if not desc or desc[0] != omniORB.tcInternal.tv_struct:
+      continue
+    try:
+      datatype = OpenRTM_aist.instantiateDataType(getattr(RTC, name))
+      formatter = DataTypeFormat(datatype, True)
+      cdrdata = cdrMarshal(any.to_any(datatype).typecode(), datatype, True)
+      jsontext = formatter.reserializeFromCdrToJson(cdrdata)
+    except Exception:
+      continue
+    samples.append((formatter, cdrdata, jsontext))
+    results = [measure(lambda: b.loads(jsontext)) for b in backends]
+    reference = json.loads(jsontext)
+    same = str(all([r[1] == reference for r in results]))
+    times = ["%8.1fus" % t if t is not None else "%10s" % "-" for t, r in results]
+    print("%-36s %s %s" % (formatter._TYPE_NAME, " ".join(times), same))
+
+  print("")
+  print("%-36s %10s %s %s" % ("dumps", "transcoder", " ".join(["%10s" % m.__name__ for m in modules]), "same text"))
+  for formatter, cdrdata, jsontext in samples:
+    results = [measure(lambda: formatter.reserializeFromCdrToJson(cdrdata))]
+    for module in modules:
+      results.append(measure(lambda: module.dumps({formatter._TYPE_NAME: formatter._toDict(cdrUnmarshal(formatter._typecode, cdrdata, True))})))
+    same = [m.__name__ for m, r in zip(modules, results[1:]) if r[1] == jsontext]
+    times = ["%8.1fus" % t if t is not None else "%10s" % "-" for t, r in results]
+    print("%-36s %s %s" % (formatter._TYPE_NAME, " ".join(times), ", ".join(same)))
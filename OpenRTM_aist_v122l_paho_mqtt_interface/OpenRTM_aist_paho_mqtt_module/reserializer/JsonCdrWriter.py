@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: euc-jp -*-
+
+##
+# @file  JsonCdrWriter.py
+# @brief JsonCdrWriter class
+# @date   2026/10/18
+# @author agent
+#
+# Copyright (C) 2026
+#     agent
+#
+
+from omniORB import CORBA
+import omniORB
+import OpenRTM_aist
+import binascii
+import struct
+
+# Format character, size (= alignment) and conversion of basic types
+PRIMITIVES = {
+  CORBA.tk_short: ("h", 2, None),
+  CORBA.tk_long: ("i", 4, None),
+  CORBA.tk_ushort: ("H", 2, None),
+  CORBA.tk_ulong: ("I", 4, None),
+  CORBA.tk_longlong: ("q", 8, None),
+  CORBA.tk_ulonglong: ("Q", 8, None),
+  CORBA.tk_float: ("f", 4, None),
+  CORBA.tk_double: ("d", 8, None),
+  CORBA.tk_boolean: ("?", 1, None),
+  CORBA.tk_char: ("c", 1, "_char"),
+  CORBA.tk_octet: ("B", 1, None),
+}
+
+##
+# @brief Encode a char of JSON for struct.pack_into()
+#
+# Only ASCII is accepted, since other characters depend on the code set of
+# the ORB. ValueError makes the caller fall back to cdrMarshal().
+#
+def _char(val):
+  return val.encode("ascii")
+
+##
+# @brief Encode a string of JSON for CDR
+#
+def _string(val):
+  data = val.encode("ascii")
+  if b"\0" in data:
+    raise ValueError("string contains NUL")
+  return data
+
+##
+# @brief Decode a sequence of octet of JSON, given in base64 text
+#
+# A list of numbers, as in the default value, is also accepted.
+#
+def _octets(val):
+  if isinstance(val, str):
+    return binascii.a2b_base64(val)
+  elif isinstance(val, list):
+    return bytes(bytearray(val))
+  raise TypeError("sequence of octet is not base64 text")
+
+##
+# @brief Check a sequence of octet given as binary (MessagePack)
+#
+def _binary(val):
+  if isinstance(val, bytes):
+    return val
+  elif isinstance(val, list):
+    return bytes(bytearray(val))
+  raise TypeError("sequence of octet is not binary")
+
+##
+# @brief Raise KeyError for the first key of a dict object not in the members of a struct
+#
+# Keys not in the data type are rejected as by DataTypeFormat.convertDictToDataType().
+#
+def _unknownKey(d, known):
+  for key in d:
+    if key not in known:
+      raise KeyError(key)
+
+##
+# @brief Make room for n bytes at offset o of the buffer
+#
+def _reserve(b, o, n):
+  if o + n > len(b):
+    b.extend(bytearray(max(o + n - len(b), len(b))))
+
+##
+# @class JsonCdrWriter
+# @brief Generate a function writing CDR data directly from parsed JSON
+#
+# The function takes the dict object given by json.loads() and packs the
+# members into a preallocated bytearray with struct formats and alignment
+# computed from the TypeCode, without constructing DataType objects for
+# cdrMarshal(). Missing keys take the default values of
+# OpenRTM_aist.instantiateDataType() and keys not in the data type raise
+# KeyError, as in DataTypeFormat. RTC.TimedLong becomes
+#
+#   if not _k1.issuperset(d): _unknownKey(d, _k1)
+#   d2 = d['tm'] if 'tm' in d else _empty
+#   if not _k3.issuperset(d2): _unknownKey(d2, _k3)
+#   _s5.pack_into(b, o, d2['sec'] if 'sec' in d2 else _v4, ...); o += 12
+#
+# The buffer starts with the size of the previous message of the type, so
+# a stream of samples of the same size is written without growing it.
+# Sequences and arrays of octet are given in base64 text, or as bytes in
+# binary mode, and copied into the buffer at once. Types with members of
+# other kinds (enum, wstring, sequence of char, ...) are not supported, and
+# compile() returns None for them.
+#
+class JsonCdrWriter:
+
+  ##
+  # @brief Constructor
+  # @param endian True for little endian, False for big endian
+  # @param binary True for sequences of octet given as bytes instead of base64 text
+  #
+  def __init__(self, endian, binary=False):
+    self._order = "<" if endian else ">"
+    self._namespace = {"_char": _char, "_string": _string, "_reserve": _reserve, "_empty": {}, "_unknownKey": _unknownKey,
+                       "_ulong": struct.Struct(self._order + "I"), "_pack_into": struct.pack_into,
+                       "_octets": _binary if binary else _octets}
+    self._count = 0
+
+  ##
+  # @brief Compile the writer
+  # @param typecode TypeCode of the data type
+  # @return Function converting dict object to CDR data, or None if not supported
+  #
+  def compile(self, typecode):
+    if not self.supported(typecode):
+      return None
+    body = self.Body(self)
+    self.struct(body, self.unalias(typecode), "d")
+    body.flush()
+    hint = self.constant("_h", [body.minimum])
+    lines = ["def _write(d):", "  b = bytearray(%s[0])" % hint, "  o = 0"]
+    lines += ["  " + line for line in body.lines]
+    lines += ["  %s[0] = o" % hint, "  del b[o:]", "  return bytes(b)"]
+    return self.define("\n".join(lines) + "\n", "_write")
+
+  ##
+  # @brief Define a generated function in the namespace of the writer
+  #
+  def define(self, source, name):
+    exec(compile(source, "<writer %s>" % name, "exec"), self._namespace)
+    return self._namespace[name]
+
+  ##
+  # @brief Register a value in the namespace of the writer
+  # @return Name of the value
+  #
+  def constant(self, prefix, val):
+    name = self.newName(prefix)
+    self._namespace[name] = val
+    return name
+
+  ##
+  # @brief Get a new name for a generated variable
+  #
+  def newName(self, prefix):
+    self._count += 1
+    return "%s%d" % (prefix, self._count)
+
+  ##
+  # @brief Resolve aliases (typedef)
+  #
+  @staticmethod
+  def unalias(typecode):
+    while typecode.kind() == CORBA.tk_alias:
+      typecode = typecode.content_type()
+    return typecode
+
+  ##
+  # @brief Whether the writer supports all members of the type
+  #
+  def supported(self, typecode):
+    typecode = self.unalias(typecode)
+    kind = typecode.kind()
+    if kind in PRIMITIVES or kind == CORBA.tk_string:
+      return True
+    elif kind == CORBA.tk_struct:
+      for i in range(typecode.member_count()):
+        if not self.supported(typecode.member_type(i)):
+          return False
+      return True
+    elif kind in (CORBA.tk_sequence, CORBA.tk_array):
+      content = self.unalias(typecode.content_type())
+      # Sequences and arrays of char are mapped to strings
+      if content.kind() == CORBA.tk_char:
+        return False
+      if content.kind() == CORBA.tk_octet:
+        return True
+      return self.supported(content)
+    return False
+
+  ##
+  # @brief Generate the code of a struct
+  # @param body Body of the function being generated
+  # @param typecode TypeCode of the struct
+  # @param var Variable of the dict object of the struct
+  #
+  def struct(self, body, typecode, var):
+    default = OpenRTM_aist.instantiateDataType(omniORB.findType(typecode.id()))
+    known = self.constant("_k", frozenset([typecode.member_name(i) for i in range(typecode.member_count())]))
+    body.prepare("if not %s.issuperset(%s): _unknownKey(%s, %s)" % (known, var, var, known))
+    for i in range(typecode.member_count()):
+      name = typecode.member_name(i)
+      key = "%r" % name
+      member = self.unalias(typecode.member_type(i))
+      if member.kind() == CORBA.tk_struct:
+        sub = self.newName("d")
+        body.prepare("%s = %s[%s] if %s in %s else _empty" % (sub, var, key, key, var))
+        self.struct(body, member, sub)
+      else:
+        dflt = self.constant("_v", getattr(default, name))
+        self.value(body, member, "(%s[%s] if %s in %s else %s)" % (var, key, key, var, dflt))
+
+  ##
+  # @brief Generate the code of a value other than struct
+  # @param expr Expression of the value
+  #
+  def value(self, body, typecode, expr):
+    kind = typecode.kind()
+    if kind in PRIMITIVES:
+      char, size, conv = PRIMITIVES[kind]
+      if conv is not None:
+        expr = "%s(%s)" % (conv, expr)
+      body.primitive(char, size, expr)
+    elif kind == CORBA.tk_string:
+      body.align(4)
+      body.code("s = _string(%s); n = len(s)" % expr)
+      body.code("_reserve(b, o, 5 + n)")
+      body.code("_ulong.pack_into(b, o, n + 1); b[o+4:o+4+n] = s; b[o+4+n] = 0; o += 5 + n")
+      body.variable()
+    else:
+      self.sequence(body, typecode, expr)
+
+  ##
+  # @brief Generate the code of a sequence or an array
+  #
+  def sequence(self, body, typecode, expr):
+    content = self.unalias(typecode.content_type())
+    seq = self.newName("q")
+    if content.kind() == CORBA.tk_octet:
+      expr = "_octets(%s)" % expr
+    body.prepare("%s = %s; n = len(%s)" % (seq, expr, seq))
+    if typecode.kind() == CORBA.tk_sequence:
+      body.primitive("I", 4, "n")
+      body.flush()
+    else:
+      body.flush()
+      body.code("if n != %d:" % typecode.length())
+      body.code("  raise ValueError('array length mismatch')")
+    if content.kind() == CORBA.tk_octet:
+      body.code("_reserve(b, o, n)")
+      body.code("b[o:o+n] = %s; o += n" % seq)
+      body.unknown()
+      body.variable()
+    elif content.kind() in PRIMITIVES:
+      char, size, conv = PRIMITIVES[content.kind()]
+      pad = body.padding(size)
+      body.code("if n:")
+      body.code("  _reserve(b, o, %d + n * %d)" % (size, size))
+      if pad is None:
+        body.code("  o = (o + %d) & %d" % (size - 1, -size))
+      elif pad:
+        body.code("  o += %d" % pad)
+      body.code("  _pack_into('%s%%d%s' %% n, b, o, *%s); o += n * %d" % (self._order, char, seq, size))
+      if size < 4 or typecode.kind() == CORBA.tk_array:
+        body.unknown()
+      else:
+        body.known(4, 0)
+      body.variable()
+    else:
+      # Elements are written by another function starting at any alignment
+      element = self.Body(self)
+      element.unknown()
+      element.variable()
+      if content.kind() == CORBA.tk_struct:
+        self.struct(element, content, "d")
+      else:
+        self.value(element, content, "d")
+      element.flush()
+      func = self.constant("_e", None)
+      lines = ["def %s(b, o, d):" % func]
+      lines += ["  " + line for line in element.lines]
+      lines += ["  return o"]
+      self.define("\n".join(lines) + "\n", func)
+      body.code("for x in %s:" % seq)
+      body.code("  o = %s(b, o, x)" % func)
+      body.unknown()
+      body.variable()
+
+  ##
+  # @class Body
+  # @brief Lines of a generated function, the alignment known at generation
+  # time and whether the buffer is known to be large enough
+  #
+  class Body:
+
+    ##
+    # @brief Constructor
+    # @param writer JsonCdrWriter generating the function
+    #
+    def __init__(self, writer):
+      self._writer = writer
+      self.lines = []
+      # Offset is known to be 'phase' modulo 'modulus'
+      self._modulus = 8
+      self._phase = 0
+      # Size written before the first value of variable length
+      self.minimum = 0
+      self._fixed = True
+      self._prepare = []
+      self._format = ""
+      self._size = 0
+      self._args = []
+
+    ##
+    # @brief Add a line evaluated before the pending struct.pack_into() call
+    #
+    def prepare(self, line):
+      self._prepare.append(line)
+
+    ##
+    # @brief Add a value of basic type to the pending struct.pack_into() call
+    #
+    def primitive(self, char, size, expr):
+      pad = self.padding(size)
+      if pad is None:
+        self.align(size)
+        pad = 0
+      self._format += "x" * pad + char
+      self._size += pad + size
+      self._phase = (self._phase + pad + size) % self._modulus
+      self._args.append(expr)
+
+    ##
+    # @brief Padding before a value of the alignment, or None if not known
+    #
+    def padding(self, size):
+      if self._modulus < size:
+        return None
+      return (-self._phase) % size
+
+    ##
+    # @brief Align the offset
+    #
+    def align(self, size):
+      pad = self.padding(size)
+      if pad is None:
+        self.flush()
+        self.lines.append("o = (o + %d) & %d" % (size - 1, -size))
+        self.known(size, 0)
+      elif pad:
+        self._format += "x" * pad
+        self._size += pad
+        self._phase = (self._phase + pad) % self._modulus
+
+    ##
+    # @brief Add a line of code after the pending values
+    #
+    def code(self, line):
+      self.flush()
+      self.lines.append(line)
+
+    ##
+    # @brief Set the alignment known after the code
+    #
+    def known(self, modulus, phase):
+      self._modulus = modulus
+      self._phase = phase
+
+    ##
+    # @brief Forget the alignment after code of variable length
+    #
+    def unknown(self):
+      self.known(1, 0)
+
+    ##
+    # @brief Forget the size of the buffer after code of variable length
+    #
+    def variable(self):
+      self._fixed = False
+
+    ##
+    # @brief Generate the pending struct.pack_into() call
+    #
+    def flush(self):
+      self.lines += self._prepare
+      if self._size:
+        name = self._writer.constant("_s", struct.Struct(self._writer._order + self._format))
+        if self._fixed:
+          self.minimum += self._size
+        else:
+          self.lines.append("_reserve(b, o, %d)" % self._size)
+        self.lines.append("%s.pack_into(b, o, %s); o += %d" % (name, ", ".join(self._args), self._size))
+      self._prepare = []
+      self._format = ""
+      self._size = 0
+      self._args = []